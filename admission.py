@@ -0,0 +1,242 @@
+"""Admission control for the MCP endpoint: concurrency limits and fast 429s"""
+
+import asyncio
+import json
+import time
+from collections import deque
+
+from metrics import Histogram
+
+REJECTION = json.dumps(
+    {
+        "jsonrpc": "2.0",
+        "id": None,
+        "error": {"code": -32000, "message": "Server overloaded, retry later"},
+    }
+).encode()
+
+# Bodies are read up to this far to tell requests, which need a slot, from
+# notifications and responses, which don't. A longer body is a request
+PEEK_BYTES = 4096
+
+
+class _Slots:
+    """Counting semaphore whose waiters are served in order, with a deadline
+
+    A released slot is handed straight to the oldest waiter, so a request
+    that arrives later can't overtake one that has been queueing.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.in_use = 0
+        self._waiters: deque[asyncio.Future] = deque()
+
+    def try_acquire(self) -> bool:
+        while self._waiters and self._waiters[0].done():
+            self._waiters.popleft()
+        if self.in_use < self.limit and not self._waiters:
+            self.in_use += 1
+            return True
+        return False
+
+    async def acquire(self, deadline: float) -> bool:
+        """Wait for a slot until ``deadline`` (event loop time)"""
+        loop = asyncio.get_running_loop()
+        waiter = loop.create_future()
+        self._waiters.append(waiter)
+        timer = loop.call_at(deadline, lambda: waiter.done() or waiter.set_result(False))
+        try:
+            return await waiter
+        except asyncio.CancelledError:
+            # The slot may have been handed over just as we were cancelled
+            if waiter.done() and not waiter.cancelled() and waiter.result():
+                self.release()
+            raise
+        finally:
+            timer.cancel()
+
+    def release(self) -> None:
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(True)
+                return
+        self.in_use -= 1
+
+
+async def _peek(receive) -> tuple[list[dict], bytes | None]:
+    """Receive the start of a request body
+
+    Returns the ASGI messages read, to be replayed, and the whole body if it
+    ended within ``PEEK_BYTES``, otherwise None.
+    """
+    messages = []
+    chunks = []
+    size = 0
+    while True:
+        message = await receive()
+        messages.append(message)
+        if message["type"] != "http.request":
+            return messages, None
+        chunk = message.get("body", b"")
+        chunks.append(chunk)
+        size += len(chunk)
+        if not message.get("more_body", False):
+            return messages, b"".join(chunks)
+        if size >= PEEK_BYTES:
+            return messages, None
+
+
+def _needs_slot(body: bytes | None) -> bool:
+    """Whether a body is a JSON-RPC request, as opposed to a notification or response"""
+    if body is None:
+        return True
+    try:
+        message = json.loads(body)
+    except ValueError:
+        return True
+    return not isinstance(message, dict) or ("id" in message and "method" in message)
+
+
+class AdmissionController:
+    """ASGI middleware bounding concurrent MCP POST requests
+
+    A request needs a slot under its session's limit and then one under the
+    global limit. If none is free it joins a FIFO queue of at most
+    ``queue_size`` waiters for up to ``queue_timeout`` seconds. A full queue
+    or a missed deadline answers ``429`` with ``Retry-After`` straight away,
+    so admitted requests keep their latency instead of everyone slowing down
+    together. Requests without a session ID (``initialize``) only count
+    against the global limit; GET streams and other routes pass through.
+
+    Notifications and client responses, messages without both an ``id``
+    and a ``method``, skip admission: they hold no slot for long, and
+    ``notifications/cancelled`` must get through to a saturated session
+    most of all. Telling them apart costs reading the first ``PEEK_BYTES``
+    of the body, and that is all a rejected request has read: install this
+    outside any middleware that buffers the body.
+    """
+
+    def __init__(
+        self,
+        app,
+        max_concurrent: int = 64,
+        max_per_session: int = 16,
+        queue_size: int = 128,
+        queue_timeout: float = 2.0,
+        retry_after: int = 1,
+        path: str = "/mcp",
+    ):
+        self.app = app
+        self.max_per_session = max_per_session
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self.path = path
+        self.waiting = 0
+        self.stats = {
+            "admitted": 0,
+            "passed_through": 0,
+            "rejected_queue_full": 0,
+            "rejected_timeout": 0,
+        }
+        self.queue_wait = Histogram(
+            "mcp_admission_wait_seconds",
+            "Time requests queued for admission, by the limit they waited on",
+            "limit",
+        )
+        self._global = _Slots(max_concurrent)
+        # session ID -> [slots, requests holding or waiting for a slot]
+        self._sessions: dict[str, list] = {}
+
+    @property
+    def active(self) -> int:
+        return self._global.in_use
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or scope["method"] != "POST"
+            or not scope["path"].startswith(self.path)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        peeked, body = await _peek(receive)
+
+        async def replay_receive():
+            if peeked:
+                return peeked.pop(0)
+            return await receive()
+
+        if not _needs_slot(body):
+            self.stats["passed_through"] += 1
+            await self.app(scope, replay_receive, send)
+            return
+
+        session_id = None
+        for name, value in scope["headers"]:
+            if name == b"mcp-session-id":
+                session_id = value.decode("latin-1")
+                break
+
+        deadline = asyncio.get_running_loop().time() + self.queue_timeout
+        session = None
+        if session_id is not None:
+            session = self._sessions.setdefault(session_id, [_Slots(self.max_per_session), 0])
+            session[1] += 1
+
+        try:
+            if session is not None and not await self._admit(session[0], "session", deadline):
+                await self._reject(send)
+                return
+            try:
+                if not await self._admit(self._global, "global", deadline):
+                    await self._reject(send)
+                    return
+                self.stats["admitted"] += 1
+                try:
+                    await self.app(scope, replay_receive, send)
+                finally:
+                    self._global.release()
+            finally:
+                if session is not None:
+                    session[0].release()
+        finally:
+            if session is not None:
+                session[1] -= 1
+                if not session[1]:
+                    del self._sessions[session_id]
+
+    async def _admit(self, slots: _Slots, limit: str, deadline: float) -> bool:
+        if slots.try_acquire():
+            return True
+        if self.waiting >= self.queue_size:
+            self.stats["rejected_queue_full"] += 1
+            return False
+
+        self.waiting += 1
+        start = time.perf_counter()
+        try:
+            admitted = await slots.acquire(deadline)
+        finally:
+            self.waiting -= 1
+        self.queue_wait.observe(limit, time.perf_counter() - start)
+        if not admitted:
+            self.stats["rejected_timeout"] += 1
+        return admitted
+
+    async def _reject(self, send) -> None:
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 429,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(REJECTION)).encode()),
+                    (b"retry-after", str(self.retry_after).encode()),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": REJECTION})
@@ -0,0 +1,157 @@
+"""Memory-mapped binary arrays in a server-side data directory"""
+
+import contextlib
+import math
+import mmap
+import operator
+import os
+import tempfile
+from array import array
+
+# Element types, as struct codes for memoryview.cast and array.array.
+# Files hold raw values in native byte order (little-endian on x86 and ARM)
+DTYPES = {"float64": "d", "float32": "f", "int64": "q", "int32": "i"}
+
+ELEMENTWISE = {"add": operator.add, "multiply": operator.mul}
+
+
+class MappedArray:
+    """Read-only typed view of an array file, mapped rather than read
+
+    Pages are faulted in as chunks are touched and handed back to the
+    kernel with ``release`` once a chunk is done, so resident memory stays
+    around one chunk however large the file is.
+    """
+
+    def __init__(self, path: str, dtype: str):
+        code = DTYPES[dtype]
+        self.itemsize = array(code).itemsize
+        size = os.path.getsize(path)
+        if size == 0:
+            raise ValueError(f"'{os.path.basename(path)}' is empty")
+        if size % self.itemsize:
+            raise ValueError(
+                f"'{os.path.basename(path)}' is {size} bytes, not a whole number of {dtype} values"
+            )
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if hasattr(mmap, "MADV_SEQUENTIAL"):
+            self._mmap.madvise(mmap.MADV_SEQUENTIAL)
+        self._raw = memoryview(self._mmap)
+        self.view = self._raw.cast(code)
+
+    def __len__(self):
+        return len(self.view)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def release(self, start: int, stop: int) -> None:
+        """Drop the pages holding elements ``start:stop`` from memory"""
+        if hasattr(mmap, "MADV_DONTNEED"):
+            offset = start * self.itemsize
+            self._mmap.madvise(mmap.MADV_DONTNEED, offset, (stop - start) * self.itemsize)
+
+    def close(self) -> None:
+        self.view.release()
+        self._raw.release()
+        try:
+            self._mmap.close()
+        except BufferError:
+            # A cancelled call's last chunk is still being read on the pool;
+            # the mapping goes once that chunk lets go of it
+            pass
+
+
+def apply_chunk(fn, operands, start: int, stop: int, *args):
+    """Call ``fn`` on elements ``start:stop`` of each operand, then release them
+
+    A scalar operand is passed through as is. Meant to run on a worker
+    thread, one chunk at a time.
+    """
+    parts = [op.view[start:stop] if isinstance(op, MappedArray) else op for op in operands]
+    try:
+        return fn(*args, *parts)
+    finally:
+        for op, part in zip(operands, parts):
+            if isinstance(op, MappedArray):
+                part.release()
+                op.release(start, stop)
+
+
+def sum_chunk(a) -> float:
+    return math.fsum(a)
+
+
+def dot_chunk(a, b) -> float:
+    return math.fsum(map(operator.mul, a, b))
+
+
+def elementwise_chunk(out, code: str, op, a, b) -> None:
+    """Write ``op(a, b)`` for one chunk to ``out``; ``b`` may be a scalar"""
+    if isinstance(b, memoryview):
+        out.write(array(code, map(op, a, b)))
+    else:
+        out.write(array(code, (op(x, b) for x in a)))
+
+
+class ArrayStore:
+    """Binary array files under ``root``, processed ``chunk_size`` elements at a time
+
+    Array names are paths relative to ``root`` and can't point outside it.
+    """
+
+    def __init__(self, root: str = "data", chunk_size: int = 1 << 20):
+        self.root = root
+        self.chunk_size = chunk_size
+
+    @classmethod
+    def from_env(cls) -> "ArrayStore":
+        return cls(
+            root=os.getenv("DATA_DIR", "data"),
+            chunk_size=int(os.getenv("ARRAY_CHUNK_SIZE", str(1 << 20))),
+        )
+
+    def path(self, name: str) -> str:
+        root = os.path.realpath(self.root)
+        path = os.path.realpath(os.path.join(root, name))
+        if path == root or os.path.commonpath([root, path]) != root:
+            raise ValueError(f"'{name}' is outside the data directory")
+        return path
+
+    def open(self, name: str, dtype: str) -> MappedArray:
+        if dtype not in DTYPES:
+            raise ValueError(f"dtype must be one of {', '.join(DTYPES)}, got '{dtype}'")
+        path = self.path(name)
+        if not os.path.isfile(path):
+            raise ValueError(f"No array named '{name}' in the data directory")
+        return MappedArray(path, dtype)
+
+    def chunks(self, length: int, itemsize: int):
+        """Yield ``(start, stop)`` ranges that start on page boundaries"""
+        per_page = max(1, mmap.ALLOCATIONGRANULARITY // itemsize)
+        step = max(per_page, self.chunk_size // per_page * per_page)
+        for start in range(0, length, step):
+            yield start, min(start + step, length)
+
+    @contextlib.contextmanager
+    def create(self, name: str):
+        """Binary file to write the array ``name`` to
+
+        It replaces any existing array of that name only once the block
+        finishes without error, so a failed call never leaves a partial
+        output behind.
+        """
+        path = self.path(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                yield f
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Load generator and benchmark for the MCP server.
+
+Opens N concurrent MCP sessions (reusing MCPServerTest's protocol logic)
+and drives a mixed tools/call workload, either closed-loop (each session
+sends its next request as soon as the previous one returns) or open-loop
+at a fixed request rate. Reports p50/p95/p99 latency and requests/second.
+
+Usage:
+    python benchmark.py --sessions 8 --duration 10
+    python benchmark.py --rate 200 --duration 30 --output results.json
+    python benchmark.py https://your-app.railway.app --mix add=3,multiply=3,tools/list=1
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from datetime import datetime, timezone
+
+from test_server import MCPServerTest
+
+BATCH_LENGTH = 100
+
+# name -> function(rng) returning (method, params)
+OPERATIONS = {
+    "add": lambda rng: (
+        "tools/call",
+        {"name": "add", "arguments": {"a": rng.uniform(0, 100), "b": rng.uniform(0, 100)}},
+    ),
+    "multiply": lambda rng: (
+        "tools/call",
+        {"name": "multiply", "arguments": {"a": rng.uniform(0, 100), "b": rng.uniform(0, 100)}},
+    ),
+    "add_batch": lambda rng: (
+        "tools/call",
+        {
+            "name": "add_batch",
+            "arguments": {
+                "a": [rng.uniform(0, 100) for _ in range(BATCH_LENGTH)],
+                "b": [rng.uniform(0, 100) for _ in range(BATCH_LENGTH)],
+            },
+        },
+    ),
+    "multiply_batch": lambda rng: (
+        "tools/call",
+        {
+            "name": "multiply_batch",
+            "arguments": {"a": [rng.uniform(0, 100) for _ in range(BATCH_LENGTH)], "b": 2},
+        },
+    ),
+    "tools/list": lambda rng: ("tools/list", None),
+}
+
+DEFAULT_MIX = "add=4,multiply=4,add_batch=1,tools/list=1"
+
+
+def parse_mix(mix: str) -> dict[str, float]:
+    """Parse 'add=3,multiply=1' into operation weights."""
+    weights = {}
+    for item in mix.split(","):
+        name, _, weight = item.partition("=")
+        name = name.strip()
+        if name not in OPERATIONS:
+            raise ValueError(f"Unknown operation '{name}', choose from {sorted(OPERATIONS)}")
+        weights[name] = float(weight or 1)
+    return weights
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+def summarize(latencies: list[float]) -> dict:
+    """Latency summary in milliseconds."""
+    values = sorted(latencies)
+    if not values:
+        return {"p50": 0.0, "p95": 0.0, "p99": 0.0, "mean": 0.0, "max": 0.0}
+    return {
+        "p50": percentile(values, 50) * 1000,
+        "p95": percentile(values, 95) * 1000,
+        "p99": percentile(values, 99) * 1000,
+        "mean": sum(values) / len(values) * 1000,
+        "max": values[-1] * 1000,
+    }
+
+
+class Benchmark:
+    def __init__(
+        self,
+        server_url: str,
+        sessions: int,
+        duration: float,
+        rate: float | None,
+        mix: dict[str, float],
+        seed: int,
+    ):
+        self.server_url = server_url
+        self.session_count = sessions
+        self.duration = duration
+        self.rate = rate
+        self.mix = mix
+        self.rng = random.Random(seed)
+        self.sessions: list[MCPServerTest] = []
+        self.next_id = 100
+        # operation -> list of latencies in seconds
+        self.latencies: dict[str, list[float]] = {name: [] for name in mix}
+        self.errors: dict[str, int] = {name: 0 for name in mix}
+
+    def pick_operation(self) -> str:
+        names = list(self.mix)
+        return self.rng.choices(names, weights=[self.mix[n] for n in names])[0]
+
+    async def call(self, session: MCPServerTest, operation: str, scheduled: float) -> None:
+        """Send one request and record its latency from its scheduled start."""
+        method, params = OPERATIONS[operation](self.rng)
+        self.next_id += 1
+        request = {"jsonrpc": "2.0", "id": self.next_id, "method": method}
+        if params is not None:
+            request["params"] = params
+
+        try:
+            result = await session._send_request(request)
+            failed = "error" in result or result.get("result", {}).get("isError", False)
+        except Exception:
+            failed = True
+
+        self.latencies[operation].append(time.perf_counter() - scheduled)
+        if failed:
+            self.errors[operation] += 1
+
+    async def closed_loop(self, session: MCPServerTest, deadline: float) -> None:
+        while time.perf_counter() < deadline:
+            await self.call(session, self.pick_operation(), time.perf_counter())
+
+    async def open_loop(self, deadline: float) -> None:
+        # Latency is measured from each request's scheduled time, so a slow
+        # server can't hide queueing delay (no coordinated omission)
+        interval = 1.0 / self.rate
+        start = time.perf_counter()
+        tasks = []
+        for i in range(int(self.duration * self.rate)):
+            scheduled = start + i * interval
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if time.perf_counter() >= deadline:
+                break
+            session = self.sessions[i % len(self.sessions)]
+            tasks.append(asyncio.create_task(self.call(session, self.pick_operation(), scheduled)))
+        await asyncio.gather(*tasks)
+
+    async def run(self) -> dict:
+        print(f"🔄 Opening {self.session_count} sessions against {self.server_url}...")
+        self.sessions = [
+            MCPServerTest(self.server_url, verbose=False) for _ in range(self.session_count)
+        ]
+        try:
+            await asyncio.gather(*(session.start_session() for session in self.sessions))
+
+            mode = f"open-loop at {self.rate:g} req/s" if self.rate else "closed-loop"
+            print(f"🚀 Running {mode} for {self.duration:g}s...")
+            start = time.perf_counter()
+            deadline = start + self.duration
+            if self.rate:
+                await self.open_loop(deadline)
+            else:
+                await asyncio.gather(
+                    *(self.closed_loop(session, deadline) for session in self.sessions)
+                )
+            elapsed = time.perf_counter() - start
+        finally:
+            await asyncio.gather(*(session.client.aclose() for session in self.sessions))
+
+        return self.report(elapsed)
+
+    def report(self, elapsed: float) -> dict:
+        all_latencies = [value for values in self.latencies.values() for value in values]
+        total = len(all_latencies)
+        return {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "server_url": self.server_url,
+            "config": {
+                "sessions": self.session_count,
+                "duration_s": self.duration,
+                "mode": "open" if self.rate else "closed",
+                "rate": self.rate,
+                "mix": self.mix,
+            },
+            "elapsed_s": elapsed,
+            "requests": total,
+            "errors": sum(self.errors.values()),
+            "requests_per_second": total / elapsed if elapsed else 0.0,
+            "latency_ms": summarize(all_latencies),
+            "operations": {
+                name: {
+                    "requests": len(values),
+                    "errors": self.errors[name],
+                    "latency_ms": summarize(values),
+                }
+                for name, values in self.latencies.items()
+            },
+        }
+
+
+def print_report(results: dict) -> None:
+    latency = results["latency_ms"]
+    print("\n" + "=" * 60)
+    print(
+        f"📊 {results['requests']} requests in {results['elapsed_s']:.2f}s "
+        f"({results['requests_per_second']:.1f} req/s), {results['errors']} errors"
+    )
+    print(
+        f"   Latency ms: p50={latency['p50']:.2f} p95={latency['p95']:.2f} "
+        f"p99={latency['p99']:.2f} max={latency['max']:.2f}"
+    )
+    for name, stats in results["operations"].items():
+        op_latency = stats["latency_ms"]
+        print(
+            f"   - {name}: {stats['requests']} requests, {stats['errors']} errors, "
+            f"p50={op_latency['p50']:.2f} p99={op_latency['p99']:.2f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark an MCP server")
+    parser.add_argument("server_url", nargs="?", default="http://localhost:8000")
+    parser.add_argument("--sessions", type=int, default=8, help="concurrent MCP sessions")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds to run")
+    parser.add_argument(
+        "--rate", type=float, default=None, help="open-loop requests/second (default: closed-loop)"
+    )
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"operation weights (default: {DEFAULT_MIX})")
+    parser.add_argument("--seed", type=int, default=0, help="random seed for the workload")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    benchmark = Benchmark(
+        server_url=args.server_url.rstrip("/"),
+        sessions=args.sessions,
+        duration=args.duration,
+        rate=args.rate,
+        mix=parse_mix(args.mix),
+        seed=args.seed,
+    )
+
+    try:
+        results = asyncio.run(benchmark.run())
+    except KeyboardInterrupt:
+        print("\n👋 Benchmark interrupted")
+        sys.exit(1)
+    except Exception as e:
+        print(f"❌ Benchmark failed: {e}")
+        print("💡 Make sure the server is running: python main.py")
+        sys.exit(1)
+
+    print_report(results)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"💾 Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
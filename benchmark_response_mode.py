@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Compare SSE framing with plain JSON responses on streamable HTTP.
+
+Starts `python main.py` once per RESPONSE_MODE on a local port, sends the
+same sequential tools/call requests to each, and reports per request:
+- bytes on the wire (response headers + body)
+- server CPU, from process_cpu_seconds_total on /metrics
+- client parse time, from raw body to JSON-RPC reply
+- round-trip latency
+
+Usage:
+    python benchmark_response_mode.py
+    python benchmark_response_mode.py --calls 2000 --operations add,add_batch --output modes.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+from benchmark import OPERATIONS, summarize
+from claude_mcp_proxy import SSEParser
+from test_server import MCPServerTest, wait_for_server
+
+MODES = ("sse", "json")
+BASE_PORT = 8100
+WARMUP_CALLS = 50
+
+
+def parse_reply(content_type: str, body: bytes) -> dict:
+    """Turn a response body into the JSON-RPC reply, the way the proxy does."""
+    if content_type.startswith("text/event-stream"):
+        for event in SSEParser().feed(body):
+            return json.loads(event["data"])
+        return {}
+    return json.loads(body)
+
+
+async def server_cpu_seconds(tester: MCPServerTest) -> float:
+    response = await tester.client.get(f"{tester.server_url}/metrics")
+    for line in response.text.splitlines():
+        if line.startswith("process_cpu_seconds_total "):
+            return float(line.split()[1])
+    raise RuntimeError("Server does not export process_cpu_seconds_total")
+
+
+async def measure(tester: MCPServerTest, operation: str, calls: int) -> dict:
+    rng = random.Random(0)
+    wire_bytes, parse_times, latencies = [], [], []
+    errors = 0
+
+    for i in range(WARMUP_CALLS + calls):
+        if i == WARMUP_CALLS:
+            cpu_start = await server_cpu_seconds(tester)
+
+        method, params = OPERATIONS[operation](rng)
+        request = {"jsonrpc": "2.0", "id": 100 + i, "method": method}
+        if params is not None:
+            request["params"] = params
+
+        start = time.perf_counter()
+        response = await tester.client.post(
+            tester.mcp_endpoint, json=request, headers=tester._get_headers()
+        )
+        elapsed = time.perf_counter() - start
+
+        parse_start = time.perf_counter()
+        reply = parse_reply(response.headers.get("content-type", ""), response.content)
+        parse_time = time.perf_counter() - parse_start
+
+        if i < WARMUP_CALLS:
+            continue
+        header_bytes = sum(len(name) + len(value) + 4 for name, value in response.headers.raw)
+        wire_bytes.append(header_bytes + len(response.content))
+        parse_times.append(parse_time)
+        latencies.append(elapsed)
+        if reply.get("id") != request["id"] or "error" in reply:
+            errors += 1
+
+    cpu = await server_cpu_seconds(tester) - cpu_start
+    return {
+        "requests": calls,
+        "errors": errors,
+        "bytes_per_response": sum(wire_bytes) / calls,
+        "server_cpu_us_per_request": cpu / calls * 1e6,
+        "client_parse_us": summarize(parse_times)["mean"] * 1000,
+        "latency_ms": summarize(latencies),
+    }
+
+
+async def run_mode(mode: str, port: int, operations: list[str], calls: int) -> dict:
+    url = f"http://localhost:{port}"
+    env = {**os.environ, "HOST": "0.0.0.0", "PORT": str(port), "RESPONSE_MODE": mode}
+    server = subprocess.Popen(
+        [sys.executable, "main.py"], env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        if not await wait_for_server(url):
+            raise RuntimeError(f"Server in {mode} mode did not start")
+
+        results = {}
+        async with MCPServerTest(url, verbose=False) as tester:
+            await tester.start_session()
+            for operation in operations:
+                print(f"🔄 {mode}: {calls} sequential '{operation}' calls...")
+                results[operation] = await measure(tester, operation, calls)
+        return results
+    finally:
+        server.terminate()
+        server.wait()
+
+
+async def run(operations: list[str], calls: int) -> dict:
+    results = {}
+    for offset, mode in enumerate(MODES):
+        results[mode] = await run_mode(mode, BASE_PORT + offset, operations, calls)
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "calls": calls,
+        "modes": results,
+    }
+
+
+def print_report(results: dict) -> None:
+    print("\n" + "=" * 60)
+    operations = next(iter(results["modes"].values()))
+    for operation in operations:
+        print(f"📊 {operation}")
+        for mode, by_operation in results["modes"].items():
+            stats = by_operation[operation]
+            print(
+                f"   - {mode}: {stats['bytes_per_response']:.0f} bytes, "
+                f"server CPU {stats['server_cpu_us_per_request']:.0f}us, "
+                f"client parse {stats['client_parse_us']:.1f}us, "
+                f"p50 {stats['latency_ms']['p50']:.3f}ms, {stats['errors']} errors"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare SSE and JSON response modes")
+    parser.add_argument("--calls", type=int, default=1000, help="measured calls per operation")
+    parser.add_argument(
+        "--operations", default="add,add_batch", help="comma-separated operations to time"
+    )
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    operations = [name.strip() for name in args.operations.split(",")]
+    unknown = [name for name in operations if name not in OPERATIONS]
+    if unknown:
+        parser.error(f"unknown operations {unknown}, choose from {sorted(OPERATIONS)}")
+
+    try:
+        results = asyncio.run(run(operations, args.calls))
+    except KeyboardInterrupt:
+        print("\n👋 Benchmark interrupted")
+        sys.exit(1)
+    except Exception as e:
+        print(f"❌ Benchmark failed: {e}")
+        sys.exit(1)
+
+    print_report(results)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"💾 Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
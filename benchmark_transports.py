@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Per-call latency of the stdio transport vs. streamable HTTP.
+
+Spawns `python main.py --stdio` as a local client would, and talks to a
+running HTTP server the way the proxy does. Both serve the same tools, so
+the difference is transport overhead: HTTP, TLS when remote, SSE framing.
+Calls are sequential so each measures one full round trip.
+
+Usage:
+    python main.py &                      # HTTP server for comparison
+    python benchmark_transports.py --calls 2000
+    python benchmark_transports.py https://your-app.railway.app --output transports.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timezone
+
+from benchmark import OPERATIONS, summarize
+from test_server import MCPServerTest
+
+WARMUP_CALLS = 50
+MAIN_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")
+
+INITIALIZE = {
+    "jsonrpc": "2.0",
+    "id": 1,
+    "method": "initialize",
+    "params": {
+        "protocolVersion": "2025-06-18",
+        "capabilities": {},
+        "clientInfo": {"name": "benchmark", "version": "1.0.0"},
+    },
+}
+
+
+class StdioClient:
+    """Minimal MCP client for a server subprocess on stdin/stdout"""
+
+    def __init__(self, command: list[str]):
+        self.command = command
+        self.process = None
+
+    async def start_session(self) -> None:
+        self.process = await asyncio.create_subprocess_exec(
+            *self.command,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,
+            limit=16 * 1024 * 1024,
+        )
+        result = await self._send_request(INITIALIZE)
+        if "result" not in result:
+            raise RuntimeError(f"Initialize failed: {result}")
+        await self._write({"jsonrpc": "2.0", "method": "notifications/initialized"})
+
+    async def _write(self, message: dict) -> None:
+        self.process.stdin.write(json.dumps(message).encode() + b"\n")
+        await self.process.stdin.drain()
+
+    async def _send_request(self, data: dict) -> dict:
+        await self._write(data)
+        while True:
+            line = await self.process.stdout.readline()
+            if not line:
+                raise RuntimeError("Server closed stdout")
+            message = json.loads(line)
+            # Skip notifications (logging, progress) interleaved with replies
+            if message.get("id") == data["id"]:
+                return message
+
+    async def aclose(self) -> None:
+        if self.process is not None:
+            self.process.stdin.close()
+            await self.process.wait()
+
+
+class HTTPClient:
+    """MCPServerTest session adapted to the StdioClient interface"""
+
+    def __init__(self, server_url: str):
+        self.session = MCPServerTest(server_url, verbose=False)
+
+    async def start_session(self) -> None:
+        await self.session.start_session()
+
+    async def _send_request(self, data: dict) -> dict:
+        return await self.session._send_request(data)
+
+    async def aclose(self) -> None:
+        await self.session.client.aclose()
+
+
+async def measure(client, operation: str, calls: int) -> tuple[list[float], int]:
+    """Time ``calls`` sequential requests, after an unmeasured warmup."""
+    rng = random.Random(0)
+    latencies = []
+    errors = 0
+    await client.start_session()
+    try:
+        for i in range(WARMUP_CALLS + calls):
+            method, params = OPERATIONS[operation](rng)
+            request = {"jsonrpc": "2.0", "id": 100 + i, "method": method}
+            if params is not None:
+                request["params"] = params
+
+            start = time.perf_counter()
+            result = await client._send_request(request)
+            elapsed = time.perf_counter() - start
+
+            if i >= WARMUP_CALLS:
+                latencies.append(elapsed)
+                if "error" in result or result.get("result", {}).get("isError", False):
+                    errors += 1
+    finally:
+        await client.aclose()
+    return latencies, errors
+
+
+async def run(server_url: str, operation: str, calls: int) -> dict:
+    transports = {
+        "stdio": StdioClient([sys.executable, MAIN_SCRIPT, "--stdio"]),
+        "streamable-http": HTTPClient(server_url),
+    }
+
+    results = {}
+    for name, client in transports.items():
+        print(f"🔄 {name}: {calls} sequential '{operation}' calls...")
+        latencies, errors = await measure(client, operation, calls)
+        total = sum(latencies)
+        results[name] = {
+            "requests": len(latencies),
+            "errors": errors,
+            "calls_per_second": len(latencies) / total if total else 0.0,
+            "latency_ms": summarize(latencies),
+        }
+
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "server_url": server_url,
+        "operation": operation,
+        "transports": results,
+    }
+
+
+def print_report(results: dict) -> None:
+    print("\n" + "=" * 60)
+    print(f"📊 Per-call latency for '{results['operation']}' (ms)")
+    for name, stats in results["transports"].items():
+        latency = stats["latency_ms"]
+        print(
+            f"   - {name}: p50={latency['p50']:.3f} p95={latency['p95']:.3f} "
+            f"p99={latency['p99']:.3f} ({stats['calls_per_second']:.0f} calls/s, "
+            f"{stats['errors']} errors)"
+        )
+
+    transports = results["transports"]
+    stdio_p50 = transports["stdio"]["latency_ms"]["p50"]
+    if stdio_p50:
+        ratio = transports["streamable-http"]["latency_ms"]["p50"] / stdio_p50
+        print(f"   streamable HTTP p50 is {ratio:.1f}x the stdio p50")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare stdio and streamable HTTP latency")
+    parser.add_argument("server_url", nargs="?", default="http://localhost:8000")
+    parser.add_argument("--calls", type=int, default=1000, help="measured calls per transport")
+    parser.add_argument(
+        "--operation", default="add", choices=sorted(OPERATIONS), help="request to time"
+    )
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    try:
+        results = asyncio.run(run(args.server_url.rstrip("/"), args.operation, args.calls))
+    except KeyboardInterrupt:
+        print("\n👋 Benchmark interrupted")
+        sys.exit(1)
+    except Exception as e:
+        print(f"❌ Benchmark failed: {e}")
+        print("💡 Make sure the HTTP server is running: python main.py")
+        sys.exit(1)
+
+    print_report(results)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"💾 Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
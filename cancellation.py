@@ -0,0 +1,71 @@
+"""Cancellation of requests whose client went away before the response"""
+
+import anyio
+from mcp.shared.message import SessionMessage
+from mcp.types import JSONRPCMessage, JSONRPCNotification
+
+from response_mode import ResponseModeTransport
+
+
+class CancellingTransport(ResponseModeTransport):
+    """Transport that cancels a request when its client disconnects first
+
+    The SDK stops a request's handler when the client sends
+    ``notifications/cancelled``, but a client that just drops the
+    connection, after a timeout or before retrying, leaves the tool running
+    for a result nobody will read; with JSON responses the transport doesn't
+    even notice. This one watches the connection while a request is open
+    and, if it closes before the response has been sent, hands the session
+    the same ``notifications/cancelled`` the client could have sent. The
+    request ID comes from ``MetricsMiddleware``, which must wrap the app.
+    """
+
+    # Shared by every session's transport, for /metrics
+    stats = {"disconnected": 0}
+
+    async def _handle_post_request(self, scope, request, receive, send) -> None:
+        request_id = scope.get("mcp.request_id")
+        if request_id is None:
+            await super()._handle_post_request(scope, request, receive, send)
+            return
+
+        # Read (and cache) the body first, so only the disconnect is left
+        # for the watcher to receive
+        await request.body()
+        responded = False
+
+        async def send_tracking(message):
+            nonlocal responded
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body"):
+                responded = True
+
+        async with anyio.create_task_group() as tg:
+
+            async def watch_disconnect():
+                while (await receive())["type"] != "http.disconnect":
+                    pass
+                tg.cancel_scope.cancel()
+
+            tg.start_soon(watch_disconnect)
+            await super()._handle_post_request(scope, request, receive, send_tracking)
+            tg.cancel_scope.cancel()
+
+        if not responded:
+            self.stats["disconnected"] += 1
+            await self._cancel(request_id, "Client disconnected")
+
+    async def _cancel(self, request_id, reason: str) -> None:
+        notification = JSONRPCNotification(
+            jsonrpc="2.0",
+            method="notifications/cancelled",
+            params={"requestId": request_id, "reason": reason},
+        )
+        writer = self._read_stream_writer
+        if writer is None:
+            return
+        with anyio.CancelScope(shield=True):
+            try:
+                await writer.send(SessionMessage(JSONRPCMessage(notification)))
+            except (anyio.BrokenResourceError, anyio.ClosedResourceError):
+                pass  # the session has ended, and its requests with it
@@ -6,18 +6,449 @@ Save this as: claude_mcp_proxy.py
 
 import asyncio
 import json
+import os
+import re
 import sys
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from fnmatch import fnmatchcase
+from functools import partial
+from itertools import count
+
 import httpx
 
+# Largest single JSON-RPC line accepted from the client
+STDIN_LINE_LIMIT = 16 * 1024 * 1024
+
+# Largest single SSE event accepted from the server
+SSE_EVENT_LIMIT = 16 * 1024 * 1024
+
+_SSE_LINE_END = re.compile(rb"\r\n|\r|\n")
+
+# Times a request rejected with 429, or with 503 and Retry-After (a draining
+# server turning away new sessions), is retried, honouring Retry-After
+OVERLOAD_RETRIES = 3
+
+# Longest Retry-After pause the proxy will sit through
+MAX_RETRY_AFTER = 10.0
+
+# Tools that report progress while they work. Only calls to these get a
+# progress token from the proxy: a token makes the server stream the reply
+# and keeps the call from being coalesced with identical ones
+PROGRESS_TOOLS = ("reduce_values", "array_*")
+
+
+class SSEParser:
+    """Incremental parser for a text/event-stream body
+
+    Bytes are fed in as they arrive and complete events come out. Only the
+    unfinished tail of the stream is buffered, so memory stays bounded by
+    the size of one event no matter how long the stream runs.
+    """
+
+    def __init__(self, max_event_size=SSE_EVENT_LIMIT):
+        self.max_event_size = max_event_size
+        self._buffer = bytearray()
+        self._data = []
+        self._data_size = 0
+        self._event = None
+        self._last_event_id = None
+
+    def feed(self, chunk):
+        """Consume a chunk of bytes and return the events it completed"""
+        self._buffer.extend(chunk)
+        events = []
+        pos = 0
+
+        while True:
+            match = _SSE_LINE_END.search(self._buffer, pos)
+            if match is None:
+                break
+            # A trailing CR may be the first half of a CRLF split across chunks
+            if match.group() == b"\r" and match.end() == len(self._buffer):
+                break
+
+            line = bytes(self._buffer[pos : match.start()]).decode("utf-8")
+            pos = match.end()
+            event = self._process_line(line)
+            if event is not None:
+                events.append(event)
+
+        del self._buffer[:pos]
+        if len(self._buffer) + self._data_size > self.max_event_size:
+            raise ValueError(f"SSE event exceeds {self.max_event_size} bytes")
+        return events
+
+    def _process_line(self, line):
+        if not line:
+            return self._dispatch()
+        if line.startswith(":"):
+            return None
+
+        field, _, value = line.partition(":")
+        if value.startswith(" "):
+            value = value[1:]
+
+        if field == "data":
+            self._data.append(value)
+            self._data_size += len(value) + 1
+            if self._data_size > self.max_event_size:
+                raise ValueError(f"SSE event exceeds {self.max_event_size} bytes")
+        elif field == "event":
+            self._event = value
+        elif field == "id" and "\0" not in value:
+            self._last_event_id = value
+        return None
+
+    def _dispatch(self):
+        if not self._data:
+            self._event = None
+            return None
+
+        event = {
+            "event": self._event or "message",
+            "data": "\n".join(self._data),
+            "id": self._last_event_id,
+        }
+        self._data = []
+        self._data_size = 0
+        self._event = None
+        return event
+
+
+class ResultCache:
+    """LRU cache of JSON-RPC results with per-entry expiry
+
+    Entries stored with ``ttl=None`` live until evicted or cleared. The
+    cache is bounded by entry count and by the JSON size of keys and
+    results; a single entry over an eighth of ``max_bytes`` isn't cached.
+    """
+
+    def __init__(self, max_entries=1024, ttl=300.0, max_bytes=32 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "too_large": 0}
+        self.size = 0
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is not None:
+            result, expires_at, _ = entry
+            if expires_at is None or expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return result
+            self._remove(key)
+        self.stats["misses"] += 1
+        return None
+
+    def put(self, key, result, ttl=...):
+        if self.max_entries <= 0:
+            return
+        limit = self.max_bytes // 8
+        size = sum(len(part) for part in key if isinstance(part, str))
+        if size <= limit:
+            size += len(json.dumps(result, separators=(",", ":")))
+        if size > limit:
+            self.stats["too_large"] += 1
+            return
+        if ttl is ...:
+            ttl = self.ttl
+        expires_at = None if ttl is None else time.monotonic() + ttl
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (result, expires_at, size)
+        self.size += size
+        while len(self._entries) > self.max_entries or self.size > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+            self.stats["evictions"] += 1
+
+    def _remove(self, key):
+        self.size -= self._entries.pop(key)[2]
+
+    def invalidate(self, method):
+        for key in [key for key in self._entries if key[0] == method]:
+            self._remove(key)
+
+    def clear(self):
+        self._entries.clear()
+        self.size = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def _is_reply_to(message, request_data):
+    """Whether a JSON-RPC message is the response to ``request_data``"""
+    return (
+        isinstance(message, dict)
+        and message.get("id") == request_data.get("id")
+        and ("result" in message or "error" in message)
+    )
+
+
+def _should_retry(response):
+    """Whether the server turned the request away without running it"""
+    return response.status_code == 429 or (
+        response.status_code == 503 and "Retry-After" in response.headers
+    )
+
+
+def _retry_after(response):
+    """Seconds to wait before retrying, from the Retry-After header"""
+    try:
+        delay = float(response.headers.get("Retry-After", "1"))
+    except ValueError:
+        delay = 1.0
+    return min(max(delay, 0.0), MAX_RETRY_AFTER)
+
 
 class MCPProxy:
-    def __init__(self, server_url):
+    def __init__(
+        self,
+        server_url,
+        max_in_flight=16,
+        streaming=True,
+        http2=False,
+        pool_size=None,
+        keepalive_expiry=30.0,
+        prewarm=0,
+        cache_size=1024,
+        cache_ttl=300.0,
+        cache_bytes=32 * 1024 * 1024,
+        record_path=None,
+        request_progress=PROGRESS_TOOLS,
+    ):
+        """
+        Args:
+            server_url: Base URL of the MCP server (without /mcp/)
+            max_in_flight: Max concurrent requests forwarded upstream
+            streaming: Relay SSE notifications as they arrive
+            http2: Multiplex requests over HTTP/2 (needs ``httpx[http2]``)
+            pool_size: Max pooled connections, defaults to ``max_in_flight``
+            keepalive_expiry: Seconds an idle pooled connection is kept open
+            prewarm: Connections to open at startup, before the first request
+            cache_size: Max cached results, 0 disables the cache
+            cache_ttl: Seconds a cached tool call result stays valid
+            cache_bytes: Max JSON size of all cached keys and results
+            record_path: Append every exchange to this JSONL capture file
+            request_progress: Tool name patterns to ask for progress on when
+                the client didn't, so long calls keep streaming instead of
+                timing out; empty to forward every call unchanged
+        """
         self.server_url = server_url
-        self.client = httpx.AsyncClient(timeout=60.0)
+        self.max_in_flight = max_in_flight
+        self.streaming = streaming
+        self.prewarm_connections = prewarm
+        pool_size = pool_size or max_in_flight
+        # The read timeout is per chunk: a streaming tool call only times out
+        # after 60 seconds with no event at all, progress included
+        self.client = httpx.AsyncClient(
+            timeout=60.0,
+            http2=http2,
+            limits=httpx.Limits(
+                max_connections=pool_size,
+                max_keepalive_connections=pool_size,
+                keepalive_expiry=keepalive_expiry,
+            ),
+        )
         self.session_id = None
+        self.transport_stats = {
+            "requests": 0,
+            "reused_connections": 0,
+            "connections_opened": 0,
+            "tls_handshakes": 0,
+            "overload_retries": 0,
+            "progress_keepalives": 0,
+            "cancelled": 0,
+        }
+        self.cache = ResultCache(max_entries=cache_size, ttl=cache_ttl, max_bytes=cache_bytes)
+        self._idempotent_tools = set()
+        self._in_flight = {}
+        self.record_path = record_path
+        self._record_file = None
+        self._record_start = None
+        self.request_progress = request_progress
+        self._progress_tokens = count(1)
+
+    def _cache_policy(self, request_data):
+        """Return ``(key, ttl)`` for a cacheable request, otherwise None
+
+        ``tools/list`` is cached for the lifetime of the session. Tool calls
+        are memoized only for tools the server annotates as idempotent, keyed
+        by name and arguments: ``_meta`` such as a progress token differs
+        per request and doesn't change the result.
+        """
+        method = request_data.get("method")
+        params = request_data.get("params") or {}
+        if method == "tools/list":
+            ttl = None
+            params = {key: value for key, value in params.items() if key != "_meta"}
+        elif method == "tools/call" and params.get("name") in self._idempotent_tools:
+            ttl = self.cache.ttl
+            params = {"name": params.get("name"), "arguments": params.get("arguments")}
+        else:
+            return None
+        return (method, json.dumps(params, sort_keys=True, separators=(",", ":"))), ttl
+
+    def _set_session(self, session_id):
+        if session_id != self.session_id:
+            # Cached results belong to the old session
+            self.cache.clear()
+            self._idempotent_tools.clear()
+            self.session_id = session_id
+
+    def _store_reply(self, request_data, reply, policy):
+        result = reply.get("result")
+        if result is None or result.get("isError"):
+            return
+
+        if request_data.get("method") == "tools/list":
+            for tool in result.get("tools", []):
+                if (tool.get("annotations") or {}).get("idempotentHint"):
+                    self._idempotent_tools.add(tool["name"])
+
+        if policy is not None:
+            key, ttl = policy
+            self.cache.put(key, result, ttl=ttl)
+
+    def _trace(self, request_state):
+        """httpcore trace hook counting connection setup for one request"""
+
+        async def trace(event_name, info):
+            if event_name == "connection.connect_tcp.complete":
+                self.transport_stats["connections_opened"] += 1
+                request_state["new_connection"] = True
+            elif event_name == "connection.start_tls.complete":
+                self.transport_stats["tls_handshakes"] += 1
+
+        return trace
+
+    async def prewarm(self):
+        """Open pooled connections up front so no request pays the handshake"""
+        if self.prewarm_connections <= 0:
+            return
+
+        async def warm():
+            try:
+                await self.client.head(
+                    self.server_url, extensions={"trace": self._trace({})}
+                )
+            except httpx.HTTPError:
+                pass
+
+        await asyncio.gather(*(warm() for _ in range(self.prewarm_connections)))
+
+    def cache_report(self):
+        """One-line summary of result cache effectiveness"""
+        stats = self.cache.stats
+        return (
+            f"hits={stats['hits']} misses={stats['misses']} "
+            f"evictions={stats['evictions']} too_large={stats['too_large']} "
+            f"entries={len(self.cache)} bytes={self.cache.size}"
+        )
+
+    def transport_report(self):
+        """One-line summary of connection reuse"""
+        stats = self.transport_stats
+        return (
+            f"requests={stats['requests']} "
+            f"reused={stats['reused_connections']} "
+            f"connections_opened={stats['connections_opened']} "
+            f"tls_handshakes={stats['tls_handshakes']} "
+            f"overload_retries={stats['overload_retries']} "
+            f"progress_keepalives={stats['progress_keepalives']} "
+            f"cancelled={stats['cancelled']}"
+        )
+
+    def _cached_reply(self, request_data):
+        """Answer a request from the result cache, or None on a miss"""
+        policy = self._cache_policy(request_data)
+        if policy is not None:
+            result = self.cache.get(policy[0])
+            if result is not None:
+                return {"jsonrpc": "2.0", "id": request_data.get("id"), "result": result}
+        return None
+
+    def _record(self, request_data, response_data, started, duration, cached):
+        """Append one exchange to the capture file
+
+        ``offset`` is seconds since the first recorded request, which is what
+        replay uses to reproduce the original pacing. Lines are written as
+        requests complete, so they aren't in offset order. Each proxy run
+        starts with a ``run_started`` marker line, as offsets restart at 0
+        when a new run appends to the same file.
+        """
+        if self._record_file is None:
+            self._record_file = open(self.record_path, "a", buffering=1)
+            self._record_start = started
+            marker = {"run_started": datetime.now(timezone.utc).isoformat()}
+            self._record_file.write(json.dumps(marker, separators=(",", ":")) + "\n")
+        entry = {
+            "offset": round(started - self._record_start, 6),
+            "duration_ms": round(duration * 1000, 3),
+            "cached": cached,
+            "request": request_data,
+            "response": response_data,
+        }
+        self._record_file.write(json.dumps(entry, separators=(",", ":")) + "\n")
+
+    async def handle_request(self, request_data, on_message=None):
+        """Forward MCP request to Railway server
+
+        SSE responses are parsed incrementally as bytes arrive. The reply to
+        this request is returned; any other message on the stream (progress,
+        log notifications) is passed to ``on_message`` as soon as it is seen.
+        """
+        reply = self._cached_reply(request_data)
+        if reply is not None:
+            return reply
+        return await self._forward(request_data, on_message)
+
+    def _with_progress_token(self, request_data):
+        """Return ``(upstream request, token)`` for a request to forward
+
+        A call to a tool matching ``request_progress`` sent without a
+        progress token gets one of the proxy's own, so the response keeps
+        streaming while the tool works. Notifications for these tokens are
+        the proxy's, not the client's, and aren't relayed. The token is None
+        when unchanged.
+        """
+        if not self.request_progress or request_data.get("method") != "tools/call":
+            return request_data, None
+        params = request_data.get("params") or {}
+        name = params.get("name")
+        if not isinstance(name, str) or not any(
+            fnmatchcase(name, pattern) for pattern in self.request_progress
+        ):
+            return request_data, None
+        meta = params.get("_meta") or {}
+        if meta.get("progressToken") is not None:
+            return request_data, None
+
+        token = f"mcp-proxy-{next(self._progress_tokens)}"
+        params = {**params, "_meta": {**meta, "progressToken": token}}
+        return {**request_data, "params": params}, token
+
+    async def _forward(self, request_data, on_message=None):
+        """Send a request upstream, bypassing the result cache"""
+        upstream, token = self._with_progress_token(request_data)
+        if token is not None:
+            relay = on_message
+
+            def on_message(message):
+                params = message.get("params") or {}
+                if (
+                    message.get("method") == "notifications/progress"
+                    and params.get("progressToken") == token
+                ):
+                    self.transport_stats["progress_keepalives"] += 1
+                elif relay is not None:
+                    relay(message)
 
-    async def handle_request(self, request_data):
-        """Forward MCP request to Railway server"""
         headers = {
             "Content-Type": "application/json",
             "MCP-Protocol-Version": "2025-06-18",
@@ -29,23 +460,31 @@ class MCPProxy:
             headers["Mcp-Session-Id"] = self.session_id
 
         try:
-            response = await self.client.post(
-                f"{self.server_url}/mcp/", json=request_data, headers=headers
-            )
+            for attempt in range(OVERLOAD_RETRIES + 1):
+                retry_after = None
+                request_state = {"new_connection": False}
+                self.transport_stats["requests"] += 1
 
-            # Store session ID from response
-            if "Mcp-Session-Id" in response.headers:
-                self.session_id = response.headers["Mcp-Session-Id"]
-
-            # Parse SSE response if needed
-            if response.headers.get("content-type", "").startswith("text/event-stream"):
-                content = response.text.strip()
-                lines = content.split("\n")
-                for line in lines:
-                    if line.startswith("data: "):
-                        return json.loads(line[6:])
-            else:
-                return response.json()
+                async with self.client.stream(
+                    "POST",
+                    f"{self.server_url}/mcp/",
+                    json=upstream,
+                    headers=headers,
+                    extensions={"trace": self._trace(request_state)},
+                ) as response:
+                    if not request_state["new_connection"]:
+                        self.transport_stats["reused_connections"] += 1
+
+                    # The server shed load before doing any work, so it is
+                    # safe to send the same request again after the pause
+                    if _should_retry(response) and attempt < OVERLOAD_RETRIES:
+                        await response.aread()
+                        retry_after = _retry_after(response)
+                    else:
+                        return await self._read_reply(response, request_data, on_message)
+
+                self.transport_stats["overload_retries"] += 1
+                await asyncio.sleep(retry_after)
 
         except Exception as e:
             return {
@@ -54,31 +493,215 @@ class MCPProxy:
                 "error": {"code": -32603, "message": f"Proxy error: {str(e)}"},
             }
 
-    async def run(self):
-        """Main proxy loop"""
+    async def _read_reply(self, response, request_data, on_message):
+        """Consume one upstream response and return the reply to the request"""
+        # Store session ID from response
+        if "Mcp-Session-Id" in response.headers:
+            self._set_session(response.headers["Mcp-Session-Id"])
+
+        # Notifications are acknowledged without a body
+        if response.status_code == 202:
+            await response.aread()
+            return None
+
+        # Parse SSE response if needed
+        if response.headers.get("content-type", "").startswith("text/event-stream"):
+            parser = SSEParser()
+            reply = None
+            # Read to the end of the stream (the server closes it right
+            # after the reply) so the connection goes back to the pool
+            async for chunk in response.aiter_bytes():
+                for event in parser.feed(chunk):
+                    message = json.loads(event["data"])
+                    if reply is None and _is_reply_to(message, request_data):
+                        reply = message
+                        continue
+                    if message.get("method") == "notifications/tools/list_changed":
+                        self.cache.invalidate("tools/list")
+                    if on_message is not None:
+                        on_message(message)
+        else:
+            await response.aread()
+            reply = response.json()
+
+        if isinstance(reply, dict) and _is_reply_to(reply, request_data):
+            self._store_reply(request_data, reply, self._cache_policy(request_data))
+        return reply
+
+    async def _read_lines(self):
+        """Yield lines from stdin without blocking the event loop
+
+        A line longer than ``STDIN_LINE_LIMIT`` is discarded as it streams
+        in and yields None in its place.
+        """
+        loop = asyncio.get_running_loop()
+        reader = asyncio.StreamReader(limit=STDIN_LINE_LIMIT)
+
         try:
-            while True:
-                # Read JSON-RPC request from stdin
-                line = sys.stdin.readline()
-                if not line:
-                    break
+            await loop.connect_read_pipe(
+                lambda: asyncio.StreamReaderProtocol(reader), sys.stdin
+            )
+        except (ValueError, OSError, NotImplementedError):
+            # Regular files and some platforms can't be attached as a pipe
+            reader = None
 
+        oversized = False
+        while True:
+            if reader is not None:
                 try:
-                    request_data = json.loads(line.strip())
-                    response_data = await self.handle_request(request_data)
+                    data = await reader.readuntil(b"\n")
+                except asyncio.IncompleteReadError as e:
+                    data = e.partial
+                except asyncio.LimitOverrunError as e:
+                    # Drop what's buffered and read on to the end of the line
+                    await reader.read(e.consumed)
+                    oversized = True
+                    continue
+                if oversized:
+                    oversized = False
+                    yield None
+                    if data.endswith(b"\n"):
+                        continue
+                    return
+                line = data.decode()
+            else:
+                line = await loop.run_in_executor(None, sys.stdin.readline)
+            if not line:
+                return
+            yield line
+
+    def _write_response(self, response_data):
+        """Write one JSON-RPC response line to stdout"""
+        sys.stdout.write(json.dumps(response_data) + "\n")
+        sys.stdout.flush()
+
+    def _cancel_in_flight(self, notification):
+        """Stop forwarding a request the client sent ``notifications/cancelled`` for
+
+        Closing the upstream stream stops the server's work even if the
+        notification, forwarded as usual, can't reach it. No response is
+        written for the request, as the client no longer expects one.
+        """
+        params = notification.get("params") or {}
+        task = self._in_flight.get(params.get("requestId"))
+        if task is not None and task.cancel():
+            self.transport_stats["cancelled"] += 1
+
+    async def _dispatch(self, request_data):
+        """Forward one request and write its response as soon as it completes"""
+        request_id = request_data.get("id")
+        started = time.perf_counter()
+        response_data = self._cached_reply(request_data)
+        cached = response_data is not None
+        if not cached:
+            response_data = await self._forward(
+                request_data,
+                on_message=self._write_response if self.streaming else None,
+            )
+        if self.record_path:
+            self._record(
+                request_data, response_data, started, time.perf_counter() - started, cached
+            )
+        if request_id is not None:
+            if response_data is None:
+                response_data = {
+                    "jsonrpc": "2.0",
+                    "id": request_id,
+                    "error": {"code": -32603, "message": "Proxy error: empty response"},
+                }
+            self._write_response(response_data)
+
+    def _settle(self, request_id, slots, task):
+        """Free a finished request's slot, however it ended
+
+        Runs as a done callback rather than in ``_dispatch``, because a task
+        cancelled before it starts never runs its body at all.
+        """
+        if self._in_flight.get(request_id) is task:
+            del self._in_flight[request_id]
+        slots.release()
+
+    async def run(self):
+        """Main proxy loop
+
+        Requests are pipelined: up to ``max_in_flight`` calls share the HTTP
+        client at once and each response is written back in completion order,
+        the client matches them up by ``id``. ``initialize`` and notifications
+        act as barriers so the session is set up before anything else is sent.
+        """
+        slots = asyncio.Semaphore(self.max_in_flight)
 
-                    # Write JSON-RPC response to stdout
-                    print(json.dumps(response_data), flush=True)
+        try:
+            await self.prewarm()
 
+            async for line in self._read_lines():
+                if line is None:
+                    self._write_response(
+                        {
+                            "jsonrpc": "2.0",
+                            "id": None,
+                            "error": {
+                                "code": -32700,
+                                "message": f"Parse error: message over {STDIN_LINE_LIMIT} bytes",
+                            },
+                        }
+                    )
+                    continue
+                try:
+                    request_data = json.loads(line.strip())
                 except json.JSONDecodeError:
                     continue
+                if not isinstance(request_data, dict):
+                    continue
+                if request_data.get("method") == "notifications/cancelled":
+                    self._cancel_in_flight(request_data)
+
+                await slots.acquire()
+                task = asyncio.create_task(self._dispatch(request_data))
+                task.add_done_callback(partial(self._settle, request_data.get("id"), slots))
+
+                if request_data.get("method") == "initialize" or "id" not in request_data:
+                    await task
+                else:
+                    self._in_flight[request_data["id"]] = task
+
+            # stdin closed - let outstanding calls finish before exiting
+            if self._in_flight:
+                await asyncio.gather(*self._in_flight.values(), return_exceptions=True)
 
         except KeyboardInterrupt:
             pass
         finally:
             await self.client.aclose()
+            if self._record_file is not None:
+                self._record_file.close()
+            # stdout carries the protocol, diagnostics go to stderr
+            print(f"MCP proxy transport: {self.transport_report()}", file=sys.stderr)
+            print(f"MCP proxy cache: {self.cache_report()}", file=sys.stderr)
+
+
+def progress_tools(setting):
+    """Parse ``MCP_PROXY_PROGRESS``: 0, 1 for the defaults, or tool patterns"""
+    if setting == "0":
+        return ()
+    if setting == "1":
+        return PROGRESS_TOOLS
+    return tuple(pattern.strip() for pattern in setting.split(",") if pattern.strip())
 
 
 if __name__ == "__main__":
-    proxy = MCPProxy("https://mcp-simple-server-dev.up.railway.app")
+    proxy = MCPProxy(
+        os.getenv("MCP_SERVER_URL", "https://mcp-simple-server-dev.up.railway.app"),
+        max_in_flight=int(os.getenv("MCP_PROXY_MAX_IN_FLIGHT", "16")),
+        streaming=os.getenv("MCP_PROXY_STREAMING", "1") != "0",
+        http2=os.getenv("MCP_PROXY_HTTP2", "0") == "1",
+        pool_size=int(os.getenv("MCP_PROXY_POOL_SIZE", "0")) or None,
+        keepalive_expiry=float(os.getenv("MCP_PROXY_KEEPALIVE_EXPIRY", "30")),
+        prewarm=int(os.getenv("MCP_PROXY_PREWARM", "1")),
+        cache_size=int(os.getenv("MCP_PROXY_CACHE_SIZE", "1024")),
+        cache_ttl=float(os.getenv("MCP_PROXY_CACHE_TTL", "300")),
+        cache_bytes=int(os.getenv("MCP_PROXY_CACHE_BYTES", str(32 * 1024 * 1024))),
+        record_path=os.getenv("MCP_PROXY_RECORD") or None,
+        request_progress=progress_tools(os.getenv("MCP_PROXY_PROGRESS", "1")),
+    )
     asyncio.run(proxy.run())
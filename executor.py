@@ -0,0 +1,271 @@
+"""Execution policies for synchronous tools: inline, thread pool or process pool"""
+
+import asyncio
+import functools
+import importlib
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from mcp.server.fastmcp.exceptions import ToolError
+
+from metrics import Histogram
+
+POLICIES = ("inline", "thread", "process")
+
+# What became of pool calls whose caller was cancelled: taken off the queue
+# before they started, stopped at a cancellation point, or run to the end
+CANCEL_OUTCOMES = ("dequeued", "stopped", "finished")
+
+# (module, qualname) -> undecorated tool function. Process pool workers look
+# tools up here, since the decorated module attribute is the async wrapper
+# and can't be pickled by reference
+_REGISTRY = {}
+
+
+class Cancelled(Exception):
+    """Raised by ``check_cancelled`` in work whose caller was cancelled"""
+
+
+# The cancellation event of the call running on this pool thread, if any
+_current = threading.local()
+
+
+def check_cancelled() -> None:
+    """Stop thread pool work if the tool call it belongs to was cancelled
+
+    Long loops call this every so often. Outside the thread pool, including
+    in process workers, it does nothing and the work runs to the end.
+    """
+    event = getattr(_current, "cancelled", None)
+    if event is not None and event.is_set():
+        raise Cancelled("Tool call was cancelled")
+
+
+def _run_cancellable(cancelled: threading.Event, call, *args):
+    _current.cancelled = cancelled
+    try:
+        return call(*args)
+    finally:
+        _current.cancelled = None
+
+
+def _run_timed(fn, args, kwargs):
+    return time.time(), fn(*args, **kwargs)
+
+
+def _run_registered(module, qualname, args, kwargs):
+    started = time.time()
+    key = (module, qualname)
+    if key not in _REGISTRY:
+        # A fresh worker process registers the tool by importing its module
+        importlib.import_module(module)
+    return started, _REGISTRY[key](*args, **kwargs)
+
+
+def parse_policies(spec: str) -> dict[str, str]:
+    """Parse 'add_batch=thread,heavy=process' into per-tool policies"""
+    policies = {}
+    for item in spec.split(","):
+        if not item.strip():
+            continue
+        name, _, policy = item.partition("=")
+        policy = policy.strip()
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown policy '{policy}' for '{name.strip()}', choose from {POLICIES}")
+        policies[name.strip()] = policy
+    return policies
+
+
+class BoundedPool:
+    """An executor that holds at most ``workers + queue_size`` calls
+
+    Calls past that are rejected straight away rather than piling up, so a
+    burst of slow tool calls fails fast instead of growing an unbounded
+    backlog inside the executor.
+    """
+
+    def __init__(self, name: str, make_executor, workers: int, queue_size: int):
+        self.name = name
+        self.workers = workers
+        self.queue_size = queue_size
+        self.stats = {"completed": 0, "rejected": 0}
+        self.cancelled = dict.fromkeys(CANCEL_OUTCOMES, 0)
+        self.pending = 0
+        self._make_executor = make_executor
+        self._executor = None
+
+    @property
+    def active(self) -> int:
+        return min(self.pending, self.workers)
+
+    @property
+    def queued(self) -> int:
+        return max(0, self.pending - self.workers)
+
+    async def submit(self, call, *args):
+        """Run ``call(*args)`` on the pool; it must return ``(started, result)``
+
+        If the caller is cancelled, a call still waiting for a worker is
+        dropped from the queue. One already running is told to stop, which
+        thread pool work notices at its next ``check_cancelled``; until it
+        does, it keeps its place in the pool, as it still holds a worker.
+        """
+        if self.pending >= self.workers + self.queue_size:
+            self.stats["rejected"] += 1
+            raise ToolError(f"Server busy: the {self.name} pool is full, retry later")
+
+        if self._executor is None:
+            self._executor = self._make_executor(self.workers)
+
+        loop = asyncio.get_running_loop()
+        cancelled = threading.Event()
+        if isinstance(self._executor, ThreadPoolExecutor):
+            future = self._executor.submit(_run_cancellable, cancelled, call, *args)
+        else:
+            future = self._executor.submit(call, *args)
+        self.pending += 1
+
+        def done(future):
+            try:
+                loop.call_soon_threadsafe(self._finish, future, cancelled)
+            except RuntimeError:
+                pass  # the loop is closed, so nobody reads the counts
+
+        # Added before wrap_future's own callback, so the pool is updated
+        # by the time the caller resumes
+        future.add_done_callback(done)
+        try:
+            return await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    def _finish(self, future, cancelled: threading.Event) -> None:
+        self.pending -= 1
+        if future.cancelled():
+            self.cancelled["dequeued"] += 1
+        elif not cancelled.is_set():
+            self.stats["completed"] += 1
+        elif isinstance(future.exception(), Cancelled):
+            self.cancelled["stopped"] += 1
+        else:
+            self.cancelled["finished"] += 1
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+class ToolExecutor:
+    """Runs synchronous tools under a per-tool execution policy
+
+    ``inline`` calls the function on the event loop, which is cheapest for
+    tools that finish in microseconds. ``thread`` moves it to a thread pool
+    so blocking I/O or long loops don't stall other sessions. ``process``
+    runs it in a worker process for CPU-bound work that would otherwise
+    hold the GIL; arguments and results must be picklable.
+    """
+
+    def __init__(
+        self,
+        thread_workers: int | None = None,
+        process_workers: int | None = None,
+        queue_size: int = 64,
+        overrides: dict[str, str] | None = None,
+    ):
+        cpus = os.cpu_count() or 1
+        thread_workers = thread_workers or min(32, cpus + 4)
+        process_workers = process_workers or cpus
+        # Forking a process that runs an event loop and threads is unsafe
+        spawn = multiprocessing.get_context("spawn")
+        self.pools = {
+            "thread": BoundedPool(
+                "thread",
+                lambda n: ThreadPoolExecutor(max_workers=n, thread_name_prefix="tool"),
+                thread_workers,
+                queue_size,
+            ),
+            "process": BoundedPool(
+                "process",
+                lambda n: ProcessPoolExecutor(max_workers=n, mp_context=spawn),
+                process_workers,
+                queue_size,
+            ),
+        }
+        self.overrides = overrides or {}
+        self.policies: dict[str, str] = {}
+        self.queue_wait = Histogram(
+            "mcp_executor_queue_wait_seconds",
+            "Time tool calls waited for a pool worker",
+            "pool",
+        )
+
+    @classmethod
+    def from_env(cls) -> "ToolExecutor":
+        return cls(
+            thread_workers=int(os.getenv("TOOL_THREAD_WORKERS", "0")) or None,
+            process_workers=int(os.getenv("TOOL_PROCESS_WORKERS", "0")) or None,
+            queue_size=int(os.getenv("TOOL_QUEUE_SIZE", "64")),
+            overrides=parse_policies(os.getenv("TOOL_EXECUTION", "")),
+        )
+
+    def offload(self, policy: str = "inline"):
+        """Decorator applying an execution policy to a synchronous tool
+
+        Apply it under ``@mcp.tool()``. ``TOOL_EXECUTION`` overrides the
+        policy per tool name.
+        """
+
+        def decorator(fn):
+            chosen = self.overrides.get(fn.__name__, policy)
+            if chosen not in POLICIES:
+                raise ValueError(f"Unknown policy '{chosen}', choose from {POLICIES}")
+            self.policies[fn.__name__] = chosen
+            if chosen == "inline":
+                return fn
+
+            pool = self.pools[chosen]
+            if chosen == "process":
+                # A spawned worker re-runs the parent's script as __mp_main__
+                module = "__main__" if fn.__module__ == "__mp_main__" else fn.__module__
+                _REGISTRY[(module, fn.__qualname__)] = fn
+                call, target = _run_registered, (module, fn.__qualname__)
+            else:
+                call, target = _run_timed, (fn,)
+
+            @functools.wraps(fn)
+            async def run(*args, **kwargs):
+                submitted = time.time()
+                started, result = await pool.submit(call, *target, args, kwargs)
+                self.queue_wait.observe(pool.name, max(0.0, started - submitted))
+                return result
+
+            return run
+
+        return decorator
+
+    async def run(self, policy: str, fn, *args):
+        """Run one ``fn(*args)`` under ``policy``, from inside an async tool
+
+        For tools that do their work in steps, reporting progress between
+        them. Only ``inline`` and ``thread`` are accepted, as the arguments
+        are often views of shared memory that can't be pickled.
+        """
+        if policy == "inline":
+            return fn(*args)
+        if policy != "thread":
+            raise ValueError(f"Unknown policy '{policy}' for run(), choose from inline, thread")
+
+        pool = self.pools[policy]
+        submitted = time.time()
+        started, result = await pool.submit(_run_timed, fn, args, {})
+        self.queue_wait.observe(pool.name, max(0.0, started - submitted))
+        return result
+
+    def shutdown(self) -> None:
+        for pool in self.pools.values():
+            pool.shutdown()
@@ -0,0 +1,159 @@
+"""Safe arithmetic expressions, compiled once and cached by their text"""
+
+import ast
+import math
+import os
+import threading
+from collections import OrderedDict
+
+from executor import check_cancelled
+
+# Longest expression accepted, which also bounds how deeply it can nest
+MAX_EXPRESSION_LENGTH = 2000
+
+
+def _returns_float(function):
+    """Wrap a function so ints from floor and ceil can't reopen bignum arithmetic"""
+    return lambda *args: float(function(*args))
+
+
+FUNCTIONS = {
+    name: _returns_float(function)
+    for name, function in {
+        "abs": abs,
+        "min": min,
+        "max": max,
+        "sqrt": math.sqrt,
+        "exp": math.exp,
+        "log": math.log,
+        "floor": math.floor,
+        "ceil": math.ceil,
+    }.items()
+}
+CONSTANTS = {"pi": math.pi, "e": math.e}
+
+_OPERATORS = (
+    ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv, ast.Mod, ast.Pow, ast.UAdd, ast.USub,
+)
+_NODES = (ast.Expression, ast.BinOp, ast.UnaryOp, ast.Call, ast.Name, ast.Load, ast.Constant)
+
+
+class _FloatConstants(ast.NodeTransformer):
+    # Integer literals would let 9**9**9 run Python's bignum arithmetic for
+    # minutes; as floats it overflows at once
+    def visit_Constant(self, node):
+        return ast.copy_location(ast.Constant(float(node.value)), node)
+
+
+class Plan:
+    """A validated expression compiled to a code object
+
+    Only arithmetic operators, numbers, variables and the functions in
+    ``FUNCTIONS`` survive validation, so the code runs with no builtins and
+    nothing to reach beyond its own variables.
+    """
+
+    def __init__(self, text: str):
+        if len(text) > MAX_EXPRESSION_LENGTH:
+            raise ValueError(
+                f"Expression is {len(text)} characters, the limit is {MAX_EXPRESSION_LENGTH}"
+            )
+        try:
+            tree = ast.parse(text.strip(), mode="eval")
+        except (SyntaxError, RecursionError, MemoryError) as e:
+            raise ValueError(f"Invalid expression: {e}") from None
+
+        called = set()
+        names = set()
+        for node in ast.walk(tree):
+            if isinstance(node, (ast.operator, ast.unaryop)):
+                if not isinstance(node, _OPERATORS):
+                    raise ValueError(f"Operator {type(node).__name__} is not allowed")
+            elif not isinstance(node, _NODES):
+                raise ValueError(f"{type(node).__name__} is not allowed in an expression")
+            elif isinstance(node, ast.Constant):
+                if type(node.value) not in (int, float):
+                    raise ValueError(f"Only numbers are allowed, got {node.value!r}")
+            elif isinstance(node, ast.Call):
+                if not (isinstance(node.func, ast.Name) and node.func.id in FUNCTIONS):
+                    raise ValueError(f"Functions available: {', '.join(FUNCTIONS)}")
+                if node.keywords or not node.args:
+                    raise ValueError(f"'{node.func.id}' takes positional arguments only")
+                called.add(id(node.func))
+            elif isinstance(node, ast.Name):
+                if node.id in FUNCTIONS and id(node) not in called:
+                    raise ValueError(f"'{node.id}' is a function and must be called")
+                names.add(node.id)
+
+        try:
+            tree = ast.fix_missing_locations(_FloatConstants().visit(tree))
+            self._code = compile(tree, "<expression>", "eval")
+        except (RecursionError, MemoryError):
+            raise ValueError("Expression is nested too deeply") from None
+        self.text = text
+        self.variables = sorted(names - FUNCTIONS.keys() - CONSTANTS.keys())
+        self._namespace = {"__builtins__": {}, **FUNCTIONS, **CONSTANTS}
+
+    def evaluate(self, binding: dict[str, float]) -> float:
+        try:
+            scope = {name: float(binding[name]) for name in self.variables}
+        except KeyError as e:
+            raise ValueError(f"No value for variable {e}") from None
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"Variables must be numbers: {e}") from None
+        try:
+            return float(eval(self._code, self._namespace, scope))
+        except (ArithmeticError, TypeError, ValueError) as e:
+            raise ValueError(f"Evaluation failed: {e}") from None
+
+    def evaluate_many(self, bindings: list[dict[str, float]]) -> list[float]:
+        results = []
+        for i, binding in enumerate(bindings):
+            if i % 1024 == 0:
+                check_cancelled()
+            try:
+                results.append(self.evaluate(binding))
+            except ValueError as e:
+                raise ValueError(f"Binding {i}: {e}") from None
+        return results
+
+
+class PlanCache:
+    """LRU of compiled plans keyed by expression text
+
+    Compiling validates and compiles the whole tree, while a cached plan
+    costs a dictionary lookup, so repeated expressions skip straight to
+    evaluation. Expressions that fail to compile aren't cached. Safe to use
+    from the thread pool.
+    """
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+        self._plans: OrderedDict[str, Plan] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "PlanCache":
+        return cls(max_entries=int(os.getenv("EXPRESSION_CACHE_SIZE", "256")))
+
+    def __len__(self):
+        return len(self._plans)
+
+    def get(self, text: str) -> Plan:
+        with self._lock:
+            plan = self._plans.get(text)
+            if plan is not None:
+                self._plans.move_to_end(text)
+                self.stats["hits"] += 1
+                return plan
+            self.stats["misses"] += 1
+
+        plan = Plan(text)
+        if self.max_entries > 0:
+            with self._lock:
+                self._plans[text] = plan
+                while len(self._plans) > self.max_entries:
+                    self._plans.popitem(last=False)
+                    self.stats["evictions"] += 1
+        return plan
@@ -0,0 +1,134 @@
+"""Liveness, readiness and graceful drain of the server process"""
+
+import asyncio
+import contextlib
+import logging
+import os
+import signal
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class Lifecycle:
+    """Tracks whether the server should receive traffic, and drains it
+
+    The process is live as soon as it answers HTTP at all. It is ready only
+    between the session manager finishing startup and the start of
+    shutdown or drain, which is what load balancers and deploy health
+    checks should wait for.
+
+    Draining stops new sessions, gives in-flight requests up to
+    ``drain_timeout`` seconds to finish, then closes every session so open
+    SSE streams end cleanly instead of being cut when the process exits.
+    """
+
+    def __init__(self, drain_timeout: float = 20.0):
+        self.started = False
+        self.draining = False
+        self.drain_timeout = drain_timeout
+        self.stats: dict = {}
+        self._drain_task: asyncio.Task | None = None
+
+    @classmethod
+    def from_env(cls) -> "Lifecycle":
+        return cls(drain_timeout=float(os.getenv("DRAIN_TIMEOUT", "20")))
+
+    @property
+    def ready(self) -> bool:
+        return self.started and not self.draining
+
+    async def drain(self, session_manager, in_flight) -> dict:
+        """Drain ``session_manager``; ``in_flight()`` counts running requests"""
+        self.draining = True
+        session_manager.draining = True
+        start = time.monotonic()
+        deadline = start + self.drain_timeout
+        pending = in_flight()
+
+        while in_flight() and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+
+        abandoned = in_flight()
+        sessions_closed = await session_manager.close_all()
+        # Closed streams still have to send their final chunk; give them a
+        # moment even past the deadline, as the alternative is cutting them
+        deadline = max(deadline, time.monotonic() + 1.0)
+        while session_manager.open_requests and time.monotonic() < deadline:
+            await asyncio.sleep(0.01)
+
+        self.stats = {
+            "in_flight": pending,
+            "abandoned": abandoned,
+            "sessions_closed": sessions_closed,
+            "sessions_rejected": session_manager.stats["rejected_draining"],
+            "seconds": round(time.monotonic() - start, 3),
+        }
+        logger.info(
+            "Drained in %ss: %d requests in flight, %d abandoned at the deadline, "
+            "%d sessions closed, %d new sessions turned away",
+            self.stats["seconds"],
+            pending,
+            abandoned,
+            sessions_closed,
+            self.stats["sessions_rejected"],
+            extra={"fields": {"drain": self.stats}},
+        )
+        return self.stats
+
+    @contextlib.contextmanager
+    def drain_on(self, sig, drain):
+        """Run coroutine function ``drain`` when ``sig`` arrives, then pass it on
+
+        The signal reaches the handler installed before only once the drain
+        is over: for uvicorn that closes the listening socket, and SSE
+        responses watch it and stop on the spot, which would cut streams the
+        drain is about to end cleanly. A second signal during the drain is
+        passed on straight away. Without an earlier Python-level handler the
+        signal is re-raised. Off the main thread, where Python can't handle
+        signals, this does nothing.
+        """
+        if threading.current_thread() is not threading.main_thread():
+            yield
+            return
+
+        loop = asyncio.get_running_loop()
+        previous = signal.getsignal(sig)
+
+        def forward(signum, frame):
+            if callable(previous):
+                previous(signum, frame)
+            else:
+                signal.signal(sig, previous)
+                signal.raise_signal(sig)
+
+        async def drain_then_forward(signum, frame):
+            try:
+                await drain()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Drain failed")
+            forward(signum, frame)
+
+        def start(signum, frame):
+            self._drain_task = loop.create_task(drain_then_forward(signum, frame))
+
+        def handle(signum, frame):
+            if self.draining:
+                forward(signum, frame)
+                return
+            # Readiness drops at once; the drain itself runs on the loop
+            self.draining = True
+            loop.call_soon_threadsafe(start, signum, frame)
+
+        signal.signal(sig, handle)
+        try:
+            yield
+        finally:
+            if signal.getsignal(sig) is handle:
+                signal.signal(sig, previous)
+            if self._drain_task is not None and not self._drain_task.done():
+                self._drain_task.cancel()
+            self._drain_task = None
@@ -0,0 +1,226 @@
+"""Non-blocking structured logging: bounded queue, batched background writer"""
+
+import json
+import logging
+import os
+import queue
+import random
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+
+# Loggers whose own handlers are replaced so they go through the queue.
+# uvicorn.access is left alone: AccessLogMiddleware writes richer records,
+# and uvicorn silences its own when run with access_log=False
+ROUTED_LOGGERS = ("uvicorn", "uvicorn.error")
+
+
+def _to_json(record: logging.LogRecord) -> str:
+    entry = {
+        "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+        "level": record.levelname,
+        "logger": record.name,
+        "msg": record.msg,
+    }
+    fields = getattr(record, "fields", None)
+    if fields:
+        entry.update(fields)
+    if record.exc_text:
+        entry["exc"] = record.exc_text
+    return json.dumps(entry, default=str) + "\n"
+
+
+class _QueueHandler(logging.Handler):
+    """Hands records to the log queue without ever waiting on it"""
+
+    def __init__(self, log_queue: "LogQueue"):
+        super().__init__()
+        self.log_queue = log_queue
+
+    def emit(self, record: logging.LogRecord) -> None:
+        # The message and traceback are rendered here, while arguments and
+        # frames are still what the caller meant; JSON encoding is left to
+        # the writer thread
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        self.log_queue.put(record)
+
+
+class LogQueue:
+    """Log records queued in memory and written as JSON lines by one thread
+
+    Callers only pay for a non-blocking ``put``. When the queue is full the
+    record is dropped and counted rather than waited on, so a stalled log
+    sink costs log lines, never request latency. Drops are counted under a
+    lock, since they come from many request threads at once. The writer
+    takes whatever is queued, up to ``batch_size`` records, and writes it
+    in one call, reporting drops since the last batch as a warning line of
+    its own. It writes to a duplicate of the stdout file descriptor, so a
+    blocked write holds up neither ``print`` nor anything else sharing
+    ``sys.stdout``.
+    """
+
+    def __init__(
+        self,
+        stream=None,
+        max_records: int = 10000,
+        batch_size: int = 256,
+        access_sample_rate: float = 1.0,
+    ):
+        self.stream = stream
+        self.batch_size = batch_size
+        self.access_sample_rate = access_sample_rate
+        self.stats = {"written": 0, "dropped": 0, "sampled_out": 0}
+        self.handler = _QueueHandler(self)
+        self._queue: queue.Queue = queue.Queue(max_records)
+        self._reported_drops = 0
+        self._drops_lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+
+    @classmethod
+    def from_env(cls) -> "LogQueue":
+        return cls(
+            max_records=int(os.getenv("LOG_QUEUE_SIZE", "10000")),
+            batch_size=int(os.getenv("LOG_BATCH_SIZE", "256")),
+            access_sample_rate=float(os.getenv("ACCESS_LOG_SAMPLE_RATE", "1")),
+        )
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+    def put(self, record: logging.LogRecord) -> None:
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self._count_drops(1)
+
+    def _count_drops(self, count: int) -> None:
+        with self._drops_lock:
+            self.stats["dropped"] += count
+
+    def sample_access(self) -> bool:
+        """Whether to log a successful request, per ``access_sample_rate``"""
+        if self.access_sample_rate >= 1 or random.random() < self.access_sample_rate:
+            return True
+        self.stats["sampled_out"] += 1
+        return False
+
+    def install(self, level: str = "INFO") -> None:
+        """Route the root logger, and uvicorn's, through the queue"""
+        root = logging.getLogger()
+        root.handlers = [self.handler]
+        root.setLevel(level)
+        for name in ROUTED_LOGGERS:
+            logger = logging.getLogger(name)
+            logger.handlers = []
+            logger.propagate = True
+        self.start()
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        if self.stream is None:
+            self.stream = open(os.dup(sys.stdout.fileno()), "w")
+        self._thread = threading.Thread(target=self._write_batches, name="log-writer", daemon=True)
+        self._thread.start()
+
+    def flush(self, timeout: float = 1.0) -> bool:
+        """Wait up to ``timeout`` seconds for queued records to be written"""
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.01)
+        return not self._queue.unfinished_tasks
+
+    def _write_batches(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            lines = [_to_json(record) for record in batch]
+            dropped = self.stats["dropped"]
+            if dropped > self._reported_drops:
+                lines.append(self._drop_warning(dropped - self._reported_drops))
+                self._reported_drops = dropped
+            try:
+                self.stream.write("".join(lines))
+                self.stream.flush()
+                self.stats["written"] += len(batch)
+            except (OSError, ValueError):
+                # A broken sink loses this batch; the next one tries again
+                self._count_drops(len(batch))
+            for _ in batch:
+                self._queue.task_done()
+
+    def _drop_warning(self, count: int) -> str:
+        record = logging.LogRecord(
+            __name__, logging.WARNING, __file__, 0, "Log queue full, dropped records", None, None
+        )
+        record.fields = {"dropped": count}
+        return _to_json(record)
+
+
+class AccessLogMiddleware:
+    """ASGI middleware writing one structured record per HTTP request
+
+    Records carry the HTTP method, path, status and duration, and for MCP
+    requests the JSON-RPC method, tool and session ID, using the label that
+    ``MetricsMiddleware`` (wrapped by this one) leaves in the scope.
+    Successful requests are sampled per ``LogQueue.access_sample_rate``;
+    failures are always logged.
+    """
+
+    def __init__(self, app, log_queue: LogQueue):
+        self.app = app
+        self.log_queue = log_queue
+        self.logger = logging.getLogger("access")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            if status >= 400 or self.log_queue.sample_access():
+                self._log(scope, status, time.perf_counter() - start)
+
+    def _log(self, scope, status: int, duration: float) -> None:
+        fields = {
+            "method": scope["method"],
+            "path": scope["path"],
+            "status": status,
+            "duration_ms": round(duration * 1000, 3),
+        }
+        label = scope.get("mcp.method")
+        if label is not None:
+            rpc, _, tool = label.partition(":")
+            fields["rpc"] = rpc
+            if tool:
+                fields["tool"] = tool
+            for name, value in scope["headers"]:
+                if name == b"mcp-session-id":
+                    fields["session"] = value.decode("latin-1")
+                    break
+        level = logging.WARNING if status >= 500 else logging.INFO
+        self.logger.log(
+            level, "%s %s %d", scope["method"], scope["path"], status, extra={"fields": fields}
+        )
@@ -1,42 +1,516 @@
 #!/usr/bin/env python3
 """Minimal MCP Server with FastMCP - Simple Working Solution"""
 
+import asyncio
+import contextlib
+import json
+import math
+import operator
 import os
+import signal
+import sys
+from itertools import islice, repeat
+
 import uvicorn
-from mcp.server.fastmcp import FastMCP
+from mcp.server import streamable_http, streamable_http_manager
+from mcp.server.fastmcp import Context, FastMCP
+from mcp.types import ToolAnnotations
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse, Response
+
+from admission import AdmissionController
+from array_store import (
+    DTYPES,
+    ELEMENTWISE,
+    ArrayStore,
+    MappedArray,
+    apply_chunk,
+    dot_chunk,
+    elementwise_chunk,
+    sum_chunk,
+)
+from cancellation import CancellingTransport
+from executor import ToolExecutor
+from expression import PlanCache
+from lifecycle import Lifecycle
+from log_queue import AccessLogMiddleware, LogQueue
+from metrics import MetricsMiddleware, ServerMetrics
+from profiling import SORT_KEYS, Profiles, ProfilingMiddleware
+from response_mode import RESPONSE_MODES
+from session_store import BoundedSessionManager
+from singleflight import SingleFlight
+from tool_cache import ToolCache
 
 mcp = FastMCP("Simple Server")
+metrics = ServerMetrics()
+lifecycle = Lifecycle.from_env()
+log_queue = LogQueue.from_env()
+profiles = Profiles.from_env()
+
+# Where each synchronous tool runs; TOOL_EXECUTION=name=inline|thread|process
+# overrides the defaults below
+executor = ToolExecutor.from_env()
+
+# Memoizes PURE tools when TOOL_CACHE_SIZE > 0. Off by default: for tools this
+# cheap, canonicalizing the arguments costs more than recomputing
+tool_cache = ToolCache.from_env()
+
+# Pure functions: same arguments always give the same result, so clients
+# and proxies may safely cache or retry these calls
+PURE = ToolAnnotations(readOnlyHint=True, idempotentHint=True)
+
+# Tools that read files in the data directory: results follow the files, so
+# they aren't cached, and tools that write output files there
+READS_FILES = ToolAnnotations(readOnlyHint=True)
+WRITES_FILES = ToolAnnotations(readOnlyHint=False, destructiveHint=True)
+
+# Binary array files for the array_* tools, memory-mapped and processed in
+# chunks so they never travel through JSON-RPC
+arrays = ArrayStore.from_env()
+
+# Compiled evaluate expressions, by expression text
+expression_plans = PlanCache.from_env()
+
+# Largest array accepted by the batch tools
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", "1000000"))
+
+# Values reduce_values works through between progress notifications
+REDUCE_CHUNK_SIZE = int(os.getenv("REDUCE_CHUNK_SIZE", "100000"))
 
+# Starting value and step for each reduce_values operation; "mean" divides
+# the sum by the count at the end
+REDUCTIONS = {
+    "sum": (0.0, lambda total, chunk: total + math.fsum(chunk)),
+    "mean": (0.0, lambda total, chunk: total + math.fsum(chunk)),
+    "product": (1.0, lambda total, chunk: total * math.prod(chunk)),
+    "min": (math.inf, lambda total, chunk: min(total, min(chunk))),
+    "max": (-math.inf, lambda total, chunk: max(total, max(chunk))),
+}
 
-@mcp.tool()
+# The transport rejects request bodies over 4MB by default, which caps batch
+# calls at a few hundred thousand elements; raise it to fit MAX_BATCH_SIZE
+streamable_http.MAXIMUM_MESSAGE_SIZE = int(
+    os.getenv("MAX_REQUEST_BYTES", str(64 * 1024 * 1024))
+)
+
+# Behaves like the stock transport for json_response=True/False and adds
+# "auto": JSON for single-result requests, SSE only when progress is asked for.
+# Requests whose client disconnects before the response are cancelled
+streamable_http_manager.StreamableHTTPServerTransport = CancellingTransport
+
+
+@mcp.tool(annotations=PURE)
+@tool_cache.memoize()
+@executor.offload("inline")
 def add(a: float, b: float) -> float:
     """Add two numbers"""
     return a + b
 
 
-@mcp.tool()
+@mcp.tool(annotations=PURE)
+@tool_cache.memoize()
+@executor.offload("inline")
 def multiply(a: float, b: float) -> float:
     """Multiply two numbers"""
     return a * b
 
 
+def _json_array(values: list[float]) -> str:
+    """Compact JSON array of finite numbers, or ValueError naming the first other"""
+    try:
+        return json.dumps(values, separators=(",", ":"), allow_nan=False)
+    except ValueError:
+        # Python would write Infinity or NaN, which strict JSON parsers reject
+        index = next(i for i, value in enumerate(values) if not math.isfinite(value))
+        raise ValueError(
+            f"Result {index} is {values[index]}, from overflow or an undefined operation"
+        ) from None
+
+
+def _apply_batch(op, a: list[float] | float, b: list[float] | float) -> str:
+    """Apply a binary operator elementwise, broadcasting a scalar operand"""
+    a_is_list = isinstance(a, list)
+    b_is_list = isinstance(b, list)
+    if not (a_is_list or b_is_list):
+        raise ValueError("At least one of 'a' or 'b' must be an array")
+
+    for name, value in (("a", a), ("b", b)):
+        if isinstance(value, list) and len(value) > MAX_BATCH_SIZE:
+            raise ValueError(
+                f"'{name}' has {len(value)} elements, the limit is {MAX_BATCH_SIZE}"
+            )
+
+    if a_is_list and b_is_list:
+        if len(a) != len(b):
+            raise ValueError(f"Length mismatch: len(a)={len(a)}, len(b)={len(b)}")
+        result = list(map(op, a, b))
+    elif a_is_list:
+        result = list(map(op, a, repeat(b)))
+    else:
+        result = list(map(op, repeat(a), b))
+
+    # One compact JSON array rather than one content block per element
+    return _json_array(result)
+
+
+@mcp.tool(annotations=PURE)
+@tool_cache.memoize()
+@executor.offload("thread")
+def add_batch(a: list[float] | float, b: list[float] | float) -> str:
+    """Add two equal-length arrays elementwise, or an array and a scalar.
+    Returns a JSON array."""
+    return _apply_batch(operator.add, a, b)
+
+
+@mcp.tool(annotations=PURE)
+@tool_cache.memoize()
+@executor.offload("thread")
+def multiply_batch(a: list[float] | float, b: list[float] | float) -> str:
+    """Multiply two equal-length arrays elementwise, or an array and a scalar.
+    Returns a JSON array."""
+    return _apply_batch(operator.mul, a, b)
+
+
+@mcp.tool(annotations=PURE)
+@tool_cache.memoize()
+@executor.offload("thread")
+def evaluate(
+    expression: str, variables: dict[str, float] | list[dict[str, float]] | None = None
+) -> float | str:
+    """Evaluate an arithmetic expression such as "(a + b) * c / 2" in one call.
+    Supports + - * / // % **, parentheses, pi, e and abs, min, max, sqrt,
+    exp, log, floor and ceil. Pass variables as one object of values, or a
+    list of them to evaluate for each and get a JSON array of results."""
+    plan = expression_plans.get(expression)
+    if not isinstance(variables, list):
+        return plan.evaluate(variables or {})
+    if len(variables) > MAX_BATCH_SIZE:
+        raise ValueError(f"{len(variables)} bindings given, the limit is {MAX_BATCH_SIZE}")
+    return _json_array(plan.evaluate_many(variables))
+
+
+async def report_progress(ctx: Context, progress: float, total: float, message: str) -> None:
+    """Send a progress notification on the calling request's own stream
+
+    FastMCP's ``Context.report_progress`` doesn't say which request the
+    notification belongs to, so the transport puts it on the session's
+    standalone GET stream, or drops it when there is none.
+    """
+    meta = ctx.request_context.meta
+    if meta is None or meta.progressToken is None:
+        return
+    await ctx.session.send_progress_notification(
+        meta.progressToken, progress, total, message, related_request_id=ctx.request_id
+    )
+
+
+# Not memoized: keys for arrays this size would cost more than the reduction
+@mcp.tool(annotations=PURE)
+async def reduce_values(values: list[float], ctx: Context, operation: str = "sum") -> float:
+    """Reduce an array to one number: sum, mean, product, min or max.
+    Reports progress with the partial result as it goes, when the caller
+    asks for progress."""
+    if operation not in REDUCTIONS:
+        raise ValueError(f"operation must be one of {', '.join(REDUCTIONS)}, got '{operation}'")
+    if not values:
+        raise ValueError("'values' must not be empty")
+    if len(values) > MAX_BATCH_SIZE:
+        raise ValueError(f"'values' has {len(values)} elements, the limit is {MAX_BATCH_SIZE}")
+
+    result, step = REDUCTIONS[operation]
+    done = 0
+    chunks = iter(values)
+    while chunk := list(islice(chunks, REDUCE_CHUNK_SIZE)):
+        result = step(result, chunk)
+        done += len(chunk)
+        partial = result / done if operation == "mean" else result
+        await report_progress(ctx, done, len(values), f"{operation} so far: {partial}")
+        # Let other requests in between chunks, whether or not progress was sent
+        await asyncio.sleep(0)
+    return result / done if operation == "mean" else result
+
+
+async def _reduce_arrays(ctx: Context, label: str, chunk_fn, operands, mean=False) -> float:
+    """Add up ``chunk_fn`` over matching chunks of ``operands``, with progress"""
+    length = len(operands[0])
+    total = 0.0
+    for start, stop in arrays.chunks(length, operands[0].itemsize):
+        total += await executor.run("thread", apply_chunk, chunk_fn, operands, start, stop)
+        partial = total / stop if mean else total
+        await report_progress(ctx, stop, length, f"{label} so far: {partial}")
+    return total / length if mean else total
+
+
+async def _elementwise_arrays(ctx: Context, op: str, a: str, b, output: str, dtype: str) -> str:
+    """Write ``op`` applied to array ``a`` and array or scalar ``b`` to ``output``"""
+    code = DTYPES.get(dtype)
+    if code in ("q", "i") and isinstance(b, float) and b.is_integer():
+        b = int(b)
+    with contextlib.ExitStack() as stack:
+        x = stack.enter_context(arrays.open(a, dtype))
+        y = stack.enter_context(arrays.open(b, dtype)) if isinstance(b, str) else b
+        if isinstance(y, MappedArray) and len(y) != len(x):
+            raise ValueError(f"Length mismatch: '{a}' has {len(x)} values, '{b}' has {len(y)}")
+
+        with arrays.create(output) as out:
+            for start, stop in arrays.chunks(len(x), x.itemsize):
+                await executor.run(
+                    "thread", apply_chunk, elementwise_chunk, [x, y], start, stop,
+                    out, code, ELEMENTWISE[op],
+                )
+                await report_progress(ctx, stop, len(x), f"{op}: {stop} values written")
+        length = len(x)
+    return json.dumps({"output": output, "length": length, "dtype": dtype})
+
+
+@mcp.tool(annotations=READS_FILES)
+async def array_sum(name: str, ctx: Context, dtype: str = "float64") -> float:
+    """Sum a binary array file in the server's data directory.
+    dtype is float64, float32, int64 or int32."""
+    with arrays.open(name, dtype) as a:
+        return await _reduce_arrays(ctx, "sum", sum_chunk, [a])
+
+
+@mcp.tool(annotations=READS_FILES)
+async def array_mean(name: str, ctx: Context, dtype: str = "float64") -> float:
+    """Mean of a binary array file in the server's data directory."""
+    with arrays.open(name, dtype) as a:
+        return await _reduce_arrays(ctx, "mean", sum_chunk, [a], mean=True)
+
+
+@mcp.tool(annotations=READS_FILES)
+async def array_dot(a: str, b: str, ctx: Context, dtype: str = "float64") -> float:
+    """Dot product of two equal-length binary array files in the data directory."""
+    with arrays.open(a, dtype) as x, arrays.open(b, dtype) as y:
+        if len(x) != len(y):
+            raise ValueError(f"Length mismatch: '{a}' has {len(x)} values, '{b}' has {len(y)}")
+        return await _reduce_arrays(ctx, "dot", dot_chunk, [x, y])
+
+
+@mcp.tool(annotations=WRITES_FILES)
+async def array_add(
+    a: str, b: str | float, output: str, ctx: Context, dtype: str = "float64"
+) -> str:
+    """Add array file a to array file b, or to a number, elementwise.
+    Writes the result to the array file output and returns a JSON summary."""
+    return await _elementwise_arrays(ctx, "add", a, b, output, dtype)
+
+
+@mcp.tool(annotations=WRITES_FILES)
+async def array_multiply(
+    a: str, b: str | float, output: str, ctx: Context, dtype: str = "float64"
+) -> str:
+    """Multiply array file a by array file b, or by a number, elementwise.
+    Writes the result to the array file output and returns a JSON summary."""
+    return await _elementwise_arrays(ctx, "multiply", a, b, output, dtype)
+
+
+@mcp.custom_route("/metrics", methods=["GET"])
+async def metrics_endpoint(request: Request) -> PlainTextResponse:
+    """Prometheus scrape endpoint"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
+@mcp.custom_route("/healthz", methods=["GET", "HEAD"])
+async def healthz(request: Request) -> PlainTextResponse:
+    """Liveness probe: the process is up and serving HTTP"""
+    return PlainTextResponse("ok")
+
+
+@mcp.custom_route("/readyz", methods=["GET", "HEAD"])
+async def readyz(request: Request) -> PlainTextResponse:
+    """Readiness probe: sessions can be served and the server isn't draining"""
+    if lifecycle.ready:
+        return PlainTextResponse("ready")
+    return PlainTextResponse("not ready", status_code=503)
+
+
+@mcp.custom_route("/debug/profiles", methods=["GET"])
+async def profiles_index(request: Request) -> PlainTextResponse:
+    """Methods with profiles, their sample counts and profile files"""
+    if not profiles.enabled:
+        return PlainTextResponse("Profiling is off", status_code=404)
+    return PlainTextResponse(profiles.index())
+
+
+@mcp.custom_route("/debug/profiles/{method:path}", methods=["GET"])
+async def profile_report(request: Request):
+    """One method's aggregated profile: a pstats table, or ``?format=raw``"""
+    method = request.path_params["method"]
+    sort = request.query_params.get("sort", "cumulative")
+    if sort not in SORT_KEYS:
+        return PlainTextResponse(f"sort must be one of {', '.join(SORT_KEYS)}", status_code=400)
+    try:
+        limit = int(request.query_params.get("limit", "40"))
+    except ValueError:
+        return PlainTextResponse("limit must be an integer", status_code=400)
+
+    if request.query_params.get("format") == "raw":
+        data = profiles.raw(method)
+        if data is None:
+            return PlainTextResponse(f"No profile for {method}", status_code=404)
+        # Loadable with pstats, snakeviz and friends
+        filename = os.path.basename(profiles.path_for(method))
+        return Response(
+            data,
+            media_type="application/octet-stream",
+            headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+        )
+    report = profiles.report(method, sort=sort, limit=limit)
+    if report is None:
+        return PlainTextResponse(f"No profile for {method}", status_code=404)
+    return PlainTextResponse(report)
+
+
+def create_app():
+    """Build the streamable HTTP app served by uvicorn
+
+    With more than one worker, requests for the same client can land on any
+    process, so sessions can't live in one worker's memory. Stateless HTTP
+    mode gives every request a fresh transport and needs no shared state.
+    """
+    if int(os.getenv("WORKERS", "1")) > 1:
+        mcp.settings.stateless_http = True
+
+    # Logging from here on is queued and written off the event loop; this
+    # runs in every worker process, as each one builds its own app
+    log_queue.install(os.getenv("LOG_LEVEL", "INFO"))
+    metrics.log_queue = log_queue
+
+    response_mode = os.getenv("RESPONSE_MODE")
+    if response_mode is None:
+        json_response = mcp.settings.json_response
+    elif response_mode in RESPONSE_MODES:
+        json_response = RESPONSE_MODES[response_mode]
+    else:
+        raise ValueError(
+            f"RESPONSE_MODE must be one of {', '.join(RESPONSE_MODES)}, got '{response_mode}'"
+        )
+
+    # FastMCP builds its session manager lazily; supplying one first swaps in
+    # the bounded store so abandoned sessions don't accumulate forever
+    mcp._session_manager = BoundedSessionManager(
+        app=mcp._mcp_server,
+        event_store=mcp._event_store,
+        json_response=json_response,
+        stateless=mcp.settings.stateless_http,
+        max_sessions=int(os.getenv("MAX_SESSIONS", "1000")),
+        idle_ttl=float(os.getenv("SESSION_IDLE_TTL", "1800")),
+    )
+    metrics.session_manager = mcp._session_manager
+    metrics.executor = executor
+    metrics.tool_cache = tool_cache
+    metrics.expression_plans = expression_plans
+    metrics.disconnects = CancellingTransport.stats
+    if os.getenv("SINGLEFLIGHT", "1") != "0":
+        # Installed before the metrics wrapper, so every caller is timed
+        singleflight = metrics.singleflight = metrics.singleflight or SingleFlight()
+        singleflight.install(mcp)
+    metrics.instrument_tools(mcp)
+
+    app = mcp.streamable_http_app()
+    session_lifespan = app.router.lifespan_context
+
+    @contextlib.asynccontextmanager
+    async def lifespan(app):
+        async with session_lifespan(app):
+            lifecycle.started = True
+
+            def in_flight():
+                # Requests queued for admission haven't reached the metrics yet
+                admission = metrics.admission
+                return metrics.in_flight + (admission.waiting if admission else 0)
+
+            async def drain():
+                await lifecycle.drain(mcp._session_manager, in_flight)
+
+            try:
+                with lifecycle.drain_on(signal.SIGTERM, drain):
+                    yield
+            finally:
+                lifecycle.started = False
+                # uvicorn re-raises SIGTERM after shutdown, so atexit hooks
+                # never run; stop pool workers here or they're orphaned
+                executor.shutdown()
+                log_queue.flush()
+
+    app.router.lifespan_context = lifespan
+
+    path = mcp.settings.streamable_http_path
+    if profiles.enabled:
+        # Inside admission control, so time spent queueing isn't profiled
+        app = ProfilingMiddleware(app, profiles, path=path)
+    # Admission control wraps the metrics, which buffer the whole body to
+    # label the request, so a rejected request is turned away having read
+    # only the start of its body
+    app = MetricsMiddleware(app, metrics, path=path)
+    max_concurrent = int(os.getenv("MAX_CONCURRENT_REQUESTS", "64"))
+    if max_concurrent > 0:
+        app = metrics.admission = AdmissionController(
+            app,
+            max_concurrent=max_concurrent,
+            max_per_session=int(os.getenv("MAX_SESSION_REQUESTS", "16")),
+            queue_size=int(os.getenv("ADMISSION_QUEUE_SIZE", "128")),
+            queue_timeout=float(os.getenv("ADMISSION_TIMEOUT", "2")),
+            retry_after=int(os.getenv("ADMISSION_RETRY_AFTER", "1")),
+            path=path,
+        )
+    else:
+        metrics.admission = None
+    return AccessLogMiddleware(app, log_queue)
+
+
+def use_stdio() -> bool:
+    """Whether to serve over stdio (``--stdio`` or ``MCP_TRANSPORT=stdio``)"""
+    return "--stdio" in sys.argv[1:] or os.getenv("MCP_TRANSPORT", "http") == "stdio"
+
+
 def main():
     """Run the server"""
+    if use_stdio():
+        # A co-located client spawns this process and speaks JSON-RPC over
+        # its pipes, so stdout carries the protocol; diagnostics go to stderr
+        print("Starting MCP server on stdio", file=sys.stderr)
+        mcp.run(transport="stdio")
+        return
+
     host = os.getenv("HOST", "0.0.0.0")
     port = int(os.getenv("PORT", "8000"))
+    workers = int(os.getenv("WORKERS", "1"))
 
     print("Starting MCP server...")
     print(f"HOST: {host}")
     print(f"PORT: {port}")
+    print(f"WORKERS: {workers}")
     print("MCP endpoint will be available at the server URL + /mcp")
 
     # For production (Railway), use direct uvicorn control
     if host == "0.0.0.0" or os.getenv("RAILWAY_ENVIRONMENT"):
         print("🚀 PRODUCTION MODE: Using FastMCP's streamable_http_app directly")
 
+        if workers > 1:
+            print(f"🚀 Running {workers} worker processes with stateless HTTP sessions")
+            log_queue.install(os.getenv("LOG_LEVEL", "INFO"))
+            print(f"Running uvicorn on {host}:{port}")
+
+            # Workers import the app themselves, so pass a factory import string
+            uvicorn.run(
+                "main:create_app",
+                factory=True,
+                host=host,
+                port=port,
+                workers=workers,
+                log_level="info",
+                # The app logs requests itself, through the log queue
+                log_config=None,
+                access_log=False,
+                timeout_graceful_shutdown=lifecycle.drain_timeout + 5,
+            )
+            return
+
         try:
             # Get the streamable HTTP app from FastMCP (it's a method, so call it)
-            app = mcp.streamable_http_app()
+            app = create_app()
 
             if app is None:
                 raise AttributeError("streamable_http_app() returned None")
@@ -46,7 +520,18 @@ def main():
             print(f"Running uvicorn on {host}:{port}")
 
             # Run with uvicorn directly - this WILL bind to 0.0.0.0
-            uvicorn.run(app, host=host, port=port, log_level="info", access_log=True)
+            # On SIGTERM the app drains itself (see create_app); the timeout
+            # is only a backstop for connections that outlive the drain
+            uvicorn.run(
+                app,
+                host=host,
+                port=port,
+                log_level="info",
+                # The app logs requests itself, through the log queue
+                log_config=None,
+                access_log=False,
+                timeout_graceful_shutdown=lifecycle.drain_timeout + 5,
+            )
 
         except Exception as e:
             print(f"❌ Could not get streamable_http_app: {e}")
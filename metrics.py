@@ -0,0 +1,466 @@
+"""Request metrics for the MCP server, exposed in Prometheus text format"""
+
+import asyncio
+import json
+import re
+import time
+from bisect import bisect_left
+
+from mcp import types
+
+# Latency buckets in seconds, from sub-millisecond tool calls to slow streams
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+
+# Client-sent JSON-RPC methods; anything else is labelled "other" so a
+# misbehaving client can't blow up label cardinality
+KNOWN_METHODS = frozenset(
+    {
+        "initialize",
+        "ping",
+        "tools/list",
+        "tools/call",
+        "resources/list",
+        "resources/read",
+        "resources/templates/list",
+        "resources/subscribe",
+        "resources/unsubscribe",
+        "prompts/list",
+        "prompts/get",
+        "completion/complete",
+        "logging/setLevel",
+        "notifications/initialized",
+        "notifications/cancelled",
+        "notifications/progress",
+        "notifications/roots/list_changed",
+    }
+)
+
+# Bodies up to this size are parsed in full to label them. Larger ones, such
+# as big batch arguments, are only scanned at both ends for the top-level
+# members, so the event loop doesn't parse them ahead of the SDK
+FULL_PARSE_LIMIT = 64 * 1024
+_SCAN_WINDOW = 4096
+
+_STRING = rb'"(?:[^"\\]|\\.)*"'
+_SCALAR = rb"(?:" + _STRING + rb"|-?\d+(?:\.\d+)?(?:[eE][+-]?\d+)?|true|false|null)"
+_MEMBER = re.compile(rb"\s*(" + _STRING + rb")\s*:\s*(" + _SCALAR + rb")\s*(,?)")
+_OPEN_PARAMS = re.compile(rb'\s*"params"\s*:\s*\{')
+# Scalar members between the end of the last nested value and the closing
+# brace; nothing nested comes after them, so they're top-level members
+_TRAILING_MEMBERS = re.compile(
+    rb"(?:,\s*" + _STRING + rb"\s*:\s*" + _SCALAR + rb"\s*)+\}\s*$"
+)
+
+
+def _leading_members(body: bytes, pos: int, end: int) -> tuple[dict, int]:
+    """Scalar members from ``pos`` up to the first nested value or ``end``"""
+    members = {}
+    while True:
+        match = _MEMBER.match(body, pos, end)
+        if match is None:
+            return members, pos
+        members[json.loads(match[1])] = json.loads(match[2])
+        pos = match.end()
+        if not match[3]:
+            return members, pos
+
+
+def _scan_message(body: bytes) -> dict | None:
+    """The envelope of a large JSON-RPC request, without parsing ``params``
+
+    Returns the top-level scalar members found in the first and last few KB
+    of the body, with ``params`` holding just the tool ``name`` if it leads
+    the params object. None when the body isn't a JSON object.
+    """
+    start = re.match(rb"\s*\{", body)
+    if start is None:
+        return None
+    end = min(len(body), _SCAN_WINDOW)
+    try:
+        message, pos = _leading_members(body, start.end(), end)
+        params = _OPEN_PARAMS.match(body, pos, end)
+        if params is not None:
+            message["params"] = _leading_members(body, params.end(), end)[0]
+        tail_start = max(len(body) - _SCAN_WINDOW, 0)
+        tail = _TRAILING_MEMBERS.search(body, tail_start)
+        if tail is not None:
+            for match in _MEMBER.finditer(body, tail.start() + 1, tail.end()):
+                message[json.loads(match[1])] = json.loads(match[2])
+    except ValueError:
+        return None
+    return message
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Histogram:
+    """Latency histogram keyed by a single label"""
+
+    def __init__(self, name: str, help: str, label: str, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.label = label
+        self.buckets = tuple(buckets)
+        # label value -> [per-bucket counts (last is +Inf), sum, count]
+        self._series: dict[str, list] = {}
+
+    def observe(self, label_value: str, seconds: float) -> None:
+        series = self._series.get(label_value)
+        if series is None:
+            series = self._series[label_value] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect_left(self.buckets, seconds)] += 1
+        series[1] += seconds
+        series[2] += 1
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for label_value, (counts, total, count) in sorted(self._series.items()):
+            label = f'{self.label}="{_escape(label_value)}"'
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append(f'{self.name}_bucket{{{label},le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_bucket{{{label},le="+Inf"}} {count}')
+            lines.append(f"{self.name}_sum{{{label}}} {total}")
+            lines.append(f"{self.name}_count{{{label}}} {count}")
+        return lines
+
+
+class Counter:
+    """Monotonic counter keyed by a tuple of label values"""
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...]):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._values: dict[tuple[str, ...], int] = {}
+
+    def inc(self, *label_values: str, amount: int = 1) -> None:
+        self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for label_values, value in sorted(self._values.items()):
+            labels = ",".join(
+                f'{name}="{_escape(value)}"' for name, value in zip(self.labels, label_values)
+            )
+            lines.append(f"{self.name}{{{labels}}} {value}")
+        return lines
+
+
+def is_wrapped_by(handler, owner) -> bool:
+    """Whether ``owner`` already wrapped ``handler`` somewhere in its chain"""
+    while handler is not None:
+        if getattr(handler, "_owner", None) is owner:
+            return True
+        handler = getattr(handler, "__wrapped__", None)
+    return False
+
+
+def _gauge(name: str, help: str, value) -> list[str]:
+    return [f"# HELP {name} {help}", f"# TYPE {name} gauge", f"{name} {value}"]
+
+
+def _pool_metrics(pools) -> list[str]:
+    """Saturation gauges and counters for the tool executor pools"""
+    lines = []
+    for attribute, kind, help in (
+        ("workers", "gauge", "Workers per tool executor pool"),
+        ("active", "gauge", "Tool calls running on a pool worker"),
+        ("queued", "gauge", "Tool calls waiting for a pool worker"),
+        ("completed", "counter", "Tool calls finished by a pool"),
+        ("rejected", "counter", "Tool calls rejected because the pool queue was full"),
+    ):
+        name = f"mcp_executor_{attribute}" + ("_total" if kind == "counter" else "")
+        lines += [f"# HELP {name} {help}", f"# TYPE {name} {kind}"]
+        for pool in pools:
+            value = pool.stats[attribute] if kind == "counter" else getattr(pool, attribute)
+            lines.append(f'{name}{{pool="{pool.name}"}} {value}')
+
+    name = "mcp_executor_cancelled_total"
+    lines += [
+        f"# HELP {name} Pool calls whose tool call was cancelled, by what became of the work",
+        f"# TYPE {name} counter",
+    ]
+    for pool in pools:
+        for outcome, value in pool.cancelled.items():
+            lines.append(f'{name}{{pool="{pool.name}",outcome="{outcome}"}} {value}')
+    return lines
+
+
+class ServerMetrics:
+    """All metrics the server exports, plus the hooks that record them"""
+
+    def __init__(self):
+        self.request_duration = Histogram(
+            "mcp_request_duration_seconds",
+            "End-to-end latency of MCP POST requests by JSON-RPC method",
+            "method",
+        )
+        self.tool_duration = Histogram(
+            "mcp_tool_duration_seconds",
+            "Tool execution time by tool name",
+            "tool",
+        )
+        self.request_errors = Counter(
+            "mcp_request_errors_total",
+            "MCP requests that failed at the HTTP level",
+            ("method", "status"),
+        )
+        self.tool_errors = Counter(
+            "mcp_tool_errors_total",
+            "Tool calls that returned an error result",
+            ("tool",),
+        )
+        self.tool_cancellations = Counter(
+            "mcp_tool_calls_cancelled_total",
+            "Tool calls stopped because the client cancelled or went away",
+            ("tool",),
+        )
+        self.disconnects = None
+        self.in_flight = 0
+        self.session_manager = None
+        self.executor = None
+        self.admission = None
+        self.tool_cache = None
+        self.expression_plans = None
+        self.singleflight = None
+        self.log_queue = None
+        self.tool_names: set[str] = set()
+
+    def tool_label(self, name: str) -> str:
+        return name if name in self.tool_names else "unknown"
+
+    def instrument_tools(self, server) -> None:
+        """Time the low-level tools/call handler of a FastMCP server"""
+        self.tool_names = {tool.name for tool in server._tool_manager.list_tools()}
+        handlers = server._mcp_server.request_handlers
+        call_tool = handlers[types.CallToolRequest]
+        if is_wrapped_by(call_tool, self):
+            return
+
+        async def timed_call_tool(req: types.CallToolRequest):
+            tool = self.tool_label(req.params.name)
+            start = time.perf_counter()
+            try:
+                result = await call_tool(req)
+            except asyncio.CancelledError:
+                self.tool_cancellations.inc(tool)
+                raise
+            self.tool_duration.observe(tool, time.perf_counter() - start)
+            if getattr(result.root, "isError", False):
+                self.tool_errors.inc(tool)
+            return result
+
+        timed_call_tool._owner = self
+        timed_call_tool.__wrapped__ = call_tool
+        handlers[types.CallToolRequest] = timed_call_tool
+
+    def render(self) -> str:
+        lines = []
+        lines += self.request_duration.render()
+        lines += self.tool_duration.render()
+        lines += self.request_errors.render()
+        lines += self.tool_errors.render()
+        lines += self.tool_cancellations.render()
+        if self.disconnects is not None:
+            lines += [
+                "# HELP mcp_requests_disconnected_total Requests cancelled as their client left",
+                "# TYPE mcp_requests_disconnected_total counter",
+                f"mcp_requests_disconnected_total {self.disconnects['disconnected']}",
+            ]
+        lines += _gauge(
+            "mcp_requests_in_flight", "MCP POST requests currently being served", self.in_flight
+        )
+        lines += [
+            "# HELP process_cpu_seconds_total Total user and system CPU time spent in seconds",
+            "# TYPE process_cpu_seconds_total counter",
+            f"process_cpu_seconds_total {time.process_time()}",
+        ]
+
+        admission = self.admission
+        if admission is not None:
+            lines += _gauge(
+                "mcp_admission_active", "MCP POST requests holding a global slot", admission.active
+            )
+            lines += _gauge(
+                "mcp_admission_waiting", "MCP POST requests queued for admission", admission.waiting
+            )
+            stats = admission.stats
+            lines += [
+                "# HELP mcp_admission_admitted_total MCP POST requests admitted",
+                "# TYPE mcp_admission_admitted_total counter",
+                f"mcp_admission_admitted_total {stats['admitted']}",
+                "# HELP mcp_admission_passed_through_total MCP notifications and responses not limited",
+                "# TYPE mcp_admission_passed_through_total counter",
+                f"mcp_admission_passed_through_total {stats['passed_through']}",
+                "# HELP mcp_admission_rejected_total MCP POST requests answered 429",
+                "# TYPE mcp_admission_rejected_total counter",
+                f'mcp_admission_rejected_total{{reason="queue_full"}} {stats["rejected_queue_full"]}',
+                f'mcp_admission_rejected_total{{reason="timeout"}} {stats["rejected_timeout"]}',
+            ]
+            lines += admission.queue_wait.render()
+
+        singleflight = self.singleflight
+        if singleflight is not None:
+            lines += singleflight.collapsed.render()
+            lines += _gauge(
+                "mcp_tool_calls_coalescing",
+                "Distinct tool executions that identical calls can currently join",
+                singleflight.in_flight,
+            )
+
+        cache = self.tool_cache
+        if cache is not None and cache.enabled:
+            lines += cache.hits.render()
+            lines += cache.misses.render()
+            lines += _gauge(
+                "mcp_tool_cache_hit_ratio",
+                "Share of cacheable tool calls served from the cache",
+                cache.hit_ratio,
+            )
+            lines += _gauge(
+                "mcp_tool_cache_entries", "Tool results held in the cache", len(cache)
+            )
+            lines += _gauge(
+                "mcp_tool_cache_bytes", "Approximate bytes held by the tool cache", cache.bytes_held
+            )
+            lines += [
+                "# HELP mcp_tool_cache_evictions_total Tool results evicted for space",
+                "# TYPE mcp_tool_cache_evictions_total counter",
+                f"mcp_tool_cache_evictions_total {cache.stats['evictions']}",
+            ]
+
+        plans = self.expression_plans
+        if plans is not None:
+            lines += [
+                "# HELP mcp_expression_plans_total evaluate expressions by plan cache outcome",
+                "# TYPE mcp_expression_plans_total counter",
+            ]
+            for outcome, value in sorted(plans.stats.items()):
+                lines.append(f'mcp_expression_plans_total{{outcome="{outcome}"}} {value}')
+            lines += _gauge(
+                "mcp_expression_plans_cached", "Compiled expressions held in the cache", len(plans)
+            )
+
+        log_queue = self.log_queue
+        if log_queue is not None:
+            lines += [
+                "# HELP mcp_log_records_total Log records by what became of them",
+                "# TYPE mcp_log_records_total counter",
+            ]
+            for outcome, value in sorted(log_queue.stats.items()):
+                lines.append(f'mcp_log_records_total{{outcome="{outcome}"}} {value}')
+            lines += _gauge("mcp_log_queue_depth", "Log records waiting to be written", log_queue.depth)
+
+        executor = self.executor
+        if executor is not None:
+            lines += _pool_metrics(executor.pools.values())
+            lines += executor.queue_wait.render()
+
+        manager = self.session_manager
+        if manager is not None and hasattr(manager, "stats"):
+            lines += _gauge("mcp_sessions_active", "Live MCP sessions", manager.active_sessions)
+            for key, value in sorted(manager.stats.items()):
+                name = f"mcp_sessions_{key}_total"
+                lines += [
+                    f"# HELP {name} MCP sessions {key}",
+                    f"# TYPE {name} counter",
+                    f"{name} {value}",
+                ]
+        return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """ASGI middleware timing MCP POST requests by JSON-RPC method
+
+    The request body is read up front to find the method (and tool name),
+    then replayed to the wrapped app unchanged. Bodies over
+    ``FULL_PARSE_LIMIT`` are scanned at both ends rather than parsed. The method label is left in
+    the scope as ``mcp.method``, and the JSON-RPC request ID as
+    ``mcp.request_id``, for middleware and the transport further in.
+    """
+
+    def __init__(self, app, metrics: ServerMetrics, path: str = "/mcp"):
+        self.app = app
+        self.metrics = metrics
+        self.path = path
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or scope["method"] != "POST"
+            or not scope["path"].startswith(self.path)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        chunks = []
+        while True:
+            message = await receive()
+            if message["type"] != "http.request":
+                break
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body", False):
+                break
+        body = b"".join(chunks)
+        label, request_id = self._parse(body)
+        scope["mcp.method"] = label
+        scope["mcp.request_id"] = request_id
+
+        replayed = False
+
+        async def replay_receive():
+            nonlocal replayed
+            if not replayed:
+                replayed = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        metrics = self.metrics
+        metrics.in_flight += 1
+        start = time.perf_counter()
+        try:
+            await self.app(scope, replay_receive, send_with_status)
+        finally:
+            metrics.in_flight -= 1
+            metrics.request_duration.observe(label, time.perf_counter() - start)
+            if status >= 400:
+                metrics.request_errors.inc(label, str(status))
+
+    def _parse(self, body: bytes) -> tuple[str, str | int | None]:
+        """Method label and request ID of a JSON-RPC message"""
+        if len(body) > FULL_PARSE_LIMIT:
+            message = _scan_message(body)
+            if message is None:
+                return "other", None
+        else:
+            try:
+                message = json.loads(body)
+            except ValueError:
+                return "invalid", None
+        if not isinstance(message, dict):
+            return "other", None
+
+        request_id = message.get("id")
+        method = message.get("method")
+        if method not in KNOWN_METHODS:
+            return "other", request_id
+        if method == "tools/call":
+            params = message.get("params")
+            name = params.get("name") if isinstance(params, dict) else None
+            return f"tools/call:{self.metrics.tool_label(name)}", request_id
+        return method, request_id
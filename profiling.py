@@ -0,0 +1,157 @@
+"""Sampled per-request profiling of the MCP endpoint"""
+
+import cProfile
+import io
+import marshal
+import os
+import pstats
+import random
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+SORT_KEYS = ("cumulative", "tottime", "ncalls", "filename")
+
+
+def _filename(label: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_.-]", "_", label)
+
+
+class Profiles:
+    """cProfile profiles of sampled requests, aggregated per JSON-RPC method
+
+    A request is profiled if it wins a ``sample_rate`` draw, or, with
+    ``on_header``, if it carries ``X-MCP-Profile: 1``. The profiler is
+    per-thread, so one request is profiled at a time and a profile covers
+    everything the event loop ran meanwhile: JSON parsing, argument
+    validation, inline tools and SSE serialization for that request, plus
+    whatever else was interleaved with it under load. Tools offloaded to the
+    thread or process pools don't show up. Each method's aggregate is
+    rewritten to ``directory`` after every sample, one file per process, by
+    a writer thread so the event loop never waits on the disk.
+    """
+
+    def __init__(self, directory: str = "profiles", sample_rate: float = 0.0, on_header: bool = False):
+        self.directory = directory
+        self.sample_rate = sample_rate
+        self.on_header = on_header
+        self.busy = False
+        self.stats = {"profiled": 0, "skipped_busy": 0}
+        self.samples: dict[str, int] = {}
+        self._profiles: dict[str, pstats.Stats] = {}
+        self._writer: ThreadPoolExecutor | None = None
+
+    @classmethod
+    def from_env(cls) -> "Profiles":
+        return cls(
+            directory=os.getenv("PROFILE_DIR", "profiles"),
+            sample_rate=float(os.getenv("PROFILE_SAMPLE_RATE", "0")),
+            on_header=os.getenv("PROFILE_ON_HEADER", "0") == "1",
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.sample_rate > 0 or self.on_header
+
+    def wants(self, scope) -> bool:
+        """Whether the request in ``scope`` was picked for profiling"""
+        if self.sample_rate > 0 and random.random() < self.sample_rate:
+            return True
+        if self.on_header:
+            for name, value in scope["headers"]:
+                if name == b"x-mcp-profile":
+                    return value == b"1"
+        return False
+
+    def record(self, label: str, profile: cProfile.Profile) -> None:
+        self.stats["profiled"] += 1
+        self.samples[label] = self.samples.get(label, 0) + 1
+        aggregate = self._profiles.get(label)
+        if aggregate is None:
+            aggregate = self._profiles[label] = pstats.Stats(profile)
+        else:
+            aggregate.add(profile)
+        # Snapshot on the loop, as the aggregate keeps changing; one writer
+        # thread keeps each file's writes in order
+        if self._writer is None:
+            self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="profile-writer")
+        self._writer.submit(self._write, self.path_for(label), self.raw(label))
+
+    def _write(self, path: str, data: bytes) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        with open(path + ".tmp", "wb") as f:
+            f.write(data)
+        os.replace(path + ".tmp", path)
+
+    def flush(self) -> None:
+        """Wait for profile files queued so far to be written"""
+        if self._writer is not None:
+            self._writer.submit(lambda: None).result()
+
+    def raw(self, label: str) -> bytes | None:
+        """One method's aggregate in ``pstats`` file format, or None"""
+        aggregate = self._profiles.get(label)
+        if aggregate is None:
+            return None
+        return marshal.dumps(aggregate.stats)
+
+    def path_for(self, label: str) -> str:
+        return os.path.join(self.directory, f"{_filename(label)}.{os.getpid()}.prof")
+
+    def index(self) -> str:
+        lines = [
+            f"# {self.stats['profiled']} requests profiled, "
+            f"{self.stats['skipped_busy']} skipped while another was profiled",
+        ]
+        for label, count in sorted(self.samples.items()):
+            lines.append(f"{label}\t{count} samples\t{self.path_for(label)}")
+        return "\n".join(lines) + "\n"
+
+    def report(self, label: str, sort: str = "cumulative", limit: int = 40) -> str | None:
+        """Printed ``pstats`` table for one method, or None if never sampled"""
+        aggregate = self._profiles.get(label)
+        if aggregate is None:
+            return None
+        out = io.StringIO()
+        aggregate.stream = out
+        aggregate.sort_stats(sort).print_stats(limit)
+        return f"# {label}: {self.samples[label]} samples\n" + out.getvalue()
+
+
+class ProfilingMiddleware:
+    """ASGI middleware profiling MCP POST requests picked by ``Profiles``
+
+    Requests go unprofiled, at no cost beyond the sampling draw, unless
+    they are picked. The method label comes from ``MetricsMiddleware``,
+    which must wrap this middleware.
+    """
+
+    def __init__(self, app, profiles: Profiles, path: str = "/mcp"):
+        self.app = app
+        self.profiles = profiles
+        self.path = path
+
+    async def __call__(self, scope, receive, send):
+        profiles = self.profiles
+        if (
+            scope["type"] != "http"
+            or scope["method"] != "POST"
+            or not scope["path"].startswith(self.path)
+            or not profiles.wants(scope)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        if profiles.busy:
+            profiles.stats["skipped_busy"] += 1
+            await self.app(scope, receive, send)
+            return
+
+        profile = cProfile.Profile()
+        profiles.busy = True
+        profile.enable()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            profile.disable()
+            profiles.busy = False
+            profiles.record(scope.get("mcp.method", "other"), profile)
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Replay a proxy traffic capture against an MCP server.
+
+Record real client traffic by running the proxy with MCP_PROXY_RECORD set,
+then play the capture back against any server at the original pace (or
+faster with --speed) and compare latency per method with the recording.
+
+Usage:
+    MCP_PROXY_RECORD=capture.jsonl python claude_mcp_proxy.py
+    python replay_traffic.py capture.jsonl
+    python replay_traffic.py capture.jsonl https://your-app.railway.app --speed 4
+    python replay_traffic.py capture.jsonl --speed 0 --output replay.json
+    python replay_traffic.py capture.jsonl --run 2
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from datetime import datetime, timezone
+
+from benchmark import summarize
+from claude_mcp_proxy import MCPProxy
+
+
+def load_capture(path: str, run: int | None = None) -> list[dict]:
+    """Read capture entries in offset order, skipping blank or truncated lines.
+
+    Every proxy run that appended to the file starts with a ``run_started``
+    marker and its own offsets from 0. A file holding several runs needs
+    ``run`` (1-based) to pick one; their offsets can't be mixed.
+    """
+    runs = [[]]
+    with open(path) as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if not isinstance(entry, dict):
+                continue
+            if "run_started" in entry:
+                if runs[-1]:
+                    runs.append([])
+            elif isinstance(entry.get("request"), dict):
+                runs[-1].append(entry)
+
+    if run is None:
+        if len(runs) > 1:
+            raise ValueError(f"{path} holds {len(runs)} recorded runs, pick one with --run")
+        run = 1
+    if not 1 <= run <= len(runs):
+        raise ValueError(f"{path} holds {len(runs)} recorded runs, there is no run {run}")
+    # Lines are written as requests complete; replay needs them as they started
+    return sorted(runs[run - 1], key=lambda entry: entry.get("offset", 0.0))
+
+
+def operation_name(request: dict) -> str:
+    """Group tool calls by tool, everything else by method."""
+    method = request.get("method", "unknown")
+    if method == "tools/call":
+        params = request.get("params") or {}
+        return f"tools/call:{params.get('name')}"
+    return method
+
+
+def is_error(response) -> bool:
+    if not isinstance(response, dict):
+        return False
+    return "error" in response or bool((response.get("result") or {}).get("isError"))
+
+
+class Replay:
+    def __init__(self, entries: list[dict], server_url: str, speed: float):
+        self.entries = entries
+        self.server_url = server_url
+        self.speed = speed
+        # Cached results never reached the server, so there is nothing to
+        # compare them against; replay always goes upstream
+        self.proxy = MCPProxy(server_url, max_in_flight=64, cache_size=0)
+        # operation -> {"recorded": [...], "replayed": [...]} in seconds
+        self.latencies: dict[str, dict[str, list[float]]] = {}
+        self.errors: dict[str, int] = {}
+
+    async def send(self, entry: dict) -> None:
+        request = entry["request"]
+        start = time.perf_counter()
+        response = await self.proxy.handle_request(request)
+        elapsed = time.perf_counter() - start
+
+        # Notifications have no reply to time
+        if "id" not in request:
+            return
+        name = operation_name(request)
+        series = self.latencies.setdefault(name, {"recorded": [], "replayed": []})
+        series["replayed"].append(elapsed)
+        if not entry.get("cached"):
+            series["recorded"].append(entry.get("duration_ms", 0.0) / 1000)
+        if is_error(response) and not is_error(entry.get("response")):
+            self.errors[name] = self.errors.get(name, 0) + 1
+
+    async def run(self) -> dict:
+        print(f"🔄 Replaying {len(self.entries)} requests against {self.server_url}...")
+        pace = f"{self.speed:g}x" if self.speed else "as fast as possible"
+        print(f"🚀 Pace: {pace}")
+
+        tasks = []
+        start = time.perf_counter()
+        try:
+            for entry in self.entries:
+                if self.speed:
+                    delay = start + entry.get("offset", 0.0) / self.speed - time.perf_counter()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+
+                request = entry["request"]
+                task = asyncio.create_task(self.send(entry))
+                # Same ordering rules as the live proxy: the session must be
+                # set up before anything else goes out on it
+                if request.get("method") == "initialize" or "id" not in request:
+                    await task
+                else:
+                    tasks.append(task)
+            await asyncio.gather(*tasks)
+            elapsed = time.perf_counter() - start
+        finally:
+            await self.proxy.client.aclose()
+
+        return self.report(elapsed)
+
+    def report(self, elapsed: float) -> dict:
+        operations = {}
+        for name, series in sorted(self.latencies.items()):
+            recorded = summarize(series["recorded"])
+            replayed = summarize(series["replayed"])
+            operations[name] = {
+                "requests": len(series["replayed"]),
+                "errors": self.errors.get(name, 0),
+                "recorded_ms": recorded,
+                "replayed_ms": replayed,
+                "p50_change_pct": _change(recorded["p50"], replayed["p50"]),
+                "p99_change_pct": _change(recorded["p99"], replayed["p99"]),
+            }
+
+        recorded_span = max((entry.get("offset", 0.0) for entry in self.entries), default=0.0)
+        return {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "server_url": self.server_url,
+            "speed": self.speed,
+            "recorded_span_s": recorded_span,
+            "elapsed_s": elapsed,
+            "requests": sum(op["requests"] for op in operations.values()),
+            "errors": sum(op["errors"] for op in operations.values()),
+            "operations": operations,
+        }
+
+
+def _change(before: float, after: float):
+    if not before:
+        return None
+    return (after - before) / before * 100
+
+
+def print_report(results: dict) -> None:
+    print("\n" + "=" * 60)
+    print(
+        f"📊 {results['requests']} requests replayed in {results['elapsed_s']:.2f}s "
+        f"(recorded over {results['recorded_span_s']:.2f}s), {results['errors']} new errors"
+    )
+    print("   p50 ms recorded -> replayed, p99 ms recorded -> replayed")
+    for name, stats in results["operations"].items():
+        recorded, replayed = stats["recorded_ms"], stats["replayed_ms"]
+        change = stats["p50_change_pct"]
+        change = f" ({change:+.0f}%)" if change is not None else ""
+        print(
+            f"   - {name}: {stats['requests']} requests, "
+            f"p50 {recorded['p50']:.2f} -> {replayed['p50']:.2f}{change}, "
+            f"p99 {recorded['p99']:.2f} -> {replayed['p99']:.2f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a proxy traffic capture")
+    parser.add_argument("capture", help="JSONL capture written by MCP_PROXY_RECORD")
+    parser.add_argument("server_url", nargs="?", default="http://localhost:8000")
+    parser.add_argument(
+        "--speed",
+        type=float,
+        default=1.0,
+        help="pace multiplier, 1 = original timing, 0 = no delays (default: 1)",
+    )
+    parser.add_argument(
+        "--run",
+        type=int,
+        help="which recorded run to replay when the capture holds several (1 = first)",
+    )
+    parser.add_argument("--output", help="write the comparison as JSON to this file")
+    args = parser.parse_args()
+
+    try:
+        entries = load_capture(args.capture, args.run)
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    if not entries:
+        print(f"❌ No requests found in {args.capture}")
+        sys.exit(1)
+
+    replay = Replay(entries, args.server_url.rstrip("/"), args.speed)
+    try:
+        results = asyncio.run(replay.run())
+    except KeyboardInterrupt:
+        print("\n👋 Replay interrupted")
+        sys.exit(1)
+
+    print_report(results)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"💾 Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Per-request choice between JSON and SSE responses on streamable HTTP"""
+
+import json
+from contextvars import ContextVar
+
+from mcp.server.streamable_http import StreamableHTTPServerTransport
+
+# Response modes accepted by RESPONSE_MODE, mapped to the value handed to
+# the transport's ``is_json_response_enabled``
+RESPONSE_MODES = {"sse": False, "json": True, "auto": "auto"}
+
+# Decision for the request being handled; each ASGI request runs in its own
+# task, so concurrent requests on one session don't see each other's value
+_json_response: ContextVar[bool] = ContextVar("json_response", default=False)
+
+
+def wants_stream(body: bytes) -> bool:
+    """Whether a JSON-RPC request asked for progress notifications"""
+    # Cheap byte scan first so large batch payloads aren't parsed twice
+    if b'"progressToken"' not in body:
+        return False
+    try:
+        message = json.loads(body)
+    except ValueError:
+        return False
+    if not isinstance(message, dict):
+        return False
+    params = message.get("params")
+    meta = params.get("_meta") if isinstance(params, dict) else None
+    return isinstance(meta, dict) and meta.get("progressToken") is not None
+
+
+class ResponseModeTransport(StreamableHTTPServerTransport):
+    """Transport that can answer each request as JSON or as an SSE stream
+
+    With ``is_json_response_enabled="auto"``, a request that carries a
+    progress token gets an SSE stream so notifications reach the client as
+    they happen. Every other request has exactly one message to send back
+    and gets it as a plain ``application/json`` body, skipping SSE framing
+    on both ends. ``True`` and ``False`` behave as in the SDK.
+    """
+
+    @property
+    def is_json_response_enabled(self):
+        if self._response_mode == "auto":
+            return _json_response.get()
+        return self._response_mode
+
+    @is_json_response_enabled.setter
+    def is_json_response_enabled(self, value):
+        self._response_mode = value
+
+    async def _handle_post_request(self, scope, request, receive, send) -> None:
+        if self._response_mode != "auto":
+            await super()._handle_post_request(scope, request, receive, send)
+            return
+
+        # Request caches the body, so the transport's own read is free
+        body = await request.body()
+        token = _json_response.set(not wants_stream(body))
+        try:
+            await super()._handle_post_request(scope, request, receive, send)
+        finally:
+            _json_response.reset(token)
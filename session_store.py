@@ -0,0 +1,216 @@
+"""Bounded session store for the streamable HTTP transport"""
+
+import contextlib
+import logging
+import time
+from collections import OrderedDict
+from http import HTTPStatus
+
+import anyio
+from mcp.server.streamable_http import MCP_SESSION_ID_HEADER
+from mcp.server.streamable_http_manager import StreamableHTTPSessionManager
+from starlette.requests import Request
+from starlette.responses import Response
+
+logger = logging.getLogger(__name__)
+
+
+class BoundedSessionManager(StreamableHTTPSessionManager):
+    """StreamableHTTPSessionManager with a session cap and idle expiry
+
+    The stock manager keeps every session until the client sends DELETE,
+    which most clients never do. This one tracks sessions in
+    least-recently-used order: creating a session past ``max_sessions``
+    evicts the least recently used idle session, and a background sweep
+    expires sessions idle for longer than ``idle_ttl`` seconds. Removed
+    sessions are terminated and unknown session IDs get 404, so a returning
+    client re-initializes. An ``idle_ttl`` of 0 turns idle expiry off.
+    Sessions with a request in flight are never removed. While ``draining``
+    is set, new sessions get 503 with ``Retry-After`` so clients
+    re-initialize against another instance.
+    """
+
+    def __init__(
+        self,
+        *args,
+        max_sessions: int = 1000,
+        idle_ttl: float = 1800.0,
+        sweep_interval: float | None = None,
+        **kwargs,
+    ):
+        super().__init__(*args, **kwargs)
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        # The sweep still runs with expiry off, to drop DELETEd sessions
+        self.sweep_interval = sweep_interval or (min(idle_ttl / 2, 60.0) if idle_ttl > 0 else 60.0)
+        self.draining = False
+        # Requests inside the SDK transport, SSE streams included
+        self.open_requests = 0
+        self.stats = {
+            "created": 0,
+            "evicted": 0,
+            "expired": 0,
+            "rejected": 0,
+            "rejected_draining": 0,
+        }
+        self._last_seen: OrderedDict[str, float] = OrderedDict()
+        self._active_requests: dict[str, int] = {}
+        self._pending_creations = 0
+
+    @property
+    def active_sessions(self) -> int:
+        return len(self._last_seen)
+
+    @contextlib.asynccontextmanager
+    async def run(self):
+        async with super().run():
+            async with anyio.create_task_group() as tg:
+                tg.start_soon(self._sweep)
+                try:
+                    yield
+                finally:
+                    tg.cancel_scope.cancel()
+                    self._last_seen.clear()
+                    self._active_requests.clear()
+
+    async def _handle_stateful_request(self, scope, receive, send) -> None:
+        session_id = Request(scope).headers.get(MCP_SESSION_ID_HEADER)
+
+        if session_id is None:
+            await self._handle_new_session(scope, receive, send)
+            return
+
+        if session_id not in self._server_instances:
+            # The spec's signal to start a new session; the SDK answers 400
+            response = Response(
+                "Not Found: Session has expired or does not exist",
+                status_code=HTTPStatus.NOT_FOUND,
+            )
+            await response(scope, receive, send)
+            return
+
+        if session_id in self._last_seen:
+            self._touch(session_id)
+            self._active_requests[session_id] += 1
+        self.open_requests += 1
+        try:
+            await super()._handle_stateful_request(scope, receive, send)
+        finally:
+            self.open_requests -= 1
+            if session_id in self._last_seen:
+                self._active_requests[session_id] -= 1
+                self._touch(session_id)
+
+    async def _handle_new_session(self, scope, receive, send) -> None:
+        if self.draining:
+            self.stats["rejected_draining"] += 1
+            response = Response(
+                "Service Unavailable: Server is shutting down",
+                status_code=HTTPStatus.SERVICE_UNAVAILABLE,
+                headers={"Retry-After": "1"},
+            )
+            await response(scope, receive, send)
+            return
+
+        if not await self._make_room():
+            self.stats["rejected"] += 1
+            response = Response(
+                "Service Unavailable: Session limit reached",
+                status_code=HTTPStatus.SERVICE_UNAVAILABLE,
+            )
+            await response(scope, receive, send)
+            return
+
+        created = []
+
+        # The new session ID is only known once the transport sends headers
+        async def send_and_register(message):
+            if message["type"] == "http.response.start" and not created:
+                for name, value in message.get("headers", []):
+                    if name.decode("latin-1").lower() == MCP_SESSION_ID_HEADER:
+                        session_id = value.decode("latin-1")
+                        created.append(session_id)
+                        self._pending_creations -= 1
+                        self._touch(session_id)
+                        self._active_requests[session_id] = 1
+                        self.stats["created"] += 1
+            await send(message)
+
+        self._pending_creations += 1
+        self.open_requests += 1
+        try:
+            await super()._handle_stateful_request(scope, receive, send_and_register)
+        finally:
+            self.open_requests -= 1
+            if created:
+                session_id = created[0]
+                if session_id in self._last_seen:
+                    self._active_requests[session_id] -= 1
+                    self._touch(session_id)
+            else:
+                self._pending_creations -= 1
+
+    def _touch(self, session_id: str) -> None:
+        self._last_seen[session_id] = time.monotonic()
+        self._last_seen.move_to_end(session_id)
+
+    async def _make_room(self) -> bool:
+        """Evict idle sessions until a new one fits; False if none can go"""
+        while len(self._last_seen) + self._pending_creations >= self.max_sessions:
+            victim = next(
+                (sid for sid in self._last_seen if not self._active_requests.get(sid)),
+                None,
+            )
+            if victim is None:
+                return False
+            await self._close_session(victim)
+            self.stats["evicted"] += 1
+        return True
+
+    async def _close_session(self, session_id: str) -> None:
+        self._last_seen.pop(session_id, None)
+        self._active_requests.pop(session_id, None)
+        transport = self._server_instances.pop(session_id, None)
+        if transport is not None:
+            # Same path as a client DELETE: closes the streams, which ends
+            # the session's server task, and answers later requests with 404
+            await transport._terminate_session()
+        logger.debug(f"Closed session {session_id}")
+
+    async def close_all(self) -> int:
+        """Terminate every session, ending its open streams
+
+        Returns the number of sessions that were still live.
+        """
+        live = 0
+        for session_id, transport in list(self._server_instances.items()):
+            live += not transport._terminated
+            await self._close_session(session_id)
+        return live
+
+    async def expire_idle_sessions(self) -> int:
+        """Terminate sessions idle for longer than ``idle_ttl``"""
+        cutoff = time.monotonic() - self.idle_ttl
+        expired = 0
+        for session_id, last_seen in list(self._last_seen.items()):
+            if self.idle_ttl <= 0 or last_seen > cutoff:
+                break
+            if self._active_requests.get(session_id):
+                continue
+            await self._close_session(session_id)
+            expired += 1
+
+        # Sessions the client DELETEd are left in the SDK's table forever
+        for session_id, transport in list(self._server_instances.items()):
+            if transport._terminated:
+                await self._close_session(session_id)
+
+        self.stats["expired"] += expired
+        if expired:
+            logger.info(f"Expired {expired} idle sessions, {self.active_sessions} active")
+        return expired
+
+    async def _sweep(self) -> None:
+        while True:
+            await anyio.sleep(self.sweep_interval)
+            await self.expire_idle_sessions()
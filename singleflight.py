@@ -0,0 +1,119 @@
+"""Coalescing of identical concurrent tool calls"""
+
+import asyncio
+import json
+
+from mcp import types
+
+from metrics import Counter, is_wrapped_by
+
+
+def _canonical(arguments) -> str:
+    return json.dumps(arguments, sort_keys=True, separators=(",", ":"))
+
+
+def _wants_progress(req: types.CallToolRequest) -> bool:
+    meta = req.params.meta
+    return meta is not None and meta.progressToken is not None
+
+
+class _Flight:
+    """One running tool execution and the calls waiting on it"""
+
+    __slots__ = ("arguments", "key", "task", "waiters")
+
+    def __init__(self, arguments, key, task):
+        self.arguments = arguments
+        self.key = key
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Shares one execution between identical in-flight calls to a tool
+
+    Only tools annotated ``idempotentHint`` take part, since running them
+    once or many times is the same by definition. Calls asking for progress
+    notifications run on their own, as progress is reported to the session
+    that started the execution. Argument keys are computed only once a
+    second call to the same tool arrives while the first is still running,
+    so calls that don't overlap pay nothing.
+    """
+
+    def __init__(self):
+        self.tools: set[str] = set()
+        self.stats = {"collapsed": 0}
+        self.collapsed = Counter(
+            "mcp_tool_calls_collapsed_total",
+            "Tool calls answered by an identical call already in flight",
+            ("tool",),
+        )
+        self._flights: dict[str, list[_Flight]] = {}
+
+    @property
+    def in_flight(self) -> int:
+        return sum(len(flights) for flights in self._flights.values())
+
+    def install(self, server) -> None:
+        """Wrap the low-level tools/call handler of a FastMCP server"""
+        self.tools = {
+            tool.name
+            for tool in server._tool_manager.list_tools()
+            if tool.annotations is not None and tool.annotations.idempotentHint
+        }
+        handlers = server._mcp_server.request_handlers
+        call_tool = handlers[types.CallToolRequest]
+        if is_wrapped_by(call_tool, self):
+            return
+
+        async def coalesced_call_tool(req: types.CallToolRequest):
+            name = req.params.name
+            if name not in self.tools or _wants_progress(req):
+                return await call_tool(req)
+            return await self._join(name, req, call_tool)
+
+        coalesced_call_tool._owner = self
+        coalesced_call_tool.__wrapped__ = call_tool
+        handlers[types.CallToolRequest] = coalesced_call_tool
+
+    async def _join(self, name, req, call_tool):
+        arguments = req.params.arguments
+        flights = self._flights.setdefault(name, [])
+        flight = None
+
+        if flights:
+            key = _canonical(arguments)
+            for other in flights:
+                if other.key is None:
+                    other.key = _canonical(other.arguments)
+                if other.key == key:
+                    flight = other
+                    break
+        else:
+            key = None
+
+        if flight is None:
+            flight = _Flight(arguments, key, asyncio.ensure_future(call_tool(req)))
+            flights.append(flight)
+            flight.task.add_done_callback(lambda _: self._land(name, flight))
+        else:
+            self.stats["collapsed"] += 1
+            self.collapsed.inc(name)
+
+        flight.waiters += 1
+        try:
+            # Shielded so one caller's cancellation doesn't fail the others
+            return await asyncio.shield(flight.task)
+        except asyncio.CancelledError:
+            if flight.waiters == 1 and not flight.task.done():
+                flight.task.cancel()
+            raise
+        finally:
+            flight.waiters -= 1
+
+    def _land(self, name, flight) -> None:
+        flights = self._flights.get(name)
+        if flights is not None:
+            flights.remove(flight)
+            if not flights:
+                del self._flights[name]
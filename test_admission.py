@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Tests for admission control limits, queueing and 429 responses.
+
+Runs against a stub ASGI app in-process - no server needed.
+"""
+
+import asyncio
+import sys
+
+import httpx
+
+from admission import AdmissionController
+
+
+CALL = {"jsonrpc": "2.0", "id": 1, "method": "tools/call", "params": {"name": "add"}}
+CANCEL = {"jsonrpc": "2.0", "method": "notifications/cancelled", "params": {"requestId": 1}}
+
+
+def slow_app(seconds):
+    async def app(scope, receive, send):
+        await asyncio.sleep(seconds)
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+
+    return app
+
+
+async def post_all(controller, session_ids):
+    transport = httpx.ASGITransport(app=controller)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+
+        async def post(session_id):
+            headers = {"Mcp-Session-Id": session_id} if session_id else {}
+            return await client.post("/mcp/", json=CALL, headers=headers)
+
+        return await asyncio.gather(*(post(session_id) for session_id in session_ids))
+
+
+async def test_full_queue_rejects_with_retry_after():
+    controller = AdmissionController(slow_app(0.1), max_concurrent=1, queue_size=0, retry_after=3)
+    responses = await post_all(controller, [None, None])
+
+    statuses = sorted(response.status_code for response in responses)
+    assert statuses == [200, 429], statuses
+    rejected = next(response for response in responses if response.status_code == 429)
+    assert rejected.headers["retry-after"] == "3"
+    assert rejected.json()["error"]["code"] == -32000
+    assert controller.stats["rejected_queue_full"] == 1
+
+
+async def test_queued_request_is_admitted():
+    controller = AdmissionController(slow_app(0.05), max_concurrent=1, queue_size=1, queue_timeout=1)
+    responses = await post_all(controller, [None, None])
+
+    assert [response.status_code for response in responses] == [200, 200]
+    assert controller.stats["admitted"] == 2
+    assert controller.active == 0 and controller.waiting == 0
+
+
+async def test_queue_deadline():
+    controller = AdmissionController(slow_app(0.2), max_concurrent=1, queue_size=1, queue_timeout=0.05)
+    responses = await post_all(controller, [None, None])
+
+    assert sorted(response.status_code for response in responses) == [200, 429]
+    assert controller.stats["rejected_timeout"] == 1
+
+
+async def test_per_session_limit():
+    controller = AdmissionController(
+        slow_app(0.05), max_concurrent=10, max_per_session=1, queue_size=0
+    )
+    same = await post_all(controller, ["a", "a"])
+    different = await post_all(controller, ["a", "b"])
+
+    assert sorted(response.status_code for response in same) == [200, 429]
+    assert [response.status_code for response in different] == [200, 200]
+    assert not controller._sessions, "per-session state should be released"
+
+
+async def test_notifications_skip_admission():
+    controller = AdmissionController(
+        slow_app(0.2), max_concurrent=10, max_per_session=1, queue_size=0
+    )
+    transport = httpx.ASGITransport(app=controller)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        headers = {"Mcp-Session-Id": "a"}
+        call = asyncio.create_task(client.post("/mcp/", json=CALL, headers=headers))
+        await asyncio.sleep(0.05)
+        # The session's only slot is taken, yet its cancellation gets through
+        cancel, reply, rejected = await asyncio.gather(
+            client.post("/mcp/", json=CANCEL, headers=headers),
+            client.post("/mcp/", json={"jsonrpc": "2.0", "id": 5, "result": {}}, headers=headers),
+            client.post("/mcp/", json=CALL, headers=headers),
+        )
+        await call
+
+    assert cancel.status_code == 200 and reply.status_code == 200, (cancel, reply)
+    assert rejected.status_code == 429
+    assert controller.stats["passed_through"] == 2, controller.stats
+    assert controller.stats["admitted"] == 1, controller.stats
+
+
+async def test_rejection_reads_only_the_start_of_the_body():
+    controller = AdmissionController(slow_app(0.2), max_concurrent=1, queue_size=0)
+    chunk = b" " * 65536
+    received = 0
+
+    async def receive():
+        nonlocal received
+        received += 1
+        return {"type": "http.request", "body": chunk, "more_body": received < 1000}
+
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": "POST", "path": "/mcp/", "headers": []}
+    held = asyncio.create_task(post_all(controller, [None]))
+    await asyncio.sleep(0.05)
+    await controller(scope, receive, send)
+    await held
+
+    assert sent[0]["status"] == 429, sent
+    assert received == 1, received
+
+
+async def main():
+    tests = [
+        test_full_queue_rejects_with_retry_after,
+        test_queued_request_is_admitted,
+        test_queue_deadline,
+        test_per_session_limit,
+        test_notifications_skip_admission,
+        test_rejection_reads_only_the_start_of_the_body,
+    ]
+    failed = 0
+    for test in tests:
+        try:
+            await test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+
+    print(f"📊 {len(tests) - failed}/{len(tests)} tests passed")
+    return failed == 0
+
+
+if __name__ == "__main__":
+    sys.exit(0 if asyncio.run(main()) else 1)
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Tests for memory-mapped array files and the array_* tools.
+
+Runs main.py's app in-process behind the proxy - no server needed.
+"""
+
+import asyncio
+import json
+import math
+import os
+import resource
+import sys
+import tempfile
+from array import array
+
+import main as server
+from array_store import ArrayStore, apply_chunk, sum_chunk
+from test_progress import result_text, run_with_proxy
+
+
+def write_array(store: ArrayStore, name: str, values, code: str = "d") -> None:
+    with store.create(name) as f:
+        array(code, values).tofile(f)
+
+
+def read_array(store: ArrayStore, name: str, code: str = "d") -> list:
+    with open(store.path(name), "rb") as f:
+        return array(code, f.read()).tolist()
+
+
+def tool_call(request_id, tool, **arguments) -> dict:
+    params = {"name": tool, "arguments": arguments}
+    return {"jsonrpc": "2.0", "id": request_id, "method": "tools/call", "params": params}
+
+
+async def test_names_stay_inside_the_data_directory():
+    with tempfile.TemporaryDirectory() as root:
+        store = ArrayStore(root)
+        for name in ("../outside", "/etc/passwd", "a/../../outside", "."):
+            try:
+                store.path(name)
+                raise AssertionError(f"{name!r} was accepted")
+            except ValueError:
+                pass
+        assert store.path("nested/ok") == os.path.join(os.path.realpath(root), "nested", "ok")
+
+        # A failed write leaves the previous array untouched and no temp file
+        write_array(store, "kept", [1.0, 2.0])
+        try:
+            with store.create("kept") as f:
+                f.write(b"partial")
+                raise RuntimeError("tool failed")
+        except RuntimeError:
+            pass
+        assert read_array(store, "kept") == [1.0, 2.0]
+        assert os.listdir(root) == ["kept"], os.listdir(root)
+
+
+async def test_resident_memory_stays_flat():
+    with tempfile.TemporaryDirectory() as root:
+        store = ArrayStore(root, chunk_size=1 << 16)
+        length = 1 << 23  # 64 MiB of float64
+        with store.create("big") as f:
+            for _ in range(length // (1 << 16)):
+                array("d", bytes(8 << 16)).tofile(f)
+
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        total = 0.0
+        with store.open("big", "float64") as a:
+            for start, stop in store.chunks(len(a), a.itemsize):
+                total += apply_chunk(sum_chunk, [a], start, stop)
+        growth_mib = (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - peak) / 1024
+
+        assert total == 0.0
+        assert growth_mib < 16, f"peak RSS grew {growth_mib:.1f} MiB mapping a 64 MiB file"
+
+
+async def test_array_tools():
+    x = [1.5, -2.0, 3.0, 4.5, 0.0, 7.25, -1.0]
+    y = [2.0, 0.5, -1.0, 3.0, 9.0, 1.0, 2.0]
+
+    with tempfile.TemporaryDirectory() as root:
+        # Chunks of one page each, so a few thousand values span several
+        store = server.arrays = ArrayStore(root, chunk_size=1)
+        write_array(store, "x", x * 1000)
+        write_array(store, "y", y * 1000)
+        write_array(store, "short", y)
+        write_array(store, "ints", range(10), "q")
+
+        async def test(proxy):
+            reply = await proxy.handle_request(tool_call(2, "array_sum", name="x"))
+            assert math.isclose(float(result_text(reply)), math.fsum(x) * 1000), reply
+            assert proxy.transport_stats["progress_keepalives"] > 1, proxy.transport_stats
+
+            reply = await proxy.handle_request(tool_call(3, "array_mean", name="x"))
+            assert math.isclose(float(result_text(reply)), math.fsum(x) / len(x)), reply
+
+            reply = await proxy.handle_request(tool_call(4, "array_dot", a="x", b="y"))
+            dot = math.fsum(p * q for p, q in zip(x, y)) * 1000
+            assert math.isclose(float(result_text(reply)), dot), reply
+
+            reply = await proxy.handle_request(
+                tool_call(5, "array_add", a="x", b="y", output="out/sum")
+            )
+            summary = json.loads(result_text(reply))
+            assert summary == {"output": "out/sum", "length": 7000, "dtype": "float64"}, summary
+            assert read_array(store, "out/sum")[:7] == [p + q for p, q in zip(x, y)]
+
+            reply = await proxy.handle_request(
+                tool_call(6, "array_multiply", a="ints", b=3, output="tripled", dtype="int64")
+            )
+            assert not reply["result"]["isError"], reply
+            assert read_array(store, "tripled", "q") == [3 * i for i in range(10)]
+
+            failures = [
+                tool_call(7, "array_sum", name="../x"),
+                tool_call(8, "array_sum", name="missing"),
+                tool_call(9, "array_sum", name="x", dtype="complex"),
+                tool_call(10, "array_dot", a="x", b="short"),
+                tool_call(11, "array_add", a="x", b="short", output="never"),
+            ]
+            for request in failures:
+                reply = await proxy.handle_request(request)
+                assert reply["result"]["isError"], reply
+            assert not os.path.exists(store.path("never"))
+
+        await run_with_proxy(test)
+
+
+async def main():
+    tests = [
+        test_names_stay_inside_the_data_directory,
+        test_resident_memory_stays_flat,
+        test_array_tools,
+    ]
+    failed = 0
+    for test in tests:
+        try:
+            await test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+
+    print(f"📊 {len(tests) - failed}/{len(tests)} tests passed")
+    return failed == 0
+
+
+if __name__ == "__main__":
+    sys.exit(0 if asyncio.run(main()) else 1)
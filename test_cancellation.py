@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+Tests for cancelling tool calls: by the client, by disconnecting, and down
+into the executor pools.
+
+Runs main.py's app in-process - no server needed.
+"""
+
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+
+import main as server
+from array_store import ArrayStore
+from cancellation import CancellingTransport
+from claude_mcp_proxy import MCPProxy
+from executor import BoundedPool, check_cancelled
+from test_array_store import tool_call, write_array
+from test_lifecycle import HEADERS, INITIALIZE
+from test_progress import run_with_proxy
+from test_server import asgi_lifespan
+
+
+def big_array_store(root: str) -> ArrayStore:
+    """A store whose 'big' array takes thousands of pool round trips to sum"""
+    store = ArrayStore(root, chunk_size=1)
+    write_array(store, "big", array("d", bytes(8 << 22)))
+    return store
+
+
+async def wait_for(condition, timeout: float = 5.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        await asyncio.sleep(0.01)
+    return True
+
+
+def cancelled_calls(tool: str) -> float:
+    return server.metrics.tool_cancellations._values.get((tool,), 0)
+
+
+async def test_pool_reclaims_cancelled_work():
+    pool = BoundedPool("thread", lambda n: ThreadPoolExecutor(max_workers=n), 1, 2)
+
+    def cooperative():
+        while True:
+            check_cancelled()
+            time.sleep(0.001)
+
+    def stubborn():
+        time.sleep(0.3)
+        return time.time(), None
+
+    # One call runs and stops at its next check; the one queued behind it
+    # never starts
+    running = asyncio.create_task(pool.submit(cooperative))
+    queued = asyncio.create_task(pool.submit(stubborn))
+    await asyncio.sleep(0.05)
+    assert pool.active == 1 and pool.queued == 1, (pool.active, pool.queued)
+    running.cancel()
+    queued.cancel()
+    assert await wait_for(lambda: pool.pending == 0), pool.pending
+    assert pool.cancelled == {"dequeued": 1, "stopped": 1, "finished": 0}, pool.cancelled
+
+    # Work that never checks holds its worker until it's done
+    call = asyncio.create_task(pool.submit(stubborn))
+    await asyncio.sleep(0.05)
+    call.cancel()
+    await asyncio.sleep(0.05)
+    assert pool.pending == 1, "a running call was counted free before finishing"
+    assert await wait_for(lambda: pool.pending == 0)
+    assert pool.cancelled["finished"] == 1, pool.cancelled
+    assert pool.stats["completed"] == 0, pool.stats
+    pool.shutdown()
+
+
+async def test_client_cancel_stops_tool():
+    with tempfile.TemporaryDirectory() as root:
+        server.arrays = big_array_store(root)
+        pool = server.executor.pools["thread"]
+        before = cancelled_calls("array_sum")
+        chunks_before = pool.stats["completed"]
+
+        async def test(proxy):
+            call = tool_call(2, "array_sum", name="big")
+            task = asyncio.create_task(proxy.handle_request(call))
+            # The in-process transport buffers whole responses, so the pool
+            # shows how far the call has got
+            started = await wait_for(lambda: pool.stats["completed"] > chunks_before + 3)
+            assert started, "the call never got going"
+
+            cancel = {
+                "jsonrpc": "2.0",
+                "method": "notifications/cancelled",
+                "params": {"requestId": 2, "reason": "test"},
+            }
+            await proxy.handle_request(cancel)
+            reply = await asyncio.wait_for(task, 5)
+            assert "error" in reply, reply
+
+        await run_with_proxy(test)
+        ran = pool.stats["completed"] - chunks_before
+        chunks = len(list(server.arrays.chunks(1 << 22, 8)))
+        assert ran < chunks / 2, f"{ran} of {chunks} chunks ran"
+        assert cancelled_calls("array_sum") == before + 1
+        assert pool.pending == 0
+
+
+async def disconnect_mid_call(app, session_id: str) -> list:
+    """Call array_sum, then drop the connection before it answers"""
+    body = json.dumps(tool_call(3, "array_sum", name="big")).encode()
+    headers = {**HEADERS, "Mcp-Session-Id": session_id}
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": "/mcp/",
+        "raw_path": b"/mcp/",
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(k.lower().encode(), v.encode()) for k, v in headers.items()],
+        "client": ("127.0.0.1", 50000),
+        "server": ("test", 80),
+    }
+    gone = asyncio.Event()
+    body_sent = False
+
+    async def receive():
+        nonlocal body_sent
+        if not body_sent:
+            body_sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        await gone.wait()
+        return {"type": "http.disconnect"}
+
+    sent = []
+
+    async def send(message):
+        if gone.is_set():
+            raise OSError("client disconnected")
+        sent.append(message)
+
+    task = asyncio.create_task(app(scope, receive, send))
+    await asyncio.sleep(0.2)
+    gone.set()
+    await asyncio.wait_for(task, 5)
+    return sent
+
+
+async def test_disconnect_cancels_request():
+    with tempfile.TemporaryDirectory() as root:
+        server.arrays = big_array_store(root)
+
+        for mode in ("json", "sse"):
+            os.environ["RESPONSE_MODE"] = mode
+            try:
+                app = server.create_app()
+            finally:
+                del os.environ["RESPONSE_MODE"]
+            before = cancelled_calls("array_sum")
+            disconnected = CancellingTransport.stats["disconnected"]
+
+            async with asgi_lifespan(app):
+                async with httpx.AsyncClient(
+                    transport=httpx.ASGITransport(app=app), base_url="http://test"
+                ) as client:
+                    response = await client.post("/mcp/", json=INITIALIZE, headers=HEADERS)
+                    session_id = response.headers["mcp-session-id"]
+                    await client.post(
+                        "/mcp/",
+                        json={"jsonrpc": "2.0", "method": "notifications/initialized"},
+                        headers={**HEADERS, "Mcp-Session-Id": session_id},
+                    )
+                    sent = await disconnect_mid_call(app, session_id)
+
+                assert not any(m.get("body") for m in sent), f"{mode}: {sent}"
+                assert await wait_for(lambda: cancelled_calls("array_sum") == before + 1), mode
+                assert CancellingTransport.stats["disconnected"] == disconnected + 1, mode
+                assert await wait_for(lambda: server.executor.pools["thread"].pending == 0)
+
+    rendered = server.metrics.render()
+    assert 'mcp_tool_calls_cancelled_total{tool="array_sum"}' in rendered
+    assert "mcp_requests_disconnected_total" in rendered
+
+
+async def test_proxy_drops_cancelled_requests():
+    proxy = MCPProxy("http://test")
+    task = asyncio.create_task(asyncio.sleep(10))
+    proxy._in_flight[7] = task
+    proxy._cancel_in_flight({"method": "notifications/cancelled", "params": {"requestId": 7}})
+    proxy._cancel_in_flight({"method": "notifications/cancelled", "params": {"requestId": 8}})
+    await asyncio.sleep(0)
+    await proxy.client.aclose()
+
+    assert task.cancelled()
+    assert proxy.transport_stats["cancelled"] == 1, proxy.transport_stats
+
+
+async def test_cancel_before_dispatch_frees_its_slot():
+    # The call and its cancellation arrive in one read, so the call's task is
+    # cancelled before it ever starts
+    lines = [
+        tool_call(1, "add", a=1, b=2),
+        {"jsonrpc": "2.0", "method": "notifications/cancelled", "params": {"requestId": 1}},
+        tool_call(2, "add", a=3, b=4),
+    ]
+
+    async def read_lines():
+        for line in lines:
+            yield json.dumps(line) + "\n"
+
+    def handler(request):
+        body = json.loads(request.content)
+        if "id" not in body:
+            return httpx.Response(202)
+        result = {"content": [{"type": "text", "text": "7.0"}], "isError": False}
+        return httpx.Response(200, json={"jsonrpc": "2.0", "id": body["id"], "result": result})
+
+    written = []
+    proxy = MCPProxy("http://test", max_in_flight=1)
+    proxy.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    proxy._read_lines = read_lines
+    proxy._write_response = written.append
+    # With the slot lost, the second call would wait for it forever
+    await asyncio.wait_for(proxy.run(), timeout=5)
+
+    assert [reply["id"] for reply in written] == [2], written
+    assert proxy._in_flight == {}, proxy._in_flight
+    assert proxy.transport_stats["cancelled"] == 1, proxy.transport_stats
+
+
+async def main():
+    tests = [
+        test_pool_reclaims_cancelled_work,
+        test_client_cancel_stops_tool,
+        test_disconnect_cancels_request,
+        test_proxy_drops_cancelled_requests,
+        test_cancel_before_dispatch_frees_its_slot,
+    ]
+    failed = 0
+    for test in tests:
+        try:
+            await test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+
+    print(f"📊 {len(tests) - failed}/{len(tests)} tests passed")
+    return failed == 0
+
+
+if __name__ == "__main__":
+    sys.exit(0 if asyncio.run(main()) else 1)
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Tests for per-tool execution policies and bounded pools.
+
+Runs offline - no server needed.
+"""
+
+import asyncio
+import sys
+import time
+
+from mcp.server.fastmcp.exceptions import ToolError
+
+from executor import ToolExecutor, parse_policies
+
+executor = ToolExecutor(thread_workers=1, process_workers=1, queue_size=0)
+
+
+@executor.offload("thread")
+def slow_add(a: float, b: float) -> float:
+    time.sleep(0.2)
+    return a + b
+
+
+@executor.offload("process")
+def square_sum(n: int) -> int:
+    return sum(i * i for i in range(n))
+
+
+async def test_thread_policy_keeps_loop_responsive():
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+    task = asyncio.create_task(ticker())
+    result = await slow_add(1, 2)
+    task.cancel()
+
+    assert result == 3
+    assert ticks >= 10, f"event loop only ticked {ticks} times"
+
+
+async def test_full_pool_rejects():
+    first = asyncio.create_task(slow_add(1, 2))
+    await asyncio.sleep(0)  # let the first call take the only slot
+    try:
+        await slow_add(3, 4)
+        rejected = False
+    except ToolError:
+        rejected = True
+    await first
+
+    assert rejected, "second call should be rejected"
+    assert executor.pools["thread"].stats["rejected"] == 1
+
+
+async def test_process_policy():
+    assert await square_sum(n=10) == 285
+    assert executor.pools["process"].stats["completed"] == 1
+
+
+async def test_parse_policies():
+    assert parse_policies("add=thread, heavy=process") == {"add": "thread", "heavy": "process"}
+    try:
+        parse_policies("add=gpu")
+        raise AssertionError("unknown policy accepted")
+    except ValueError:
+        pass
+
+
+async def main():
+    tests = [
+        test_thread_policy_keeps_loop_responsive,
+        test_full_pool_rejects,
+        test_process_policy,
+        test_parse_policies,
+    ]
+    failed = 0
+    try:
+        for test in tests:
+            try:
+                await test()
+                print(f"✅ {test.__name__}")
+            except AssertionError as e:
+                failed += 1
+                print(f"❌ {test.__name__}: {e}")
+    finally:
+        executor.shutdown()
+
+    print(f"📊 {len(tests) - failed}/{len(tests)} tests passed")
+    return failed == 0
+
+
+if __name__ == "__main__":
+    sys.exit(0 if asyncio.run(main()) else 1)
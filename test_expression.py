@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Tests for compiled arithmetic expressions and the evaluate tool.
+
+Runs main.py's app in-process behind the proxy - no server needed.
+"""
+
+import asyncio
+import json
+import math
+import sys
+
+import main as server
+from expression import Plan, PlanCache
+from test_array_store import tool_call
+from test_progress import result_text, run_with_proxy
+
+
+async def test_only_arithmetic_compiles():
+    plan = Plan("sqrt(a**2 + b**2) - abs(min(a, b)) // 2 % 3 + pi")
+    assert plan.variables == ["a", "b"], plan.variables
+    assert math.isclose(plan.evaluate({"a": 3, "b": 4}), 5 - 3 // 2 % 3 + math.pi)
+
+    rejected = [
+        "__import__('os').system('true')",
+        "a.__class__",
+        "[a][0]",
+        "a if a else b",
+        "a < b",
+        "'text'",
+        "open(a)",
+        "max(*a)",
+        "sqrt",
+        "lambda: 1",
+        "-" * 1500 + "a",
+        "(" * 300 + "a" + ")" * 300,
+        "a +",
+    ]
+    for text in rejected:
+        try:
+            Plan(text)
+            raise AssertionError(f"{text[:40]!r} compiled")
+        except ValueError:
+            pass
+
+    # Literals, variables and function results are floats, so huge powers
+    # overflow instead of running on
+    for text, binding in [
+        ("9**9**9", {}),
+        ("floor(9)**floor(9)**floor(9)", {}),
+        ("ceil(a)**ceil(a)**ceil(a)", {"a": 9}),
+        ("1 / a", {"a": 0}),
+        ("log(a)", {"a": -1}),
+        ("a", {}),
+    ]:
+        try:
+            Plan(text).evaluate(binding)
+            raise AssertionError(f"{text!r} evaluated with {binding}")
+        except ValueError:
+            pass
+
+
+async def test_plan_cache_is_lru():
+    cache = PlanCache(max_entries=2)
+    first = cache.get("a + 1")
+    assert cache.get("a + 1") is first
+    cache.get("a + 2")
+    cache.get("a + 1")
+    cache.get("a + 3")  # evicts "a + 2", the least recently used
+    assert cache.get("a + 1") is first
+    assert len(cache) == 2
+    assert cache.stats == {"hits": 3, "misses": 3, "evictions": 1}, cache.stats
+
+    try:
+        cache.get("a +")
+        raise AssertionError("invalid expression compiled")
+    except ValueError:
+        pass
+    assert len(cache) == 2 and cache.stats["misses"] == 4, cache.stats
+
+    uncached = PlanCache(max_entries=0)
+    assert uncached.get("a") is not uncached.get("a")
+
+
+async def test_evaluate_tool():
+    server.expression_plans = server.metrics.expression_plans = PlanCache()
+    # Ten add/multiply steps as one expression
+    formula = "((((x + 1) * 2 + 3) * 4 + 5) * 6 + 7) * 8 + y"
+
+    def steps(x, y):
+        return ((((x + 1) * 2 + 3) * 4 + 5) * 6 + 7) * 8 + y
+
+    async def test(proxy):
+        reply = await proxy.handle_request(
+            tool_call(2, "evaluate", expression=formula, variables={"x": 1.5, "y": -2})
+        )
+        assert float(result_text(reply)) == steps(1.5, -2), reply
+
+        bindings = [{"x": x, "y": x / 2} for x in range(100)]
+        reply = await proxy.handle_request(
+            tool_call(3, "evaluate", expression=formula, variables=bindings)
+        )
+        assert json.loads(result_text(reply)) == [steps(x, x / 2) for x in range(100)], reply
+
+        reply = await proxy.handle_request(tool_call(4, "evaluate", expression="2 ** 10"))
+        assert float(result_text(reply)) == 1024.0, reply
+
+        failures = [
+            tool_call(5, "evaluate", expression="__import__('os')"),
+            tool_call(6, "evaluate", expression=formula, variables={"x": 1}),
+            tool_call(7, "evaluate", expression="1 / x", variables=[{"x": 1}, {"x": 0}]),
+            tool_call(8, "evaluate", expression="x * x", variables=[{"x": 1}, {"x": 1e200}]),
+        ]
+        for request in failures:
+            reply = await proxy.handle_request(request)
+            assert reply["result"]["isError"], reply
+
+    await run_with_proxy(test)
+    # The formula compiled once for three calls
+    assert server.expression_plans.stats["hits"] == 2, server.expression_plans.stats
+    assert 'mcp_expression_plans_total{outcome="hits"} 2' in server.metrics.render()
+
+
+async def main():
+    tests = [
+        test_only_arithmetic_compiles,
+        test_plan_cache_is_lru,
+        test_evaluate_tool,
+    ]
+    failed = 0
+    for test in tests:
+        try:
+            await test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+
+    print(f"📊 {len(tests) - failed}/{len(tests)} tests passed")
+    return failed == 0
+
+
+if __name__ == "__main__":
+    sys.exit(0 if asyncio.run(main()) else 1)
@@ -39,8 +39,18 @@ class HostBindingTest:
                 preexec_fn=os.setsid if hasattr(os, "setsid") else None,
             )
 
-            # Wait for server to start
-            await asyncio.sleep(3)
+            # Wait for server to start: poll until it answers or the process exits
+            deadline = time.monotonic() + 15
+            while time.monotonic() < deadline and self.server_process.poll() is None:
+                try:
+                    async with httpx.AsyncClient(timeout=1.0) as client:
+                        response = await client.get("http://127.0.0.1:8000/readyz")
+                    if response.status_code == 200:
+                        break
+                except httpx.HTTPError:
+                    pass
+                # Not ready yet: refused, 503 during startup, or no /readyz
+                await asyncio.sleep(0.1)
 
             # Check if process is still running
             if self.server_process.poll() is not None:
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Tests for the health and readiness probes and graceful drain.
+
+Runs main.py's app in-process, plus one real server on port 8123 that is
+sent SIGTERM with a session stream open.
+"""
+
+import asyncio
+import os
+import signal
+import subprocess
+import sys
+import time
+
+import httpx
+
+from main import create_app, lifecycle, metrics, mcp
+from test_server import asgi_lifespan
+
+INITIALIZE = {
+    "jsonrpc": "2.0",
+    "id": 1,
+    "method": "initialize",
+    "params": {
+        "protocolVersion": "2025-06-18",
+        "capabilities": {},
+        "clientInfo": {"name": "lifecycle-test", "version": "1.0.0"},
+    },
+}
+HEADERS = {
+    "Content-Type": "application/json",
+    "Accept": "application/json, text/event-stream",
+    "MCP-Protocol-Version": "2025-06-18",
+}
+
+
+async def probe(client) -> tuple[int, int]:
+    health = await client.get("/healthz")
+    ready = await client.get("/readyz")
+    return health.status_code, ready.status_code
+
+
+async def test_readiness_follows_lifespan():
+    app = create_app()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        before = await probe(client)
+        async with asgi_lifespan(app):
+            during = await probe(client)
+            lifecycle.draining = True
+            draining = await probe(client)
+            lifecycle.draining = False
+        after = await probe(client)
+
+    assert before == (200, 503), f"before startup: {before}"
+    assert during == (200, 200), f"while running: {during}"
+    assert draining == (200, 503), f"while draining: {draining}"
+    assert after == (200, 503), f"after shutdown: {after}"
+
+
+async def test_drain_closes_sessions_and_turns_away_new_ones():
+    app = create_app()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        async with asgi_lifespan(app):
+            response = await client.post("/mcp/", json=INITIALIZE, headers=HEADERS)
+            session_id = response.headers["mcp-session-id"]
+
+            stats = await lifecycle.drain(mcp._session_manager, lambda: metrics.in_flight)
+            ready = await client.get("/readyz")
+            old = await client.post(
+                "/mcp/",
+                json={"jsonrpc": "2.0", "id": 2, "method": "tools/list"},
+                headers={**HEADERS, "Mcp-Session-Id": session_id},
+            )
+            new = await client.post("/mcp/", json=INITIALIZE, headers=HEADERS)
+            lifecycle.draining = False
+
+    assert stats["sessions_closed"] == 1 and stats["abandoned"] == 0, stats
+    assert ready.status_code == 503
+    assert old.status_code == 404, f"closed session answered {old.status_code}"
+    assert new.status_code == 503 and new.headers["retry-after"] == "1"
+    assert mcp._session_manager.stats["rejected_draining"] == 1
+
+
+async def test_drain_waits_for_in_flight_requests():
+    class Manager:
+        draining = False
+        open_requests = 0
+        stats = {"rejected_draining": 0}
+
+        async def close_all(self):
+            return 0
+
+    in_flight = [2]
+
+    async def finish():
+        await asyncio.sleep(0.1)
+        in_flight[0] = 0
+
+    finisher = asyncio.ensure_future(finish())
+    lifecycle.drain_timeout = 5
+    stats = await lifecycle.drain(Manager(), lambda: in_flight[0])
+    await finisher
+    lifecycle.drain_timeout = 0.1
+    in_flight[0] = 1
+    timed_out = await lifecycle.drain(Manager(), lambda: in_flight[0])
+    lifecycle.draining = False
+
+    assert stats["in_flight"] == 2 and stats["abandoned"] == 0, stats
+    assert 0.1 <= stats["seconds"] < 1, stats
+    assert timed_out["abandoned"] == 1, timed_out
+
+
+async def test_sigterm_ends_streams_cleanly():
+    port = 8123
+    url = f"http://127.0.0.1:{port}"
+    server = subprocess.Popen(
+        [sys.executable, "main.py"],
+        env={**os.environ, "HOST": "0.0.0.0", "PORT": str(port), "DRAIN_TIMEOUT": "5"},
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+    )
+    try:
+        async with httpx.AsyncClient(timeout=5.0) as client:
+            deadline = time.monotonic() + 15
+            while time.monotonic() < deadline:
+                try:
+                    if (await client.get(f"{url}/readyz")).status_code == 200:
+                        break
+                except httpx.HTTPError:
+                    pass
+                await asyncio.sleep(0.1)
+
+            response = await client.post(f"{url}/mcp/", json=INITIALIZE, headers=HEADERS)
+            session = {**HEADERS, "Mcp-Session-Id": response.headers["mcp-session-id"]}
+            await client.post(
+                f"{url}/mcp/",
+                json={"jsonrpc": "2.0", "method": "notifications/initialized"},
+                headers=session,
+            )
+
+            async def listen():
+                headers = {**session, "Accept": "text/event-stream"}
+                async with client.stream("GET", f"{url}/mcp/", headers=headers) as stream:
+                    async for _ in stream.aiter_bytes():
+                        pass
+                    return stream.status_code
+
+            listener = asyncio.ensure_future(listen())
+            await asyncio.sleep(0.3)
+            start = time.monotonic()
+            server.send_signal(signal.SIGTERM)
+            status = await asyncio.wait_for(listener, 5)
+            ended_after = time.monotonic() - start
+
+        output, _ = server.communicate(timeout=10)
+    finally:
+        if server.poll() is None:
+            server.kill()
+            server.wait()
+
+    assert status == 200, f"stream answered {status}"
+    assert ended_after < 2, f"stream took {ended_after:.1f}s to end"
+    assert "Drained in" in output and "1 sessions closed" in output, output[-2000:]
+    assert "timeout graceful shutdown exceeded" not in output, output[-2000:]
+
+
+async def main():
+    tests = [
+        test_readiness_follows_lifespan,
+        test_drain_closes_sessions_and_turns_away_new_ones,
+        test_drain_waits_for_in_flight_requests,
+        test_sigterm_ends_streams_cleanly,
+    ]
+    failed = 0
+    for test in tests:
+        try:
+            await test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+
+    print(f"📊 {len(tests) - failed}/{len(tests)} tests passed")
+    return failed == 0
+
+
+if __name__ == "__main__":
+    sys.exit(0 if asyncio.run(main()) else 1)
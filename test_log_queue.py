@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Tests for the queued JSON log writer and structured access records.
+
+Offline - no server needed.
+"""
+
+import asyncio
+import io
+import json
+import logging
+import sys
+import threading
+import time
+
+from log_queue import AccessLogMiddleware, LogQueue
+
+
+class StalledSink(io.StringIO):
+    """A log pipe that blocks every write until released"""
+
+    def __init__(self):
+        super().__init__()
+        self.released = threading.Event()
+
+    def write(self, text):
+        self.released.wait()
+        return super().write(text)
+
+
+def make_logger(log_queue: LogQueue, name: str) -> logging.Logger:
+    logger = logging.getLogger(name)
+    logger.handlers = [log_queue.handler]
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    return logger
+
+
+async def test_stalled_sink_drops_instead_of_blocking():
+    sink = StalledSink()
+    log_queue = LogQueue(stream=sink, max_records=100, batch_size=10)
+    log_queue.start()
+    logger = make_logger(log_queue, "test.stalled")
+
+    start = time.perf_counter()
+    for i in range(1000):
+        logger.info("record %d", i, extra={"fields": {"i": i}})
+    elapsed = time.perf_counter() - start
+
+    sink.released.set()
+    assert log_queue.flush(timeout=5), "queue never drained"
+    lines = [json.loads(line) for line in sink.getvalue().splitlines()]
+
+    assert elapsed < 0.5, f"logging 1000 records took {elapsed:.2f}s"
+    assert log_queue.stats["written"] + log_queue.stats["dropped"] == 1000, log_queue.stats
+    assert log_queue.stats["dropped"] >= 1000 - 100 - 10, log_queue.stats
+    assert lines[0]["msg"] == "record 0" and lines[0]["i"] == 0, lines[0]
+    # Drops are reported as they happen, so they may span several warnings
+    reported = sum(line["dropped"] for line in lines if line["level"] == "WARNING")
+    assert reported == log_queue.stats["dropped"], (reported, log_queue.stats)
+
+
+async def test_drops_from_many_threads_are_all_counted():
+    sink = StalledSink()
+    log_queue = LogQueue(stream=sink, max_records=10, batch_size=10)
+    log_queue.start()
+    logger = make_logger(log_queue, "test.threads")
+
+    def log_many():
+        for i in range(2000):
+            logger.info("record %d", i)
+
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)  # Interleave the threads' increments as much as possible
+    try:
+        threads = [threading.Thread(target=log_many) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(switch_interval)
+
+    sink.released.set()
+    assert log_queue.flush(timeout=5), "queue never drained"
+    assert log_queue.stats["written"] + log_queue.stats["dropped"] == 16000, log_queue.stats
+
+
+async def test_exceptions_are_rendered_by_the_caller():
+    sink = io.StringIO()
+    log_queue = LogQueue(stream=sink)
+    log_queue.start()
+    logger = make_logger(log_queue, "test.exc")
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        logger.exception("failed with %s", "args")
+    log_queue.flush()
+
+    entry = json.loads(sink.getvalue())
+    assert entry["msg"] == "failed with args" and entry["level"] == "ERROR", entry
+    assert "ValueError: boom" in entry["exc"], entry
+
+
+async def test_access_records_are_sampled_but_errors_kept():
+    sink = io.StringIO()
+    log_queue = LogQueue(stream=sink, access_sample_rate=0.0)
+    log_queue.start()
+    make_logger(log_queue, "access")
+
+    async def app(scope, receive, send):
+        scope["mcp.method"] = "tools/call:add"
+        await send({"type": "http.response.start", "status": scope["status"]})
+
+    async def send(message):
+        pass
+
+    middleware = AccessLogMiddleware(app, log_queue)
+    headers = [(b"mcp-session-id", b"abc")]
+    for status in (200, 200, 500):
+        scope = {"type": "http", "method": "POST", "path": "/mcp/", "headers": headers, "status": status}
+        await middleware(scope, None, send)
+    log_queue.flush()
+
+    lines = [json.loads(line) for line in sink.getvalue().splitlines()]
+    assert log_queue.stats["sampled_out"] == 2, log_queue.stats
+    assert len(lines) == 1, lines
+    entry = lines[0]
+    assert entry["level"] == "WARNING" and entry["status"] == 500, entry
+    assert (entry["rpc"], entry["tool"], entry["session"]) == ("tools/call", "add", "abc"), entry
+    assert entry["duration_ms"] >= 0
+
+
+async def main():
+    tests = [
+        test_stalled_sink_drops_instead_of_blocking,
+        test_drops_from_many_threads_are_all_counted,
+        test_exceptions_are_rendered_by_the_caller,
+        test_access_records_are_sampled_but_errors_kept,
+    ]
+    failed = 0
+    for test in tests:
+        try:
+            await test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+
+    print(f"📊 {len(tests) - failed}/{len(tests)} tests passed")
+    return failed == 0
+
+
+if __name__ == "__main__":
+    sys.exit(0 if asyncio.run(main()) else 1)
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Tests for the Prometheus metrics primitives and request labelling.
+
+Runs offline - no server needed.
+"""
+
+import json
+import sys
+
+from metrics import FULL_PARSE_LIMIT, Histogram, MetricsMiddleware, ServerMetrics
+
+
+def test_histogram_is_cumulative():
+    histogram = Histogram("latency_seconds", "Latency", "method", buckets=(0.1, 1.0))
+    histogram.observe("ping", 0.05)
+    histogram.observe("ping", 0.5)
+    histogram.observe("ping", 5.0)
+
+    lines = histogram.render()
+    assert 'latency_seconds_bucket{method="ping",le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{method="ping",le="1.0"} 2' in lines
+    assert 'latency_seconds_bucket{method="ping",le="+Inf"} 3' in lines
+    assert 'latency_seconds_count{method="ping"} 3' in lines
+
+
+def test_request_labels_are_bounded():
+    metrics = ServerMetrics()
+    metrics.tool_names = {"add"}
+    middleware = MetricsMiddleware(app=None, metrics=metrics)
+
+    def label(message):
+        return middleware._parse(json.dumps(message).encode())[0]
+
+    assert label({"method": "tools/list"}) == "tools/list"
+    assert label({"method": "tools/call", "params": {"name": "add"}}) == "tools/call:add"
+    assert label({"method": "tools/call", "params": {"name": "x" * 50}}) == "tools/call:unknown"
+    assert label({"method": "made/up"}) == "other"
+    assert middleware._parse(b"not json") == ("invalid", None)
+    assert middleware._parse(b'{"id": 7, "method": "made/up"}') == ("other", 7)
+
+
+def test_large_bodies_are_scanned_not_parsed():
+    metrics = ServerMetrics()
+    metrics.tool_names = {"add_batch"}
+    middleware = MetricsMiddleware(app=None, metrics=metrics)
+    values = list(range(200_000))
+    arguments = {"a": values, "b": values}
+
+    # The SDK client's member order, and Claude Desktop's with the ID last
+    params = {"name": "add_batch", "arguments": arguments}
+    leading = {"jsonrpc": "2.0", "id": 11, "method": "tools/call", "params": params}
+    trailing = {"method": "tools/call", "params": params, "jsonrpc": "2.0", "id": "req-\\"}
+    for message in (leading, trailing):
+        body = json.dumps(message).encode()
+        assert len(body) > FULL_PARSE_LIMIT
+        assert middleware._parse(body) == ("tools/call:add_batch", message["id"])
+
+    # IDs inside the arguments aren't taken for the request's
+    nested = {
+        "method": "tools/call",
+        "params": {"name": "add_batch", "arguments": {"a": values, "b": {"id": 3}}},
+    }
+    assert middleware._parse(json.dumps(nested).encode()) == ("tools/call:add_batch", None)
+    assert middleware._parse(b"[" + b"1," * FULL_PARSE_LIMIT + b"1]") == ("other", None)
+
+
+def main():
+    tests = [
+        test_histogram_is_cumulative,
+        test_request_labels_are_bounded,
+        test_large_bodies_are_scanned_not_parsed,
+    ]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+
+    print(f"📊 {len(tests) - failed}/{len(tests)} tests passed")
+    return failed == 0
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Tests for sampled request profiling and the /debug/profiles endpoints.
+
+Runs main.py's app in-process - no server needed.
+"""
+
+import asyncio
+import marshal
+import os
+import pstats
+import sys
+import tempfile
+
+import httpx
+
+from main import create_app, profiles
+from profiling import Profiles, ProfilingMiddleware
+from test_lifecycle import HEADERS, INITIALIZE
+from test_server import asgi_lifespan
+
+
+def call(tool: str, a: float, b: float) -> dict:
+    return {
+        "jsonrpc": "2.0",
+        "id": 2,
+        "method": "tools/call",
+        "params": {"name": tool, "arguments": {"a": a, "b": b}},
+    }
+
+
+async def test_header_marked_requests_are_profiled():
+    directory = tempfile.mkdtemp()
+    profiles.directory = directory
+    profiles.on_header = True
+    app = create_app()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        async with asgi_lifespan(app):
+            response = await client.post("/mcp/", json=INITIALIZE, headers=HEADERS)
+            session = {**HEADERS, "Mcp-Session-Id": response.headers["mcp-session-id"]}
+            await client.post(
+                "/mcp/",
+                json={"jsonrpc": "2.0", "method": "notifications/initialized"},
+                headers=session,
+            )
+            await client.post("/mcp/", json=call("add", 1, 2), headers=session)
+            for _ in range(2):
+                marked = {**session, "X-MCP-Profile": "1"}
+                response = await client.post("/mcp/", json=call("add", 1, 2), headers=marked)
+                assert response.status_code == 200, response.status_code
+
+            index = await client.get("/debug/profiles")
+            report = await client.get("/debug/profiles/tools/call:add?sort=tottime&limit=200")
+            raw = await client.get("/debug/profiles/tools/call:add?format=raw")
+            missing = await client.get("/debug/profiles/tools/list")
+            bad_sort = await client.get("/debug/profiles/tools/call:add?sort=nope")
+
+    assert profiles.samples == {"tools/call:add": 2}, profiles.samples
+    assert "tools/call:add\t2 samples" in index.text, index.text
+    # The tool body and argument validation show up in the aggregate
+    assert "main.py" in report.text and "(add)" in report.text, report.text[:2000]
+    assert "validate" in report.text, report.text[:2000]
+    profiles.flush()
+    with open(profiles.path_for("tools/call:add"), "rb") as f:
+        written = marshal.load(f)
+    assert raw.status_code == 200 and marshal.loads(raw.content) == written
+    assert pstats.Stats(profiles.path_for("tools/call:add")).stats == written
+    assert os.listdir(directory) == [os.path.basename(profiles.path_for("tools/call:add"))]
+    assert missing.status_code == 404 and bad_sort.status_code == 400
+
+
+async def test_sampling_and_one_profile_at_a_time():
+    async def app(scope, receive, send):
+        await asyncio.sleep(0.05)
+
+    sampled = Profiles(directory=tempfile.mkdtemp(), sample_rate=1.0)
+    middleware = ProfilingMiddleware(app, sampled)
+    scope = {"type": "http", "method": "POST", "path": "/mcp/", "headers": [], "mcp.method": "ping"}
+    await asyncio.gather(*(middleware(scope, None, None) for _ in range(3)))
+    await middleware({**scope, "method": "GET"}, None, None)
+
+    assert sampled.stats == {"profiled": 1, "skipped_busy": 2}, sampled.stats
+    assert sampled.samples == {"ping": 1}
+    assert not Profiles().enabled and not Profiles(sample_rate=0.0).wants(scope)
+
+
+async def main():
+    tests = [test_header_marked_requests_are_profiled, test_sampling_and_one_profile_at_a_time]
+    failed = 0
+    for test in tests:
+        try:
+            await test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+
+    print(f"📊 {len(tests) - failed}/{len(tests)} tests passed")
+    return failed == 0
+
+
+if __name__ == "__main__":
+    sys.exit(0 if asyncio.run(main()) else 1)
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Tests for progress-reporting tools and how the proxy handles their progress.
+
+Runs main.py's app in-process behind the proxy - no server needed.
+"""
+
+import asyncio
+import math
+import sys
+
+import httpx
+
+import main as server
+from claude_mcp_proxy import PROGRESS_TOOLS, MCPProxy, progress_tools
+from test_lifecycle import INITIALIZE
+from test_server import asgi_lifespan
+
+
+def reduce_call(request_id, values, operation="sum", token=None) -> dict:
+    params = {"name": "reduce_values", "arguments": {"values": values, "operation": operation}}
+    if token is not None:
+        params["_meta"] = {"progressToken": token}
+    return {"jsonrpc": "2.0", "id": request_id, "method": "tools/call", "params": params}
+
+
+def result_text(reply: dict) -> str:
+    return reply["result"]["content"][0]["text"]
+
+
+async def run_with_proxy(test, **proxy_options):
+    """Run ``test(proxy)`` against an initialized session on main.py's app"""
+    app = server.create_app()
+    proxy = MCPProxy("http://test", **proxy_options)
+    proxy.client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app))
+    async with asgi_lifespan(app):
+        await proxy.handle_request(INITIALIZE)
+        await proxy.handle_request({"jsonrpc": "2.0", "method": "notifications/initialized"})
+        try:
+            await test(proxy)
+        finally:
+            await proxy.client.aclose()
+
+
+async def test_proxy_keeps_its_own_progress_to_itself():
+    server.REDUCE_CHUNK_SIZE = 10
+    relayed = []
+
+    async def test(proxy):
+        reply = await proxy.handle_request(reduce_call(2, list(range(35))), relayed.append)
+        assert float(result_text(reply)) == sum(range(35)), reply
+        assert proxy.transport_stats["progress_keepalives"] == 4, proxy.transport_stats
+
+        # A client's own token is left alone and its progress relayed
+        request = reduce_call(3, [1, 2, 3], token="client")
+        reply = await proxy.handle_request(request, relayed.append)
+        assert float(result_text(reply)) == 6.0, reply
+
+    await run_with_proxy(test)
+    assert [m["params"]["progressToken"] for m in relayed] == ["client"], relayed
+    assert relayed[0]["params"]["message"] == "sum so far: 6.0", relayed
+
+
+async def test_proxy_progress_can_be_turned_off():
+    server.REDUCE_CHUNK_SIZE = 10
+
+    async def test(proxy):
+        request = reduce_call(2, list(range(35)))
+        assert proxy._with_progress_token(request) == (request, None)
+        await proxy.handle_request(request)
+        assert proxy.transport_stats["progress_keepalives"] == 0
+
+    await run_with_proxy(test, request_progress=())
+
+    # By default only tools that report progress get a token, so other calls
+    # keep their plain JSON replies and can still be coalesced
+    proxy = MCPProxy("http://test")
+    add = {
+        "jsonrpc": "2.0",
+        "id": 4,
+        "method": "tools/call",
+        "params": {"name": "add", "arguments": {"a": 1, "b": 2}},
+    }
+    assert proxy._with_progress_token(add) == (add, None)
+    assert proxy._with_progress_token({**add, "params": {"name": "array_sum"}})[1] is not None
+    await proxy.client.aclose()
+
+
+async def test_progress_tools_setting():
+    assert progress_tools("0") == ()
+    assert progress_tools("1") == PROGRESS_TOOLS
+    assert progress_tools("reduce_values, evaluate") == ("reduce_values", "evaluate")
+    assert progress_tools(" array_*,,reduce_values ,") == ("array_*", "reduce_values")
+    assert progress_tools("") == ()
+
+    # Patterns parsed from the setting decide which calls get a token
+    proxy = MCPProxy("http://test", request_progress=progress_tools("array_s*, evaluate"))
+    try:
+        for name, expected in [("array_sum", True), ("array_dot", False), ("evaluate", True)]:
+            request = {"jsonrpc": "2.0", "id": 2, "method": "tools/call", "params": {"name": name}}
+            assert (proxy._with_progress_token(request)[1] is not None) == expected, name
+    finally:
+        await proxy.client.aclose()
+
+
+async def test_reductions():
+    server.REDUCE_CHUNK_SIZE = 4
+    values = [3.0, -1.5, 2.0, 8.0, 0.5, -4.0, 7.0, 1.0, 2.5]
+    expected = {
+        "sum": math.fsum(values),
+        "mean": math.fsum(values) / len(values),
+        "product": math.prod(values),
+        "min": min(values),
+        "max": max(values),
+    }
+
+    async def test(proxy):
+        for request_id, (operation, value) in enumerate(expected.items(), start=2):
+            reply = await proxy.handle_request(reduce_call(request_id, values, operation))
+            assert math.isclose(float(result_text(reply)), value), (operation, reply)
+
+        invalid = [([], "sum"), ([1.0], "median")]
+        for request_id, (bad_values, operation) in enumerate(invalid, start=10):
+            reply = await proxy.handle_request(reduce_call(request_id, bad_values, operation))
+            assert reply["result"]["isError"], reply
+
+    await run_with_proxy(test)
+
+
+async def main():
+    tests = [
+        test_proxy_keeps_its_own_progress_to_itself,
+        test_proxy_progress_can_be_turned_off,
+        test_progress_tools_setting,
+        test_reductions,
+    ]
+    failed = 0
+    for test in tests:
+        try:
+            await test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+
+    print(f"📊 {len(tests) - failed}/{len(tests)} tests passed")
+    return failed == 0
+
+
+if __name__ == "__main__":
+    sys.exit(0 if asyncio.run(main()) else 1)
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Tests for the proxy's result cache and caching policy.
+
+Runs offline - no server needed.
+"""
+
+import sys
+import time
+
+from claude_mcp_proxy import MCPProxy, ResultCache
+
+
+def test_lru_eviction():
+    cache = ResultCache(max_entries=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.stats["evictions"] == 1
+
+
+def test_ttl_expiry():
+    cache = ResultCache(ttl=0.01)
+    cache.put("a", 1)
+    cache.put("b", 2, ttl=None)
+    time.sleep(0.02)
+    assert cache.get("a") is None
+    assert cache.get("b") == 2
+
+
+def test_byte_cap():
+    cache = ResultCache(max_bytes=1600)
+    cache.put(("tools/call", "a"), "x" * 90)
+    assert cache.get(("tools/call", "a")) == "x" * 90
+    # Over an eighth of the budget on its own, so never stored
+    cache.put(("tools/call", "big"), "x" * 200)
+    assert cache.get(("tools/call", "big")) is None
+    assert cache.stats["too_large"] == 1
+
+    for i in range(16):
+        cache.put(("tools/call", str(i)), "x" * 90)
+    assert cache.size <= 1600, cache.size
+    assert cache.get(("tools/call", "a")) is None
+    assert cache.stats["evictions"] >= 1
+
+    cache.clear()
+    assert cache.size == 0
+
+
+def test_policy_follows_annotations():
+    proxy = MCPProxy("http://localhost:8000")
+    tools_list = {"jsonrpc": "2.0", "id": 1, "method": "tools/list"}
+    call = {
+        "jsonrpc": "2.0",
+        "id": 2,
+        "method": "tools/call",
+        "params": {"name": "add", "arguments": {"b": 2, "a": 1}},
+    }
+    assert proxy._cache_policy(call) is None
+
+    reply = {
+        "jsonrpc": "2.0",
+        "id": 1,
+        "result": {
+            "tools": [
+                {"name": "add", "annotations": {"idempotentHint": True}},
+                {"name": "launch", "annotations": None},
+            ]
+        },
+    }
+    proxy._store_reply(tools_list, reply, proxy._cache_policy(tools_list))
+    assert proxy._cache_policy(call) is not None
+    # A per-request progress token doesn't change the key
+    with_token = {**call, "id": 3, "params": {**call["params"], "_meta": {"progressToken": 7}}}
+    assert proxy._cache_policy(with_token) == proxy._cache_policy(call)
+    assert proxy.cache.get(proxy._cache_policy(tools_list)[0]) == reply["result"]
+
+    # A new session drops everything learned from the old one
+    proxy._set_session("other-session")
+    assert proxy._cache_policy(call) is None
+    assert len(proxy.cache) == 0
+
+
+def main():
+    tests = [test_lru_eviction, test_ttl_expiry, test_byte_cap, test_policy_follows_annotations]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+
+    print(f"📊 {len(tests) - failed}/{len(tests)} tests passed")
+    return failed == 0
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Tests for the proxy's stdin loop: pipelining, the in-flight bound and
+oversized messages.
+
+Runs offline against a mock upstream - no server needed.
+"""
+
+import asyncio
+import json
+import os
+import sys
+import threading
+
+import httpx
+
+import claude_mcp_proxy
+from claude_mcp_proxy import MCPProxy
+
+
+def call(request_id: int) -> dict:
+    params = {"name": "reduce_values", "arguments": {"values": [request_id]}}
+    return {"jsonrpc": "2.0", "id": request_id, "method": "tools/call", "params": params}
+
+
+def reply_to(body: dict) -> httpx.Response:
+    result = {"content": [{"type": "text", "text": str(body["id"])}], "isError": False}
+    return httpx.Response(200, json={"jsonrpc": "2.0", "id": body["id"], "result": result})
+
+
+def proxy_with(handler, **options) -> tuple[MCPProxy, list]:
+    written = []
+    proxy = MCPProxy("http://test", request_progress=(), **options)
+    proxy.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    proxy._write_response = written.append
+    return proxy, written
+
+
+async def test_requests_are_pipelined_up_to_the_bound():
+    running = 0
+    most_running = 0
+
+    async def handler(request):
+        nonlocal running, most_running
+        body = json.loads(request.content)
+        running += 1
+        most_running = max(most_running, running)
+        # The first call is the slowest, so later ones overtake it
+        await asyncio.sleep(0.1 if body["id"] == 1 else 0.01)
+        running -= 1
+        return reply_to(body)
+
+    async def read_lines():
+        for request_id in range(1, 7):
+            yield json.dumps(call(request_id)) + "\n"
+
+    proxy, written = proxy_with(handler, max_in_flight=2)
+    proxy._read_lines = read_lines
+    await asyncio.wait_for(proxy.run(), timeout=5)
+
+    assert most_running == 2, most_running
+    ids = [reply["id"] for reply in written]
+    assert sorted(ids) == [1, 2, 3, 4, 5, 6], ids
+    assert ids[0] != 1 and ids[-1] == 1, ids
+
+
+async def test_oversized_line_gets_a_parse_error():
+    def handler(request):
+        return reply_to(json.loads(request.content))
+
+    limit = claude_mcp_proxy.STDIN_LINE_LIMIT
+    stdin = sys.stdin
+    read_fd, write_fd = os.pipe()
+    # Far over the pipe's buffer, so the line arrives in pieces and the
+    # newline isn't in sight when the limit is hit
+    data = b'{"padding": "' + b"x" * 200_000 + b'"}\n' + json.dumps(call(2)).encode() + b"\n"
+
+    def feed():
+        with os.fdopen(write_fd, "wb") as pipe:
+            pipe.write(data)
+
+    writer = threading.Thread(target=feed)
+    writer.start()
+    claude_mcp_proxy.STDIN_LINE_LIMIT = 256
+    sys.stdin = os.fdopen(read_fd)
+    try:
+        proxy, written = proxy_with(handler)
+        await asyncio.wait_for(proxy.run(), timeout=5)
+    finally:
+        sys.stdin.close()
+        sys.stdin = stdin
+        claude_mcp_proxy.STDIN_LINE_LIMIT = limit
+        writer.join()
+
+    assert written[0]["id"] is None and written[0]["error"]["code"] == -32700, written
+    assert written[1]["id"] == 2 and "result" in written[1], written
+    assert len(written) == 2, written
+
+
+async def main():
+    tests = [test_requests_are_pipelined_up_to_the_bound, test_oversized_line_gets_a_parse_error]
+    failed = 0
+    for test in tests:
+        try:
+            await test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+
+    print(f"📊 {len(tests) - failed}/{len(tests)} tests passed")
+    return failed == 0
+
+
+if __name__ == "__main__":
+    sys.exit(0 if asyncio.run(main()) else 1)
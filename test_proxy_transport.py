@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Tests for the proxy's upstream connection pool, prewarming and reuse counters.
+
+Runs offline against a mock upstream - no server needed.
+"""
+
+import asyncio
+import json
+import sys
+
+import httpx
+
+from claude_mcp_proxy import MCPProxy
+
+
+def pretend_pool(connections: int):
+    """Mock upstream that reports opening a TLS connection for the first
+    ``connections`` requests, through httpcore's trace hook, and reuses
+    them afterwards"""
+    seen = []
+
+    async def handler(request):
+        seen.append(request.method)
+        if len(seen) <= connections:
+            trace = request.extensions["trace"]
+            await trace("connection.connect_tcp.complete", {})
+            await trace("connection.start_tls.complete", {})
+        if request.method == "HEAD":
+            return httpx.Response(200)
+        body = json.loads(request.content)
+        return httpx.Response(200, json={"jsonrpc": "2.0", "id": body["id"], "result": {}})
+
+    return handler, seen
+
+
+async def test_prewarmed_connection_is_reused():
+    handler, seen = pretend_pool(connections=1)
+    proxy = MCPProxy("https://test", prewarm=1)
+    proxy.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    try:
+        await proxy.prewarm()
+        assert proxy.transport_stats["connections_opened"] == 1, proxy.transport_stats
+        assert proxy.transport_stats["tls_handshakes"] == 1, proxy.transport_stats
+
+        for request_id in range(3):
+            ping = {"jsonrpc": "2.0", "id": request_id, "method": "ping"}
+            reply = await proxy.handle_request(ping)
+            assert reply == {"jsonrpc": "2.0", "id": request_id, "result": {}}, reply
+    finally:
+        await proxy.client.aclose()
+
+    assert seen == ["HEAD", "POST", "POST", "POST"], seen
+    stats = proxy.transport_stats
+    assert stats["requests"] == 3 and stats["reused_connections"] == 3, stats
+    assert stats["connections_opened"] == 1 and stats["tls_handshakes"] == 1, stats
+    assert "requests=3 reused=3 connections_opened=1" in proxy.transport_report()
+
+
+async def test_new_connections_are_counted():
+    handler, _ = pretend_pool(connections=2)
+    proxy = MCPProxy("https://test")
+    proxy.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    try:
+        await proxy.prewarm()  # prewarm=0 opens nothing
+        for request_id in range(3):
+            await proxy.handle_request({"jsonrpc": "2.0", "id": request_id, "method": "ping"})
+    finally:
+        await proxy.client.aclose()
+
+    stats = proxy.transport_stats
+    assert stats["connections_opened"] == 2 and stats["reused_connections"] == 1, stats
+
+
+async def test_pool_limits():
+    proxy = MCPProxy("https://test", max_in_flight=8, keepalive_expiry=5.0)
+    sized = MCPProxy("https://test", max_in_flight=8, pool_size=2)
+    try:
+        pool = proxy.client._transport._pool
+        assert pool._max_connections == 8 and pool._max_keepalive_connections == 8
+        assert pool._keepalive_expiry == 5.0
+        assert sized.client._transport._pool._max_connections == 2
+    finally:
+        await proxy.client.aclose()
+        await sized.client.aclose()
+
+
+async def main():
+    tests = [
+        test_prewarmed_connection_is_reused,
+        test_new_connections_are_counted,
+        test_pool_limits,
+    ]
+    failed = 0
+    for test in tests:
+        try:
+            await test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+
+    print(f"📊 {len(tests) - failed}/{len(tests)} tests passed")
+    return failed == 0
+
+
+if __name__ == "__main__":
+    sys.exit(0 if asyncio.run(main()) else 1)
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Tests for proxy traffic recording and capture loading.
+
+Runs offline - no server needed.
+"""
+
+import os
+import sys
+import tempfile
+
+from claude_mcp_proxy import MCPProxy
+from replay_traffic import Replay, load_capture, operation_name
+
+
+def test_record_round_trip():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "capture.jsonl")
+        proxy = MCPProxy("http://test", record_path=path)
+        call = {
+            "jsonrpc": "2.0",
+            "id": 1,
+            "method": "tools/call",
+            "params": {"name": "add", "arguments": {"a": 1, "b": 2}},
+        }
+        reply = {"jsonrpc": "2.0", "id": 1, "result": {"content": [], "isError": False}}
+        proxy._record(call, reply, started=10.0, duration=0.005, cached=False)
+        proxy._record({"jsonrpc": "2.0", "method": "notifications/initialized"}, None, 10.5, 0.001, False)
+        proxy._record_file.close()
+
+        with open(path, "a") as f:
+            f.write('{"offset": 1.0, "request"')  # torn final line
+
+        entries = load_capture(path)
+
+    assert len(entries) == 2, entries
+    assert entries[0]["offset"] == 0.0
+    assert entries[0]["duration_ms"] == 5.0
+    assert entries[0]["response"] == reply
+    assert entries[1]["offset"] == 0.5
+    assert operation_name(entries[0]["request"]) == "tools/call:add"
+    assert operation_name(entries[1]["request"]) == "notifications/initialized"
+
+
+def test_capture_is_replayed_in_start_order_one_run_at_a_time():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "capture.jsonl")
+        first = MCPProxy("http://test", record_path=path)
+        # A slow call that started first completes, and is written, last
+        first._record({"jsonrpc": "2.0", "id": 1, "method": "ping"}, None, 10.0, 0.001, False)
+        first._record({"jsonrpc": "2.0", "id": 3, "method": "ping"}, None, 12.0, 0.001, False)
+        first._record({"jsonrpc": "2.0", "id": 2, "method": "ping"}, None, 11.0, 5.0, False)
+        first._record_file.close()
+
+        # A restarted proxy appends to the same file with offsets from 0 again
+        second = MCPProxy("http://test", record_path=path)
+        second._record({"jsonrpc": "2.0", "id": 1, "method": "ping"}, None, 50.0, 0.001, False)
+        second._record_file.close()
+
+        try:
+            load_capture(path)
+            raise AssertionError("runs were mixed")
+        except ValueError:
+            pass
+        runs = [load_capture(path, run) for run in (1, 2)]
+
+    assert [entry["request"]["id"] for entry in runs[0]] == [1, 2, 3], runs[0]
+    assert [entry["offset"] for entry in runs[0]] == [0.0, 1.0, 2.0], runs[0]
+    assert [entry["offset"] for entry in runs[1]] == [0.0], runs[1]
+
+    replay = Replay(runs[0], "http://test", speed=1.0)
+    assert replay.report(0.0)["recorded_span_s"] == 2.0
+
+
+def main():
+    tests = [test_record_round_trip, test_capture_is_replayed_in_start_order_one_run_at_a_time]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+
+    print(f"📊 {len(tests) - failed}/{len(tests)} tests passed")
+    return failed == 0
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
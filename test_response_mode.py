@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Tests for per-request JSON/SSE response selection.
+
+Runs the streamable HTTP app in-process - no server needed.
+"""
+
+import asyncio
+import json
+import sys
+
+import httpx
+from mcp.server import streamable_http_manager
+from mcp.server.fastmcp import FastMCP
+
+from response_mode import ResponseModeTransport, wants_stream
+from session_store import BoundedSessionManager
+
+HEADERS = {
+    "Content-Type": "application/json",
+    "MCP-Protocol-Version": "2025-06-18",
+    "Accept": "application/json, text/event-stream",
+}
+
+INITIALIZE = {
+    "jsonrpc": "2.0",
+    "id": 1,
+    "method": "initialize",
+    "params": {
+        "protocolVersion": "2025-06-18",
+        "capabilities": {},
+        "clientInfo": {"name": "response-mode-test", "version": "1.0.0"},
+    },
+}
+
+
+def call(request_id, meta=None):
+    params = {"name": "add", "arguments": {"a": 1, "b": 2}}
+    if meta is not None:
+        params["_meta"] = meta
+    return {"jsonrpc": "2.0", "id": request_id, "method": "tools/call", "params": params}
+
+
+def test_wants_stream():
+    assert wants_stream(json.dumps(call(1, {"progressToken": "p"})).encode())
+    assert not wants_stream(json.dumps(call(1)).encode())
+    assert not wants_stream(json.dumps(call(1, {"progressToken": None})).encode())
+    # A tool argument that happens to contain the key isn't a progress request
+    assert not wants_stream(b'{"params": {"arguments": {"progressToken": 1}}}')
+    assert not wants_stream(b'"progressToken" but not json')
+
+
+async def test_auto_mode():
+    streamable_http_manager.StreamableHTTPServerTransport = ResponseModeTransport
+    server = FastMCP("Response Mode Test")
+    server._session_manager = BoundedSessionManager(app=server._mcp_server, json_response="auto")
+    server.add_tool(lambda a, b: a + b, name="add")
+    app = server.streamable_http_app()
+    transport = httpx.ASGITransport(app=app)
+
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.post("/mcp/", json=INITIALIZE, headers=HEADERS)
+            headers = {**HEADERS, "Mcp-Session-Id": response.headers["mcp-session-id"]}
+            await client.post(
+                "/mcp/", json={"jsonrpc": "2.0", "method": "notifications/initialized"}, headers=headers
+            )
+
+            plain = await client.post("/mcp/", json=call(2), headers=headers)
+            streamed = await client.post("/mcp/", json=call(3, {"progressToken": "p"}), headers=headers)
+
+    assert plain.headers["content-type"] == "application/json", plain.headers
+    assert plain.json()["result"]["content"][0]["text"] == "3", plain.text
+    assert streamed.headers["content-type"].startswith("text/event-stream"), streamed.headers
+    assert '"id":3' in streamed.text, streamed.text
+
+
+async def main():
+    tests = [test_wants_stream, test_auto_mode]
+    failed = 0
+    for test in tests:
+        try:
+            result = test()
+            if asyncio.iscoroutine(result):
+                await result
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+
+    print(f"📊 {len(tests) - failed}/{len(tests)} tests passed")
+    return failed == 0
+
+
+if __name__ == "__main__":
+    sys.exit(0 if asyncio.run(main()) else 1)
@@ -8,9 +8,15 @@ Tests the complete MCP protocol flow:
 3. Send initialized notification
 4. List tools
 5. Call tools
+6. Stream progress from a long-running tool
+
+Usage:
+    python test_server.py               # against localhost:8000, starting main.py if needed
+    python test_server.py --in-process  # drive main.py's ASGI app directly, no port binding
 """
 
 import asyncio
+import contextlib
 import json
 import subprocess
 import sys
@@ -19,13 +25,24 @@ from typing import Optional
 
 import httpx
 
+from claude_mcp_proxy import SSEParser
+
 
 class MCPServerTest:
-    def __init__(self, server_url: str = "http://localhost:8000"):
+    def __init__(
+        self, server_url: str = "http://localhost:8000", verbose: bool = True, app=None
+    ):
+        """Pass an ASGI ``app`` to test it in-process instead of over the network."""
         self.server_url = server_url
         self.mcp_endpoint = f"{server_url}/mcp/"
         self.session_id: Optional[str] = None
-        self.client = httpx.AsyncClient(timeout=30.0)
+        if app is not None:
+            self.client = httpx.AsyncClient(
+                transport=httpx.ASGITransport(app=app), base_url=server_url, timeout=30.0
+            )
+        else:
+            self.client = httpx.AsyncClient(timeout=30.0)
+        self.verbose = verbose
 
     async def __aenter__(self):
         return self
@@ -58,7 +75,8 @@ class MCPServerTest:
             session_header = response.headers.get("Mcp-Session-Id")
             if session_header:
                 self.session_id = session_header
-                print(f"✅ Got session ID: {self.session_id}")
+                if self.verbose:
+                    print(f"✅ Got session ID: {self.session_id}")
 
         response.raise_for_status()
 
@@ -83,11 +101,32 @@ class MCPServerTest:
         else:
             return {}
 
-    async def test_initialize(self) -> bool:
-        """Test the initialize request."""
-        print("🔄 Testing initialize...")
-
-        request = {
+    async def _stream_request(self, data: dict) -> tuple[list[dict], list[float]]:
+        """Send a request and collect every message on its SSE stream.
+
+        Returns the messages in order along with the seconds from sending to
+        each one's arrival.
+        """
+        messages, arrivals = [], []
+        start = time.perf_counter()
+        async with self.client.stream(
+            "POST", self.mcp_endpoint, json=data, headers=self._get_headers()
+        ) as response:
+            response.raise_for_status()
+            if not response.headers.get("content-type", "").startswith("text/event-stream"):
+                await response.aread()
+                return [response.json()], [time.perf_counter() - start]
+
+            parser = SSEParser()
+            async for chunk in response.aiter_bytes():
+                for event in parser.feed(chunk):
+                    messages.append(json.loads(event["data"]))
+                    arrivals.append(time.perf_counter() - start)
+        return messages, arrivals
+
+    def _initialize_request(self) -> dict:
+        """Build the initialize request."""
+        return {
             "jsonrpc": "2.0",
             "id": 1,
             "method": "initialize",
@@ -98,6 +137,25 @@ class MCPServerTest:
             },
         }
 
+    async def start_session(self) -> None:
+        """Initialize a session and send the initialized notification, quietly."""
+        result = await self._send_request(self._initialize_request(), expect_session=True)
+        if "result" not in result:
+            raise RuntimeError(f"Initialize failed: {result}")
+
+        response = await self.client.post(
+            self.mcp_endpoint,
+            json={"jsonrpc": "2.0", "method": "notifications/initialized"},
+            headers=self._get_headers(),
+        )
+        response.raise_for_status()
+
+    async def test_initialize(self) -> bool:
+        """Test the initialize request."""
+        print("🔄 Testing initialize...")
+
+        request = self._initialize_request()
+
         try:
             result = await self._send_request(request, expect_session=True)
 
@@ -219,6 +277,98 @@ class MCPServerTest:
             print(f"❌ Multiply tool error: {e}")
             return False
 
+    async def test_call_batch_tools(self) -> bool:
+        """Test the batch tools with arrays and scalar broadcasting."""
+        print("🔄 Testing add_batch / multiply_batch tools...")
+
+        cases = [
+            ("add_batch", {"a": [1, 2, 3], "b": [10, 20, 30]}, [11, 22, 33]),
+            ("multiply_batch", {"a": [1, 2, 3], "b": 2}, [2, 4, 6]),
+        ]
+
+        try:
+            for request_id, (name, arguments, expected) in enumerate(cases, start=5):
+                request = {
+                    "jsonrpc": "2.0",
+                    "id": request_id,
+                    "method": "tools/call",
+                    "params": {"name": name, "arguments": arguments},
+                }
+                result = await self._send_request(request)
+
+                content = result.get("result", {}).get("content", [])
+                if not content or json.loads(content[0].get("text", "null")) != expected:
+                    print(f"❌ {name} unexpected result: {result}")
+                    return False
+
+            # Overflow is a tool error, not Infinity in the JSON result
+            request = {
+                "jsonrpc": "2.0",
+                "id": 7,
+                "method": "tools/call",
+                "params": {"name": "multiply_batch", "arguments": {"a": [1, 1e200], "b": 1e200}},
+            }
+            result = await self._send_request(request)
+            if not result.get("result", {}).get("isError"):
+                print(f"❌ multiply_batch overflow wasn't an error: {result}")
+                return False
+
+            print("✅ Batch tools returned correct results")
+            return True
+
+        except Exception as e:
+            print(f"❌ Batch tools error: {e}")
+            return False
+
+    async def test_progress_streaming(self) -> bool:
+        """Test that reduce_values streams progress before its result."""
+        print("🔄 Testing progress streaming from reduce_values...")
+
+        values = list(range(250_000))
+        request = {
+            "jsonrpc": "2.0",
+            "id": 7,
+            "method": "tools/call",
+            "params": {
+                "name": "reduce_values",
+                "arguments": {"values": values, "operation": "sum"},
+                "_meta": {"progressToken": "test-progress"},
+            },
+        }
+
+        try:
+            messages, arrivals = await self._stream_request(request)
+            progress = [m for m in messages if m.get("method") == "notifications/progress"]
+            reply = messages[-1]
+
+            content = reply.get("result", {}).get("content", [])
+            if not content or float(content[0].get("text", "nan")) != sum(values):
+                print(f"❌ reduce_values unexpected result: {reply}")
+                return False
+
+            # JSON response mode answers with the result alone
+            if len(messages) == 1 and "result" in reply:
+                print("✅ reduce_values returned the correct result (no SSE stream)")
+                return True
+
+            params = [m["params"] for m in progress]
+            if len(params) < 2 or any(p["progressToken"] != "test-progress" for p in params):
+                print(f"❌ Expected progress notifications, got: {params}")
+                return False
+            if params[-1]["progress"] != len(values) or params[-1]["total"] != len(values):
+                print(f"❌ Progress didn't reach the total: {params[-1]}")
+                return False
+
+            print(f"✅ {len(progress)} progress notifications before the result")
+            for p, arrived in zip(params, arrivals):
+                print(f"   - {arrived * 1000:.1f}ms: {p['progress']:.0f}/{p['total']:.0f} {p['message']}")
+            print(f"   - {arrivals[-1] * 1000:.1f}ms: result")
+            return True
+
+        except Exception as e:
+            print(f"❌ Progress streaming error: {e}")
+            return False
+
     async def run_all_tests(self) -> bool:
         """Run all tests in sequence."""
         print("🧪 Starting MCP Server Tests")
@@ -230,6 +380,8 @@ class MCPServerTest:
             ("List Tools", self.test_list_tools),
             ("Add Tool", self.test_call_add_tool),
             ("Multiply Tool", self.test_call_multiply_tool),
+            ("Batch Tools", self.test_call_batch_tools),
+            ("Progress Streaming", self.test_progress_streaming),
         ]
 
         passed = 0
@@ -254,24 +406,52 @@ class MCPServerTest:
             return False
 
 
-async def wait_for_server(url: str, timeout: int = 30) -> bool:
+@contextlib.asynccontextmanager
+async def asgi_lifespan(app):
+    """Run an ASGI app's lifespan startup/shutdown around the block."""
+    to_app: asyncio.Queue = asyncio.Queue()
+    from_app: asyncio.Queue = asyncio.Queue()
+    scope = {"type": "lifespan", "asgi": {"version": "3.0"}, "state": {}}
+    task = asyncio.create_task(app(scope, to_app.get, from_app.put))
+
+    await to_app.put({"type": "lifespan.startup"})
+    message = await from_app.get()
+    if message["type"] != "lifespan.startup.complete":
+        raise RuntimeError(f"App startup failed: {message.get('message', '')}")
+
+    try:
+        yield
+    finally:
+        await to_app.put({"type": "lifespan.shutdown"})
+        await from_app.get()
+        await task
+
+
+async def run_in_process() -> bool:
+    """Run the test suite against main.py's app without binding a port."""
+    from main import create_app
+
+    app = create_app()
+    async with asgi_lifespan(app):
+        async with MCPServerTest("http://testserver", app=app) as tester:
+            return await tester.run_all_tests()
+
+
+async def wait_for_server(url: str, timeout: int = 30, interval: float = 0.1) -> bool:
     """Wait for server to be ready."""
     print(f"⏳ Waiting for server at {url}...")
 
     async with httpx.AsyncClient() as client:
-        for _ in range(timeout):
+        for _ in range(int(timeout / interval)):
             try:
-                response = await client.get(url)
-                if response.status_code in [
-                    200,
-                    404,
-                    405,
-                ]:  # Any response means server is up
-                    print("✅ Server is responding")
+                response = await client.get(f"{url}/readyz")
+                # 503 means up but still starting; 404 is a server without /readyz
+                if response.status_code in [200, 404]:
+                    print("✅ Server is ready")
                     return True
-            except:
+            except httpx.HTTPError:
                 pass
-            await asyncio.sleep(1)
+            await asyncio.sleep(interval)
 
     print("❌ Server not responding")
     return False
@@ -279,6 +459,9 @@ async def wait_for_server(url: str, timeout: int = 30) -> bool:
 
 async def main():
     """Main test runner."""
+    if "--in-process" in sys.argv:
+        return await run_in_process()
+
     server_url = "http://localhost:8000"
 
     # Check if server is already running
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Tests for BoundedSessionManager eviction and idle expiry.
+
+Runs the streamable HTTP app in-process - no server needed.
+"""
+
+import asyncio
+import sys
+
+import httpx
+from mcp.server.fastmcp import FastMCP
+
+from session_store import BoundedSessionManager
+
+HEADERS = {
+    "Content-Type": "application/json",
+    "MCP-Protocol-Version": "2025-06-18",
+    "Accept": "application/json, text/event-stream",
+}
+
+INITIALIZE = {
+    "jsonrpc": "2.0",
+    "id": 1,
+    "method": "initialize",
+    "params": {
+        "protocolVersion": "2025-06-18",
+        "capabilities": {},
+        "clientInfo": {"name": "session-store-test", "version": "1.0.0"},
+    },
+}
+
+INITIALIZED = {"jsonrpc": "2.0", "method": "notifications/initialized"}
+
+PING = {"jsonrpc": "2.0", "id": 2, "method": "ping"}
+
+
+def build_app(**limits):
+    server = FastMCP("Session Store Test")
+    server._session_manager = BoundedSessionManager(app=server._mcp_server, **limits)
+    return server, server.streamable_http_app()
+
+
+async def open_session(client) -> str:
+    response = await client.post("/mcp/", json=INITIALIZE, headers=HEADERS)
+    session_id = response.headers["mcp-session-id"]
+    headers = {**HEADERS, "Mcp-Session-Id": session_id}
+    await client.post("/mcp/", json=INITIALIZED, headers=headers)
+    return session_id
+
+
+async def status_for(client, session_id) -> int:
+    headers = {**HEADERS, "Mcp-Session-Id": session_id}
+    response = await client.post("/mcp/", json=PING, headers=headers)
+    return response.status_code
+
+
+async def test_lru_eviction():
+    server, app = build_app(max_sessions=2)
+    manager = server.session_manager
+    transport = httpx.ASGITransport(app=app)
+
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            first = await open_session(client)
+            second = await open_session(client)
+            await status_for(client, first)  # first is now most recently used
+            await open_session(client)
+
+            first_status = await status_for(client, first)
+            second_status = await status_for(client, second)
+
+    assert manager.stats["evicted"] == 1, manager.stats
+    assert first_status == 200, f"status {first_status}"
+    assert second_status == 404, f"status {second_status}"
+
+
+async def test_idle_expiry():
+    server, app = build_app(idle_ttl=0.05)
+    manager = server.session_manager
+    transport = httpx.ASGITransport(app=app)
+
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            session_id = await open_session(client)
+            await asyncio.sleep(0.1)  # the background sweep runs every 25ms
+
+            expired = manager.stats["expired"]
+            remaining = manager.active_sessions
+            status = await status_for(client, session_id)
+
+    assert expired == 1, f"expired {expired}"
+    assert remaining == 0, f"{remaining} sessions remain"
+    assert status == 404, f"status {status}"
+
+
+async def test_zero_ttl_turns_expiry_off():
+    server, app = build_app(idle_ttl=0)
+    manager = server.session_manager
+    transport = httpx.ASGITransport(app=app)
+
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            session_id = await open_session(client)
+            await asyncio.sleep(0.05)
+            swept = await manager.expire_idle_sessions()
+            status = await status_for(client, session_id)
+
+    assert manager.sweep_interval == 60.0, manager.sweep_interval
+    assert swept == 0 and manager.stats["expired"] == 0, manager.stats
+    assert status == 200, f"status {status}"
+
+
+async def main():
+    tests = [test_lru_eviction, test_idle_expiry, test_zero_ttl_turns_expiry_off]
+    failed = 0
+    for test in tests:
+        try:
+            await test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+
+    print(f"📊 {len(tests) - failed}/{len(tests)} tests passed")
+    return failed == 0
+
+
+if __name__ == "__main__":
+    sys.exit(0 if asyncio.run(main()) else 1)
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Tests for coalescing identical concurrent tool calls.
+
+Calls the server's tools/call handler directly - no server needed.
+"""
+
+import asyncio
+import sys
+
+from mcp import types
+from mcp.server.fastmcp import FastMCP
+
+from metrics import ServerMetrics
+from singleflight import SingleFlight
+
+PURE = types.ToolAnnotations(idempotentHint=True)
+
+
+def build_server():
+    server = FastMCP("Singleflight Test")
+    runs = {"slow_square": 0, "counter": 0}
+
+    @server.tool(annotations=PURE)
+    async def slow_square(x: float) -> float:
+        runs["slow_square"] += 1
+        await asyncio.sleep(0.05)
+        return x * x
+
+    @server.tool()
+    async def counter(x: float) -> float:
+        runs["counter"] += 1
+        await asyncio.sleep(0.05)
+        return x
+
+    singleflight = SingleFlight()
+    singleflight.install(server)
+    return server, singleflight, runs
+
+
+def call(server, name, arguments):
+    handler = server._mcp_server.request_handlers[types.CallToolRequest]
+    request = types.CallToolRequest(
+        method="tools/call", params=types.CallToolRequestParams(name=name, arguments=arguments)
+    )
+    return handler(request)
+
+
+def text(result):
+    return result.root.content[0].text
+
+
+async def test_identical_calls_share_one_run():
+    server, singleflight, runs = build_server()
+    results = await asyncio.gather(*(call(server, "slow_square", {"x": 3}) for _ in range(5)))
+
+    assert runs["slow_square"] == 1, f"ran {runs['slow_square']} times"
+    assert {text(result) for result in results} == {"9.0"}
+    assert singleflight.stats["collapsed"] == 4
+    assert singleflight.in_flight == 0
+
+
+async def test_different_or_unsafe_calls_run_separately():
+    server, singleflight, runs = build_server()
+    await asyncio.gather(
+        call(server, "slow_square", {"x": 1}),
+        call(server, "slow_square", {"x": 2}),
+        call(server, "counter", {"x": 1}),
+        call(server, "counter", {"x": 1}),
+    )
+
+    assert runs == {"slow_square": 2, "counter": 2}, runs
+    assert singleflight.stats["collapsed"] == 0
+
+
+async def test_cancelled_caller_leaves_others_running():
+    server, singleflight, runs = build_server()
+    first = asyncio.ensure_future(call(server, "slow_square", {"x": 4}))
+    second = asyncio.ensure_future(call(server, "slow_square", {"x": 4}))
+    await asyncio.sleep(0.01)
+    first.cancel()
+
+    result = await second
+    assert text(result) == "16.0"
+    assert first.cancelled()
+    assert runs["slow_square"] == 1
+
+
+async def test_install_is_idempotent():
+    server, singleflight, _ = build_server()
+    metrics = ServerMetrics()
+    metrics.instrument_tools(server)
+    singleflight.install(server)
+    metrics.instrument_tools(server)
+
+    depth = 0
+    handler = server._mcp_server.request_handlers[types.CallToolRequest]
+    while hasattr(handler, "_owner"):
+        depth += 1
+        handler = handler.__wrapped__
+    assert depth == 2, f"{depth} wrappers installed"
+
+
+async def main():
+    tests = [
+        test_identical_calls_share_one_run,
+        test_different_or_unsafe_calls_run_separately,
+        test_cancelled_caller_leaves_others_running,
+        test_install_is_idempotent,
+    ]
+    failed = 0
+    for test in tests:
+        try:
+            await test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+
+    print(f"📊 {len(tests) - failed}/{len(tests)} tests passed")
+    return failed == 0
+
+
+if __name__ == "__main__":
+    sys.exit(0 if asyncio.run(main()) else 1)
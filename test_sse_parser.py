@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Tests for the proxy's incremental SSE parser.
+
+Runs offline - no server needed.
+"""
+
+import sys
+
+from claude_mcp_proxy import SSEParser
+
+
+def test_single_event():
+    parser = SSEParser()
+    events = parser.feed(b'event: message\ndata: {"id": 1}\n\n')
+    assert events == [{"event": "message", "data": '{"id": 1}', "id": None}]
+
+
+def test_split_across_chunks():
+    parser = SSEParser()
+    payload = b'event: message\r\nid: 7\r\ndata: {"a":\r\ndata: 1}\r\n\r\n'
+    events = []
+    for i in range(len(payload)):
+        events.extend(parser.feed(payload[i : i + 1]))
+    assert events == [{"event": "message", "data": '{"a":\n1}', "id": "7"}]
+
+
+def test_multiple_events_and_comments():
+    parser = SSEParser()
+    events = parser.feed(b": keep-alive\n\ndata: one\n\ndata: two\n\ndata: thr")
+    assert [e["data"] for e in events] == ["one", "two"]
+    assert [e["data"] for e in parser.feed(b"ee\n\n")] == ["three"]
+
+
+def test_event_size_limit():
+    parser = SSEParser(max_event_size=16)
+    try:
+        parser.feed(b"data: " + b"x" * 64)
+    except ValueError:
+        return
+    raise AssertionError("oversized event was not rejected")
+
+
+def main():
+    tests = [
+        test_single_event,
+        test_split_across_chunks,
+        test_multiple_events_and_comments,
+        test_event_size_limit,
+    ]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+
+    print(f"📊 {len(tests) - failed}/{len(tests)} tests passed")
+    return failed == 0
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
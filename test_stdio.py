@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Tests for the stdio transport: `python main.py --stdio` as a local client
+spawns it, through the benchmark's StdioClient.
+
+Starts its own server subprocesses - no running server needed.
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+
+from benchmark_transports import MAIN_SCRIPT, StdioClient, measure
+
+
+def tool_call(request_id: int, name: str, **arguments) -> dict:
+    params = {"name": name, "arguments": arguments}
+    return {"jsonrpc": "2.0", "id": request_id, "method": "tools/call", "params": params}
+
+
+async def test_stdio_session_serves_tools():
+    client = StdioClient([sys.executable, MAIN_SCRIPT, "--stdio"])
+    await client.start_session()
+    try:
+        listed = await client._send_request({"jsonrpc": "2.0", "id": 2, "method": "tools/list"})
+        names = {tool["name"] for tool in listed["result"]["tools"]}
+        assert {"add", "multiply", "evaluate"} <= names, names
+
+        added = await client._send_request(tool_call(3, "add", a=2, b=3))
+        assert added["result"]["content"][0]["text"] == "5.0", added
+
+        failed = await client._send_request(tool_call(4, "evaluate", expression="x / 0"))
+        assert failed["result"]["isError"], failed
+    finally:
+        await client.aclose()
+    assert client.process.returncode == 0, client.process.returncode
+
+
+async def test_benchmark_starts_from_another_directory():
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as elsewhere:
+        os.chdir(elsewhere)
+        try:
+            client = StdioClient([sys.executable, MAIN_SCRIPT, "--stdio"])
+            latencies, errors = await measure(client, "add", 5)
+        finally:
+            os.chdir(cwd)
+    assert len(latencies) == 5 and errors == 0, (latencies, errors)
+
+
+async def main():
+    tests = [test_stdio_session_serves_tools, test_benchmark_starts_from_another_directory]
+    failed = 0
+    for test in tests:
+        try:
+            await test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+
+    print(f"📊 {len(tests) - failed}/{len(tests)} tests passed")
+    return failed == 0
+
+
+if __name__ == "__main__":
+    sys.exit(0 if asyncio.run(main()) else 1)
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Tests for server-side tool memoization.
+
+Runs offline - no server needed.
+"""
+
+import asyncio
+import sys
+import time
+
+from tool_cache import ToolCache
+
+
+def test_canonical_keys():
+    cache = ToolCache(max_entries=10)
+    calls = []
+
+    @cache.memoize()
+    def scale(values: list[float], factor: float = 2.0) -> list[float]:
+        calls.append(1)
+        return [v * factor for v in values]
+
+    assert scale([1, 2]) == [2, 4]
+    assert scale(values=[1, 2]) == [2, 4]
+    assert scale([1, 2], factor=2.0) == [2, 4]
+    assert len(calls) == 1, f"ran {len(calls)} times"
+    assert cache.stats == {"hits": 2, "misses": 1, "evictions": 0}
+    assert abs(cache.hit_ratio - 2 / 3) < 1e-9
+
+
+def test_size_and_byte_bounds():
+    cache = ToolCache(max_entries=2)
+
+    @cache.memoize()
+    def echo(x: int) -> int:
+        return x
+
+    echo(1)
+    echo(2)
+    echo(1)  # 1 is now most recently used
+    echo(3)
+    assert len(cache) == 2 and cache.stats["evictions"] == 1
+    echo(1)
+    assert cache.stats["hits"] == 2, "1 should have survived eviction"
+
+    small = ToolCache(max_entries=100, max_bytes=400)
+
+    @small.memoize()
+    def blob(n: int) -> str:
+        return "x" * n
+
+    for n in range(100, 105):
+        blob(n)
+    assert small.bytes_held <= 400, small.bytes_held
+    assert small.stats["evictions"] > 0
+
+
+def test_ttl_and_errors():
+    cache = ToolCache(max_entries=10)
+    calls = []
+
+    @cache.memoize(ttl=0.01)
+    def divide(a: float, b: float) -> float:
+        calls.append(1)
+        return a / b
+
+    divide(1, 2)
+    time.sleep(0.02)
+    divide(1, 2)
+    assert len(calls) == 2, "expired entry should be recomputed"
+
+    for _ in range(2):
+        try:
+            divide(1, 0)
+        except ZeroDivisionError:
+            pass
+    assert len(calls) == 4, "errors must not be cached"
+
+
+def test_async_tools_and_disabled_cache():
+    cache = ToolCache(max_entries=10)
+
+    @cache.memoize()
+    async def add(a: float, b: float) -> float:
+        return a + b
+
+    assert asyncio.run(add(1, 2)) == 3
+    assert asyncio.run(add(1, 2)) == 3
+    assert cache.stats["hits"] == 1
+
+    def plain(a: float) -> float:
+        return a
+
+    assert ToolCache(max_entries=0).memoize()(plain) is plain
+
+
+def main():
+    tests = [
+        test_canonical_keys,
+        test_size_and_byte_bounds,
+        test_ttl_and_errors,
+        test_async_tools_and_disabled_cache,
+    ]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+
+    print(f"📊 {len(tests) - failed}/{len(tests)} tests passed")
+    return failed == 0
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Smoke test for multi-worker serving: WORKERS=2 runs two processes in
+stateless HTTP mode, so requests carry no session ID.
+
+Starts main.py on a spare port and stops it afterwards.
+"""
+
+import asyncio
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+
+import httpx
+
+from main import create_app, mcp
+from test_lifecycle import HEADERS, INITIALIZE
+
+
+async def test_workers_switch_on_stateless_mode():
+    workers = os.environ.get("WORKERS")
+    stateless = mcp.settings.stateless_http
+    os.environ["WORKERS"] = "2"
+    try:
+        mcp.settings.stateless_http = False
+        create_app()
+        assert mcp.settings.stateless_http is True
+    finally:
+        mcp.settings.stateless_http = stateless
+        if workers is None:
+            del os.environ["WORKERS"]
+        else:
+            os.environ["WORKERS"] = workers
+
+
+async def test_two_workers_serve_without_sessions():
+    port = 8124
+    url = f"http://127.0.0.1:{port}"
+    server = subprocess.Popen(
+        [sys.executable, "main.py"],
+        env={**os.environ, "HOST": "0.0.0.0", "PORT": str(port), "WORKERS": "2"},
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+    )
+    try:
+        async with httpx.AsyncClient(timeout=5.0) as client:
+            deadline = time.monotonic() + 20
+            while time.monotonic() < deadline:
+                try:
+                    if (await client.get(f"{url}/readyz")).status_code == 200:
+                        break
+                except httpx.HTTPError:
+                    pass
+                await asyncio.sleep(0.1)
+
+            initialized = await client.post(f"{url}/mcp/", json=INITIALIZE, headers=HEADERS)
+            # No initialize first and no session ID: any worker can answer
+            calls = [
+                {
+                    "jsonrpc": "2.0",
+                    "id": request_id,
+                    "method": "tools/call",
+                    "params": {"name": "add", "arguments": {"a": request_id, "b": 1}},
+                }
+                for request_id in range(2, 8)
+            ]
+            replies = await asyncio.gather(
+                *(client.post(f"{url}/mcp/", json=call, headers=HEADERS) for call in calls)
+            )
+
+        server.send_signal(signal.SIGTERM)
+        output, _ = server.communicate(timeout=15)
+    finally:
+        if server.poll() is None:
+            server.kill()
+            server.wait()
+
+    assert initialized.status_code == 200, initialized.text
+    assert "mcp-session-id" not in initialized.headers, "stateless mode should issue no session"
+    for call, reply in zip(calls, replies):
+        assert reply.status_code == 200, reply.text
+        text = reply.text
+        if text.startswith("event:") or "data:" in text:
+            text = next(line[5:] for line in text.splitlines() if line.startswith("data:"))
+        result = json.loads(text)["result"]
+        expected = call["params"]["arguments"]["a"] + 1
+        assert float(result["content"][0]["text"]) == expected, result
+    assert "Running 2 worker processes with stateless HTTP sessions" in output, output[-2000:]
+
+
+async def main():
+    tests = [test_workers_switch_on_stateless_mode, test_two_workers_serve_without_sessions]
+    failed = 0
+    for test in tests:
+        try:
+            await test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+
+    print(f"📊 {len(tests) - failed}/{len(tests)} tests passed")
+    return failed == 0
+
+
+if __name__ == "__main__":
+    sys.exit(0 if asyncio.run(main()) else 1)
@@ -0,0 +1,160 @@
+"""Server-side memoization for pure tools"""
+
+import functools
+import inspect
+import json
+import os
+import sys
+import time
+from collections import OrderedDict
+
+from metrics import Counter
+
+_MISSING = object()
+
+
+class ToolCache:
+    """LRU cache of tool results keyed on canonicalized arguments
+
+    Bounded by entry count and by the approximate bytes held, with an
+    optional per-entry TTL. With ``max_entries=0`` the cache is disabled and
+    ``memoize`` returns tools unchanged, so it costs nothing when off.
+    """
+
+    def __init__(self, max_entries: int = 0, max_bytes: int = 64 * 1024 * 1024, ttl=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.bytes_held = 0
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+        self.hits = Counter(
+            "mcp_tool_cache_hits_total", "Tool calls answered from the cache", ("tool",)
+        )
+        self.misses = Counter(
+            "mcp_tool_cache_misses_total", "Cacheable tool calls that ran the tool", ("tool",)
+        )
+        # key -> (result, size in bytes, expiry on the monotonic clock or None)
+        self._entries: OrderedDict[tuple, tuple] = OrderedDict()
+
+    @classmethod
+    def from_env(cls) -> "ToolCache":
+        ttl = float(os.getenv("TOOL_CACHE_TTL", "300"))
+        return cls(
+            max_entries=int(os.getenv("TOOL_CACHE_SIZE", "0")),
+            max_bytes=int(os.getenv("TOOL_CACHE_MAX_BYTES", str(64 * 1024 * 1024))),
+            ttl=ttl or None,
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.stats["hits"] + self.stats["misses"]
+        return self.stats["hits"] / total if total else 0.0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return _MISSING
+        result, _, expires_at = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            self._remove(key)
+            return _MISSING
+        self._entries.move_to_end(key)
+        return result
+
+    def put(self, key, result, ttl=...) -> None:
+        if ttl is ...:
+            ttl = self.ttl
+        size = sys.getsizeof(key[1]) + sys.getsizeof(result)
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        expires_at = None if ttl is None else time.monotonic() + ttl
+        self._entries[key] = (result, size, expires_at)
+        self.bytes_held += size
+        while len(self._entries) > self.max_entries or self.bytes_held > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+            self.stats["evictions"] += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.bytes_held = 0
+
+    def _remove(self, key) -> None:
+        _, size, _ = self._entries.pop(key)
+        self.bytes_held -= size
+
+    def _record(self, name: str, hit: bool) -> None:
+        if hit:
+            self.stats["hits"] += 1
+            self.hits.inc(name)
+        else:
+            self.stats["misses"] += 1
+            self.misses.inc(name)
+
+    def memoize(self, ttl=...):
+        """Decorator caching a pure tool's results; apply under ``@mcp.tool()``
+
+        Only use it on tools whose result depends on nothing but their
+        arguments. Calls whose arguments aren't JSON-serializable, and calls
+        that raise, are never cached.
+        """
+
+        def decorator(fn):
+            if not self.enabled:
+                return fn
+
+            name = fn.__name__
+            signature = inspect.signature(fn)
+
+            def make_key(args, kwargs):
+                bound = signature.bind(*args, **kwargs)
+                bound.apply_defaults()
+                try:
+                    canonical = json.dumps(bound.arguments, sort_keys=True, separators=(",", ":"))
+                except (TypeError, ValueError):
+                    return None
+                return (name, canonical)
+
+            if inspect.iscoroutinefunction(fn):
+
+                @functools.wraps(fn)
+                async def cached(*args, **kwargs):
+                    key = make_key(args, kwargs)
+                    if key is not None:
+                        result = self.get(key)
+                        if result is not _MISSING:
+                            self._record(name, hit=True)
+                            return result
+                        self._record(name, hit=False)
+                    result = await fn(*args, **kwargs)
+                    if key is not None:
+                        self.put(key, result, ttl)
+                    return result
+
+            else:
+
+                @functools.wraps(fn)
+                def cached(*args, **kwargs):
+                    key = make_key(args, kwargs)
+                    if key is not None:
+                        result = self.get(key)
+                        if result is not _MISSING:
+                            self._record(name, hit=True)
+                            return result
+                        self._record(name, hit=False)
+                    result = fn(*args, **kwargs)
+                    if key is not None:
+                        self.put(key, result, ttl)
+                    return result
+
+            return cached
+
+        return decorator